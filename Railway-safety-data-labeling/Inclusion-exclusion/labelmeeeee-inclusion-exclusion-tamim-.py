@@ -1,69 +1,73 @@
 import os
-import glob
-import subprocess
+import sys
+import argparse
 import shutil
 
+# Make the shared labelme_tools package at the repository root importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from labelme_tools.classes import TASK_LABELS
+from labelme_tools.dedup import dedup_folder, print_propagation, propagate_labels
+from labelme_tools.discovery import iter_image_files
+from labelme_tools.labeling import label_per_image, label_session, remaining_queue, write_label_file
+
 # ✅ Folder containing your images
 image_folder = r"C:\Users\tadnan\Downloads\Labeled-data\Inclusion-exclusion-dataset" 
 
 # ✅ Try to locate labelme executable
 labelme_cmd = shutil.which("labelme") or r"C:\Users\tadnan\AppData\Local\anaconda3\Scripts\labelme.exe"
-if not os.path.exists(labelme_cmd):
-    raise FileNotFoundError(f"❌ LabelMe not found at: {labelme_cmd}")
 
-# ✅ Label definitions (letter hints + real names)
-labels = [
-    "Vehicle",
-    "Train",
-    "Empty crossing",
-    "Pedestrian"
-]
-labels_path = os.path.join(image_folder, "default_labels.txt")
+# ✅ Label definitions (letter hints + real names); shared with the YOLO exporters so
+# class IDs follow this order
+labels = TASK_LABELS["inclusion-exclusion"]
 
-# ✅ Write labels to file
-with open(labels_path, "w", encoding="utf-8") as f:
-    for label in labels:
-        f.write(label + "\n")
+hint = "🔧 R = Rectangle → 1=V(vehicle), 2=T(train), 3=E(empty), 4=P(pedestrian) → Ctrl+S → Close"
 
-print(f"📝 Label file created with letter hints: {labels_path}")
 
-# ✅ Supported image types
-image_extensions = ('*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tif', '*.tiff', '*.webp')
+def main():
+    parser = argparse.ArgumentParser(description="Open the unannotated images in LabelMe.")
+    parser.add_argument("--session", action="store_true",
+                        help="open LabelMe once on all unannotated images; each saved JSON is "
+                             "moved to its -json folder as soon as it appears")
+    parser.add_argument("--dedup", action="store_true",
+                        help="open only one image per group of near-duplicates, then copy its labels "
+                             "to the rest of the group")
+    parser.add_argument("--prelabel", metavar="MODEL",
+                        help="first draft boxes with a detector on the CPU (.onnx or ultralytics .pt), "
+                             "so LabelMe opens with them and they only need correcting")
+    args = parser.parse_args()
 
-# ✅ Step 1: Collect all images using glob
-all_images = []
-for ext in image_extensions:
-    all_images.extend(glob.glob(os.path.join(image_folder, '**', ext), recursive=True))
+    if not os.path.exists(labelme_cmd):
+        raise FileNotFoundError(f"❌ LabelMe not found at: {labelme_cmd}")
 
-print(f"\n📸 Found {len(all_images)} image(s).")
+    # ✅ Write labels to file
+    labels_path = write_label_file(image_folder, labels)
+    print(f"📝 Label file created with letter hints: {labels_path}")
 
-# ✅ Step 2: Loop through each image and open in LabelMe
-for img_path in sorted(all_images):
-    img_name = os.path.basename(img_path)
-    img_stem = os.path.splitext(img_name)[0]
-    folder_path = os.path.dirname(img_path)
-    subfolder_name = os.path.basename(folder_path)
+    queue = None
+    if args.dedup:
+        # Hashed on every CPU; unchanged images come from the cache on later runs
+        queue = dedup_folder(image_folder, workers=0)
 
-    original_json = os.path.join(folder_path, img_stem + ".json")
-    json_folder = os.path.join(os.path.dirname(folder_path), f"{subfolder_name}-json")
-    os.makedirs(json_folder, exist_ok=True)
-    json_target = os.path.join(json_folder, img_stem + ".json")
+    if args.prelabel:
+        # Imported here so the plain labeling loop never needs numpy or a model runtime
+        from labelme_tools.prelabel import prelabel_images
+        _, remaining = remaining_queue(iter_image_files(image_folder) if queue is None else queue)
+        prelabel_images(remaining, args.prelabel, labels, log="progress")
 
-    if os.path.exists(json_target):
-        print(f"⏩ Already annotated: {img_name}")
-        continue
+    if args.session:
+        found = label_session(image_folder, labelme_cmd, labels_path, hint, images=queue)
+    elif queue is not None:
+        found = label_per_image(queue, labelme_cmd, labels_path, hint)
+    else:
+        # ✅ Walk the image folder in a single pass (.jpg .jpeg .png .bmp .tif .tiff .webp,
+        # any case), then check them against one listing per -json folder.
+        print(f"\n📸 Searching for images in: {image_folder}")
+        found = label_per_image(iter_image_files(image_folder), labelme_cmd, labels_path, hint)
 
-    print(f"\n🖼️ Opening LabelMe for: {img_path}")
-    print("🔧 R = Rectangle → 1=V(vehicle), 2=T(train), 3=E(empty), 4=P(pedestrian) → Ctrl+S → Close")
+    print(f"\n📸 Went through {found} image(s).")
+    if args.dedup:
+        print_propagation(*propagate_labels(image_folder))
 
-    try:
-        subprocess.run(f'"{labelme_cmd}" "{img_path}" --labels "{labels_path}"', shell=True)
-    except Exception as e:
-        print(f"❌ ERROR: Could not open LabelMe: {e}")
-        continue
 
-    if os.path.exists(original_json):
-        shutil.move(original_json, json_target)
-        print(f"✅ Annotation saved to: {json_target}")
-    else:
-        print(f"⚠️ No annotation saved for: {img_path}")
+if __name__ == "__main__":
+    main()
@@ -1,106 +1,60 @@
 import os
-import json
-import glob
-import re
-from PIL import Image
+import sys
+import argparse
+
+# Make the shared labelme_tools package at the repository root importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from labelme_tools.classes import TASK_LABELS, class_map_from_labels, read_class_list
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.images import IMAGE_MODES, IMAGE_SOURCES
+from labelme_tools.metrics import add_metrics_arguments
+from labelme_tools.shards import add_shard_arguments
+from labelme_tools.split import DatasetSplit, add_split_arguments
+from labelme_tools.yolo import export_yolo
 
 # === CONFIGURATION ===
-
 input_root = r"C:\Users\tadnan\Downloads\Labeled-data\Inclusion-exclusion-dataset\JSON-Vehicle-inclusion-exclusion"
 output_root = r"C:\Users\tadnan\Downloads\Labeled-data\Inclusion-exclusion-dataset"
 
-# Output folders for YOLOv8-compatible image and label data
+# Output folder for YOLOv8-compatible image and label data (images/ and labels/)
 output_dir = os.path.join(output_root, "YOLOv8-ready-multiclassification")
-image_out = os.path.join(output_dir, "images")  # Where images will be saved
-label_out = os.path.join(output_dir, "labels")  # Where YOLO .txt files will be saved
-
-# Create output directories if they don't exist
-os.makedirs(image_out, exist_ok=True)
-os.makedirs(label_out, exist_ok=True)
-
-# === CLASS MAPPING ===
-
-class_map = {}
-class_index = 0
-
-# === HELPER FUNCTIONS ===
-
-def clean_label(label):
-    """Sanitize class names."""
-    return re.sub(r'[\\/:*?"<>|]', '_', label.strip().lower())
-
-def get_yolo_bbox(points, img_w, img_h):
-    """Convert polygon points to YOLO format (normalized)."""
-    x_coords = [p[0] for p in points]
-    y_coords = [p[1] for p in points]
-    x_min, x_max = min(x_coords), max(x_coords)
-    y_min, y_max = min(y_coords), max(y_coords)
-    x_center = (x_min + x_max) / 2.0 / img_w
-    y_center = (y_min + y_max) / 2.0 / img_h
-    width = (x_max - x_min) / img_w
-    height = (y_max - y_min) / img_h
-    return x_center, y_center, width, height
-
-# === MAIN PROCESSING LOOP ===
-
-json_files = glob.glob(os.path.join(input_root, '**', '*.json'), recursive=True)
-print(f"🔍 Found {len(json_files)} JSON file(s).")
-
-saved = 0
-
-for json_path in json_files:
-    try:
-        # Load and clean JSON
-        with open(json_path, 'r', encoding='utf-8') as f:
-            raw = f.read().replace('T:/', '').replace('T:\\', '').replace('V:/', '').replace('V:\\', '')
-        data = json.loads(raw)
-
-        shapes = data.get('shapes', [])
-        if not shapes:
-            continue
-
-        image_file_name = os.path.basename(data.get('imagePath', ''))
-        image_path = os.path.join(os.path.dirname(json_path), image_file_name)
-        if not os.path.exists(image_path):
-            continue
-
-        # Load and save image
-        image = Image.open(image_path).convert("RGB")
-        img_w, img_h = image.size
-        new_img_path = os.path.join(image_out, image_file_name)
-        image.save(new_img_path)
-
-        # Save labels
-        base_name = os.path.splitext(image_file_name)[0]
-        label_txt = os.path.join(label_out, base_name + ".txt")
-
-        with open(label_txt, 'w') as out_f:
-            for shape in shapes:
-                label = clean_label(shape.get('label', ''))
-                points = shape.get('points', [])
-                if not label or not points:
-                    continue
-
-                if label not in class_map:
-                    class_map[label] = class_index
-                    class_index += 1
-                class_id = class_map[label]
-
-                x_center, y_center, width, height = get_yolo_bbox(points, img_w, img_h)
-                out_f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
-
-        saved += 1
-        print(f"✅ Saved image + label: {image_file_name}")
-
-    except Exception as e:
-        print(f"❌ Error processing {json_path}: {e}")
-
-# Save class index
-class_file = os.path.join(output_dir, "classes.txt")
-with open(class_file, "w") as f:
-    for cls, idx in sorted(class_map.items(), key=lambda x: x[1]):
-        f.write(f"{idx}: {cls}\n")
 
-# === SUMMARY ===
-print(f"\n✅ {saved} images converted to YOLO format.")
-print(f"📂 Output saved in: {output_dir}")
+# Class IDs follow the label list the launcher gives LabelMe
+task = "inclusion-exclusion"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export LabelMe JSONs to YOLO images/ and labels/.")
+    parser.add_argument("--image-mode", choices=IMAGE_MODES, default="copy",
+                        help="how images are placed in images/ (reencode = old decode + save)")
+    parser.add_argument("--classes", metavar="FILE",
+                        help="fixed class list, one label per line (e.g. default_labels.txt); "
+                             "default: the task's labels")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to export with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--image-source", choices=IMAGE_SOURCES, default="file",
+                        help="read images from the file, the JSON's imageData, or imageData when present (auto)")
+    parser.add_argument("--full", action="store_true",
+                        help="reconvert everything instead of only JSONs changed since the last run")
+    add_split_arguments(parser)
+    add_shard_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    # === CLASS MAPPING ===
+    labels = read_class_list(args.classes) if args.classes else TASK_LABELS[task]
+    class_map = class_map_from_labels(labels)
+
+    # Streamed: conversion starts on the first JSON while the walk continues
+    print(f"🔍 Searching for JSON files in: {input_root}")
+    json_files = iter_json_files(input_root)
+
+    split = DatasetSplit(args.split, args.stratify, args.split_seed) if args.split else None
+    export_yolo(json_files, output_dir, class_map, image_mode=args.image_mode,
+                incremental=not args.full, workers=args.workers, image_source=args.image_source,
+                log=args.log, metrics_path=args.metrics, output_format=args.output_format,
+                shard_size=args.shard_size, split=split)
+
+
+if __name__ == "__main__":
+    main()
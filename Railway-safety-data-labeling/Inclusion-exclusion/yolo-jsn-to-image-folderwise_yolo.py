@@ -1,15 +1,22 @@
 import os
-import json
-import glob
-import re
-from PIL import Image, ImageDraw
-import numpy as np
+import sys
+import argparse
+from itertools import chain
+
+# Make the shared labelme_tools package at the repository root importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from labelme_tools.classes import TASK_LABELS, class_map_from_labels, read_class_list
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.export import export_dataset
+from labelme_tools.images import IMAGE_MODES, IMAGE_SOURCES
+from labelme_tools.masks import MASK_FORMATS
+from labelme_tools.metrics import add_metrics_arguments
 
 # === CONFIGURATION ===
 input_root = r"C:\Users\tadnan\Downloads\Labeled-data\Inclusion-exclusion-dataset\JSON-Vehicle-inclusion-exclusion"
 output_root = r"C:\Users\tadnan\Downloads\Labeled-data\Inclusion-exclusion-dataset"
 output_dir = os.path.join(output_root, "YOLOv8-ready-inclusion-exclusion")
-label_format = "txt"  # Options: "txt" for YOLOv8 or "png" for segmentation masks
+label_format = "txt"  # Options: "txt" for YOLOv8, or "png", "rle" (COCO RLE JSON) or "npz" for segmentation masks
 
 # Folder-to-cleaned-class mapping
 class_folders = {
@@ -19,104 +26,45 @@ class_folders = {
     "Crossing": "Empty crossing"
 }
 
-# === SETUP OUTPUT STRUCTURE ===
-for folder, class_name in class_folders.items():
-    os.makedirs(os.path.join(output_dir, "images", class_name), exist_ok=True)
-    os.makedirs(os.path.join(output_dir, "labels", class_name), exist_ok=True)
-
-# === YOLO BBOX UTILITY ===
-def get_yolo_bbox(points, img_w, img_h):
-    x_coords = [p[0] for p in points]
-    y_coords = [p[1] for p in points]
-    x_min, x_max = min(x_coords), max(x_coords)
-    y_min, y_max = min(y_coords), max(y_coords)
-
-    x_center = (x_min + x_max) / 2.0 / img_w
-    y_center = (y_min + y_max) / 2.0 / img_h
-    width = (x_max - x_min) / img_w
-    height = (y_max - y_min) / img_h
-    return x_center, y_center, width, height
-
-# === MAIN LOOP ===
-class_map = {}
-class_index = 0
-
-for folder_name, class_name in class_folders.items():
-    json_files = glob.glob(os.path.join(input_root, folder_name, "*.json"))
-    print(f"📁 Converting {len(json_files)} annotations from '{folder_name}' → '{class_name}'")
-
-    for json_path in json_files:
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                raw = f.read().replace("T:/", "").replace("V:/", "")
-            data = json.loads(raw)
-
-            shapes = data.get("shapes", [])
-            if not shapes:
-                continue
-
-            image_file = os.path.basename(data["imagePath"])
-            image_path = os.path.join(os.path.dirname(json_path), image_file)
-            if not os.path.exists(image_path):
-                continue
-
-            # === Load and Save Image ===
-            img = Image.open(image_path).convert("RGB")
-            w, h = img.size
-            img_out = os.path.join(output_dir, "images", class_name, image_file)
-            img.save(img_out)
-
-            # === Generate Label ===
-            base_name = os.path.splitext(image_file)[0]
-            if label_format == "txt":
-                label_file = base_name + ".txt"
-                label_out = os.path.join(output_dir, "labels", class_name, label_file)
-                with open(label_out, "w") as out_f:
-                    for shape in shapes:
-                        raw_label = shape.get("label", "")
-                        cleaned = re.sub(r'[\\/:*?"<>|]', "_", raw_label.strip())
-                        label = cleaned.lower()
-                        points = shape.get("points", [])
-                        if not label or not points:
-                            continue
-
-                        if label not in class_map:
-                            class_map[label] = class_index
-                            class_index += 1
-                        cls_id = class_map[label]
-
-                        x, y, bw, bh = get_yolo_bbox(points, w, h)
-                        out_f.write(f"{cls_id} {x:.6f} {y:.6f} {bw:.6f} {bh:.6f}\n")
-
-            elif label_format == "png":
-                label_file = base_name + ".png"
-                label_out = os.path.join(output_dir, "labels", class_name, label_file)
-                label_mask = Image.new("L", (w, h), 0)
-                draw = ImageDraw.Draw(label_mask)
-                for shape in shapes:
-                    raw_label = shape.get("label", "")
-                    cleaned = re.sub(r'[\\/:*?"<>|]', "_", raw_label.strip())
-                    label = cleaned.lower()
-                    points = shape.get("points", [])
-                    if not label or not points:
-                        continue
-
-                    if label not in class_map:
-                        class_map[label] = class_index
-                        class_index += 1
-                    cls_id = class_map[label]
-
-                    polygon = [(float(x), float(y)) for x, y in points]
-                    draw.polygon(polygon, fill=cls_id)
-                label_mask.save(label_out)
-
-        except Exception as e:
-            print(f"❌ Error processing {json_path}: {e}")
-
-# === SAVE CLASS INDEX MAP ===
-classes_txt_path = os.path.join(output_dir, "classes.txt")
-with open(classes_txt_path, "w") as f:
-    for cls, idx in sorted(class_map.items(), key=lambda x: x[1]):
-        f.write(f"{idx}: {cls}\n")
-
-print("\n✅ Conversion complete. YOLO-ready images and labels saved by class.")
+# Class IDs follow the label list the launcher gives LabelMe
+task = "inclusion-exclusion"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export LabelMe JSONs to YOLO images/ and labels/ by class folder.")
+    parser.add_argument("--label-format", choices=("txt",) + MASK_FORMATS, default=label_format,
+                        help="YOLO txt labels, or segmentation masks as PNG, COCO RLE JSON or npz "
+                             "(rle and npz are smaller and several times faster to write)")
+    parser.add_argument("--instance-masks", action="store_true",
+                        help="png masks: also write <name>_instances.png with one ID per object")
+    parser.add_argument("--image-mode", choices=IMAGE_MODES, default="copy",
+                        help="how images are placed in images/ (reencode = old decode + save)")
+    parser.add_argument("--classes", metavar="FILE",
+                        help="fixed class list, one label per line; default: the task's labels")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to export with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--image-source", choices=IMAGE_SOURCES, default="file",
+                        help="read images from the file, the JSON's imageData, or imageData when present (auto)")
+    parser.add_argument("--full", action="store_true",
+                        help="reconvert everything instead of only JSONs changed since the last run")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    # === CLASS MAPPING ===
+    labels = read_class_list(args.classes) if args.classes else TASK_LABELS[task]
+    class_map = class_map_from_labels(labels)
+
+    # Only the JSONs directly inside the mapped class folders are exported; subfolders are not searched
+    json_files = chain.from_iterable(iter_json_files(os.path.join(input_root, folder_name), recursive=False)
+                                     for folder_name in class_folders)
+
+    export_dataset(json_files, output_dir, ["folderwise"], class_map, image_mode=args.image_mode,
+                   image_source=args.image_source, workers=args.workers, incremental=not args.full,
+                   folder_classes=class_folders, folderwise_labels=args.label_format,
+                   target_dirs={"folderwise": output_dir}, log=args.log, metrics_path=args.metrics,
+                   instance_masks=args.instance_masks)
+    print("\n✅ Conversion complete. YOLO-ready images and labels saved by class.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,43 @@
 import os
-import json
-import glob
-import re
-from PIL import Image, ImageDraw
+import argparse
+
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.engine import convert_annotated
+from labelme_tools.images import IMAGE_SOURCES
+from labelme_tools.metrics import add_metrics_arguments
+from labelme_tools.shards import add_shard_arguments
 
 # === CONFIG ===
 input_root = r"C:\Users\tadnan\Downloads\final-dataset"
 output_root = os.path.join(input_root, "annotated_images_by_label")
-os.makedirs(output_root, exist_ok=True)
-
-# === SANITIZER: make label safe for folder names ===
-def clean_label(label):
-    return re.sub(r'[\\/:*?"<>|]', '_', label.strip())
-
-# === FIND JSON FILES ===
-json_files = glob.glob(os.path.join(input_root, '**', '*.json'), recursive=True)
-print(f"🔍 Found {len(json_files)} JSON file(s).")
-
-cleaned = 0
-converted = 0
-
-for json_path in json_files:
-    try:
-        # === FIX RAW JSON STRING BEFORE LOADING ===
-        with open(json_path, 'r', encoding='utf-8') as f:
-            raw = f.read().replace('T:/', '').replace('T:\\', '').replace('V:/', '').replace('V:\\', '')
-        data = json.loads(raw)
-
-        shapes = data.get('shapes', [])
-        if not shapes:
-            print(f"⚠️ No annotations found in: {json_path}")
-            continue
-
-        # === CLEAN IMAGE PATH ===
-        original_image_path = data.get('imagePath', '')
-        image_file_name = os.path.basename(original_image_path)
-        data['imagePath'] = image_file_name
-
-        # Save cleaned JSON back
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
-        cleaned += 1
-
-        # === LOAD IMAGE ===
-        image_path = os.path.join(os.path.dirname(json_path), image_file_name)
-        if not os.path.exists(image_path):
-            print(f"❌ Image not found: {image_path}")
-            continue
 
-        image = Image.open(image_path).convert("RGB")
-        draw = ImageDraw.Draw(image)
 
-        # === CLEAN FIRST LABEL (for folder name) ===
-        first_label_raw = shapes[0].get('label', '')
-        first_label = clean_label(first_label_raw)
-        if not first_label:
-            print(f"⚠️ Skipping {json_path}: label missing or invalid")
-            continue
+def main():
+    parser = argparse.ArgumentParser(description="Convert LabelMe JSONs into annotated images sorted by label.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to convert with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--image-source", choices=IMAGE_SOURCES, default="file",
+                        help="read images from the file, the JSON's imageData, or imageData when present (auto)")
+    parser.add_argument("--preview-size", type=int, metavar="PX",
+                        help="save small QA previews, at most PX pixels on the longer side (default: full size)")
+    parser.add_argument("--full", action="store_true",
+                        help="reconvert everything instead of only JSONs changed since the last run")
+    add_shard_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
 
-        class_folder = os.path.join(output_root, first_label)
-        os.makedirs(class_folder, exist_ok=True)
+    os.makedirs(output_root, exist_ok=True)
 
-        # === DRAW SHAPES ===
-        for shape in shapes:
-            label = shape.get('label', '').strip()
-            points = shape.get('points', [])
-            if not label or not points:
-                continue
-            if len(points) == 2:
-                draw.rectangle([tuple(points[0]), tuple(points[1])], outline='red', width=3)
-                draw.text(tuple(points[0]), label, fill='red')
-            else:
-                draw.polygon([tuple(p) for p in points], outline='blue')
-                draw.text(tuple(points[0]), label, fill='blue')
+    # === FIND JSON FILES ===
+    # Streamed: conversion starts on the first JSON while the walk continues
+    print(f"🔍 Searching for JSON files in: {input_root}")
+    json_files = iter_json_files(input_root)
 
-        # === SAVE ANNOTATED IMAGE ===
-        save_name = os.path.splitext(image_file_name)[0] + "_annotated.jpg"
-        save_path = os.path.join(class_folder, save_name)
-        image.save(save_path)
-        converted += 1
-        print(f"✅ Saved: {save_path}")
+    convert_annotated(json_files, output_root, workers=args.workers, incremental=not args.full,
+                      image_source=args.image_source,
+                      preview_size=args.preview_size, log=args.log, metrics_path=args.metrics,
+                      output_format=args.output_format, shard_size=args.shard_size)
 
-    except Exception as e:
-        print(f"❌ Error processing {json_path}: {e}")
 
-print(f"\n✅ Cleaned and fixed {cleaned} JSON file(s).")
-print(f"✅ Annotated {converted} image(s) saved in: {output_root}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared conversion helpers used by the LabelMe labeling and conversion scripts."""
@@ -0,0 +1,5 @@
+from labelme_tools.cli import main
+
+# Guarded: worker processes re-import this module on Windows
+if __name__ == "__main__":
+    main()
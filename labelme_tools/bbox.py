@@ -0,0 +1,58 @@
+from itertools import chain
+
+import numpy as np
+
+# === PACKING ===
+def pack_points(point_lists):
+    """Flatten shapes into one (N, 2) float64 coordinate array plus per-shape point counts."""
+    counts = np.fromiter(map(len, point_lists), dtype=np.intp, count=len(point_lists))
+    flat = list(chain.from_iterable(point_lists))
+    try:
+        coords = np.array(flat, dtype=np.float64)
+    except ValueError:
+        coords = None
+    if coords is None or coords.ndim != 2 or coords.shape[1] != 2:
+        # Points with extra values: keep x and y, as the per-shape code did
+        coords = np.array([(p[0], p[1]) for p in flat], dtype=np.float64)
+    return coords.reshape(-1, 2), counts
+
+def concat_packed(packed):
+    """Join several (coords, counts) pairs, e.g. every file of a chunk, into one pair."""
+    if not packed:
+        return np.empty((0, 2), dtype=np.float64), np.empty(0, dtype=np.intp)
+    coords, counts = zip(*packed)
+    return np.concatenate(coords), np.concatenate(counts)
+
+# === BOXES ===
+def box_extents_packed(coords, counts):
+    """(x_min, y_min, x_max, y_max) arrays, one value per packed shape (at least one point each)."""
+    starts = np.zeros(len(counts), dtype=np.intp)
+    np.cumsum(counts[:-1], out=starts[1:])
+    return (np.minimum.reduceat(coords[:, 0], starts), np.minimum.reduceat(coords[:, 1], starts),
+            np.maximum.reduceat(coords[:, 0], starts), np.maximum.reduceat(coords[:, 1], starts))
+
+def yolo_bboxes_packed(coords, counts, img_w, img_h):
+    """Normalized (x_center, y_center, width, height) for every packed shape in one pass.
+
+    `img_w`/`img_h` are scalars or one value per shape. The arithmetic matches the
+    old per-shape get_yolo_bbox step for step, so ':.6f' output is unchanged.
+    """
+    if len(counts) == 0:
+        return np.empty((0, 4), dtype=np.float64)
+    x_min, y_min, x_max, y_max = box_extents_packed(coords, counts)
+
+    x_center = (x_min + x_max) / 2.0 / img_w
+    y_center = (y_min + y_max) / 2.0 / img_h
+    width = (x_max - x_min) / img_w
+    height = (y_max - y_min) / img_h
+    return np.column_stack((x_center, y_center, width, height))
+
+def yolo_bboxes(point_lists, img_w, img_h):
+    """Boxes for the shapes of one image (a list of point lists)."""
+    coords, counts = pack_points(point_lists)
+    return yolo_bboxes_packed(coords, counts, img_w, img_h)
+
+def format_yolo_lines(class_ids, boxes):
+    """Render `<class_id> <x_center> <y_center> <width> <height>` lines with 6 decimals."""
+    return "".join("%d %.6f %.6f %.6f %.6f\n" % (class_id, *box)
+                   for class_id, box in zip(class_ids, boxes.tolist()))
@@ -0,0 +1,163 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+from labelme_tools.classes import TASK_LABELS, class_map_from_labels
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.engine import convert_annotated
+from labelme_tools.export import export_dataset
+from labelme_tools.synth import CLASS_FOLDERS, add_dataset_arguments, dataset_options, generate_dataset
+from labelme_tools.yolo import export_yolo
+
+EXPORTERS = ("jsn-to-image", "yolo-format", "folderwise")
+
+def peak_rss_mb(children=False):
+    """Peak resident memory in MB of this process, or with `children` of the largest
+    finished child process (e.g. a worker); None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _rate(files, seconds):
+    return round(files / seconds, 2) if seconds > 0 else None
+
+# === EXPORTER BENCHMARK ===
+def bench_exporter(exporter, data_root, output_dir, workers=1, io_threads=4):
+    """Run one exporter end to end (no incremental skipping) and time it.
+
+    Stage timings are the exporter's own ConversionMetrics, as written by its
+    --metrics option: seconds per step summed over all files.
+    """
+    class_map = class_map_from_labels(TASK_LABELS["inclusion-exclusion"])
+    counts = {"files": 0}
+
+    def json_files():
+        for json_path in iter_json_files(data_root):
+            counts["files"] += 1
+            yield json_path
+
+    metrics_path = output_dir + "-metrics.json"
+    start = time.perf_counter()
+    # The status lines go nowhere: console speed is not what is measured here
+    with contextlib.redirect_stdout(io.StringIO()):
+        if exporter == "jsn-to-image":
+            convert_annotated(json_files(), output_dir, workers=workers, incremental=False, io_threads=io_threads,
+                              log="quiet", metrics_path=metrics_path)
+        elif exporter == "yolo-format":
+            export_yolo(json_files(), output_dir, class_map, incremental=False, workers=workers,
+                        io_threads=io_threads, log="quiet", metrics_path=metrics_path)
+        else:
+            export_dataset(json_files(), output_dir, ["folderwise"], class_map, workers=workers,
+                           incremental=False, folder_classes=CLASS_FOLDERS,
+                           target_dirs={"folderwise": output_dir}, log="quiet", metrics_path=metrics_path)
+    elapsed = time.perf_counter() - start
+    with open(metrics_path, 'r', encoding='utf-8') as f:
+        step_seconds = json.load(f)["step_seconds"]
+    files = counts["files"]
+    return {
+        "files": files,
+        "seconds": round(elapsed, 4),
+        "files_per_sec": _rate(files, elapsed),
+        "stages": {step: {"seconds": seconds, "files_per_sec": _rate(files, seconds)}
+                   for step, seconds in sorted(step_seconds.items())},
+        "peak_rss_mb": peak_rss_mb(),
+        # With --workers the files are converted in worker processes, which have finished by now
+        "peak_rss_children_mb": peak_rss_mb(children=True),
+    }
+
+def run_isolated(func, *args, **kwargs):
+    """Run a benchmark in a fresh process so its peak RSS is its own."""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(func, *args, **kwargs).result()
+
+# === REPORT ===
+def print_comparison(report, baseline):
+    print("\n📊 Compared with the baseline (files/sec):")
+    for name, result in report["exporters"].items():
+        old_result = baseline.get("exporters", {}).get(name, {})
+        old = old_result.get("files_per_sec")
+        new = result["files_per_sec"]
+        if old and new:
+            print(f"   {name:<20} {old:>10.2f} → {new:>10.2f}  ({new / old:.2f}x)")
+        for stage, stage_result in result.get("stages", {}).items():
+            old = old_result.get("stages", {}).get(stage, {}).get("files_per_sec")
+            new = stage_result["files_per_sec"]
+            if old and new:
+                print(f"     {stage:<18} {old:>10.2f} → {new:>10.2f}  ({new / old:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the converters on a synthetic LabelMe dataset.")
+    add_dataset_arguments(parser)
+    parser.add_argument("--data", metavar="DIR",
+                        help="benchmark a copy of an existing dataset instead of generating one")
+    parser.add_argument("--exporters", nargs="+", choices=EXPORTERS, default=list(EXPORTERS))
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the exporters")
+    parser.add_argument("--io-threads", type=int, default=4, help="reader threads per pipeline (0 = serial)")
+    parser.add_argument("--output", metavar="FILE", help="also write the report as JSON to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="earlier report to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the generated dataset and outputs")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="labelme-bench-")
+    try:
+        if args.data:
+            # The converters rewrite JSONs (imagePath clean-up), so they run on a copy
+            data_root = os.path.join(work_dir, "data")
+            dataset = {"data": os.path.abspath(args.data)}
+            print(f"📋 Copying {args.data} to: {data_root}")
+            shutil.copytree(args.data, data_root)
+        else:
+            data_root = os.path.join(work_dir, "data")
+            dataset = dataset_options(args)
+            print(f"🧪 Generating {args.count} synthetic frame(s) in: {data_root}")
+            generate_dataset(data_root, **dataset)
+
+        report = {
+            "dataset": dataset,
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpus": os.cpu_count(), "workers": args.workers, "io_threads": args.io_threads},
+            "exporters": {},
+        }
+        for exporter in args.exporters:
+            if exporter == "folderwise" and dataset.get("layout", "class-folders") != "class-folders":
+                print("⚠️ Skipping folderwise: it needs --layout class-folders")
+                continue
+            print(f"⏱️ Running {exporter} ...")
+            report["exporters"][exporter] = run_isolated(bench_exporter, exporter, data_root,
+                                                         os.path.join(work_dir, exporter), args.workers,
+                                                         args.io_threads)
+
+        text = json.dumps(report, indent=2)
+        print(text)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + "\n")
+            print(f"📂 Report saved in: {args.output}")
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                print_comparison(report, json.load(f))
+    finally:
+        if args.keep:
+            print(f"📂 Benchmark files kept in: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
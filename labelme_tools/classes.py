@@ -0,0 +1,61 @@
+from labelme_tools.engine import clean_label
+from labelme_tools.normalize import load_labelme_json
+
+# === TASK LABELS ===
+# The labels each labeling launcher hands to LabelMe. Their order fixes the YOLO
+# class IDs, so append new labels at the end.
+TASK_LABELS = {
+    "inclusion-exclusion": [
+        "Vehicle",
+        "Train",
+        "Empty crossing",
+        "Pedestrian"
+    ],
+    "vehicle-type": [
+        "Passenger vehicle",
+        "Bus",
+        "Commercial Truck",
+        "Emergency or utility vehicle",
+        "Muticlass vehicle"
+    ],
+    "vehicle-intensity": [
+        "One vehicle",
+        "Two vehicles",
+        "Three vehicles",
+        "Four or more vehicles"
+    ],
+}
+
+# === CLASS MAPS ===
+def yolo_class_name(label):
+    """Name a LabelMe label is exported under (lower-case, safe for file names)."""
+    return clean_label(label.lower())
+
+def class_map_from_labels(labels):
+    """Map class names to IDs in the order given, ignoring blanks and duplicates."""
+    class_map = {}
+    for label in labels:
+        name = yolo_class_name(label)
+        if name and name not in class_map:
+            class_map[name] = len(class_map)
+    return class_map
+
+def read_class_list(path):
+    """Read one label per line, e.g. the default_labels.txt written by the launchers."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def scan_class_map(json_files):
+    """Prepass: collect every label in `json_files` and number them alphabetically."""
+    names = set()
+    for json_path in json_files:
+        try:
+            data = load_labelme_json(json_path)
+        except Exception as e:
+            print(f"❌ Error reading {json_path}: {e}")
+            continue
+        for shape in data.get('shapes', []):
+            label = shape.get('label', '').strip()
+            if label and shape.get('points'):
+                names.add(yolo_class_name(label))
+    return {name: idx for idx, name in enumerate(sorted(names))}
@@ -0,0 +1,375 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+
+# One entry point for the tools:  python -m labelme_tools COMMAND [options]
+#
+# Only the arguments of the command being run are registered, and every
+# command imports what it runs (PIL, numpy, worker pools) inside its run
+# function, so --help and the light commands start without them. Paths and
+# class lists come from the arguments or from a --config file instead of
+# edits to the scripts.
+
+# === CONFIG FILE ===
+def load_config(path, command):
+    """Option defaults for `command` from a JSON file of {command: {option: value}}.
+
+    Options are named as on the command line, with or without the dashes, e.g.
+    {"export-yolo": {"input_root": "D:/data", "task": "vehicle-type", "split": "80/10/10"}}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    values = config.get(command, {})
+    return {key.lstrip("-").replace("-", "_"): value for key, value in values.items()}
+
+def labels_from(args):
+    """Label list given by --classes/--labels (a file, or a list in the config) or --task, else None."""
+    from labelme_tools.classes import TASK_LABELS, read_class_list
+    labels = getattr(args, "classes", None) or getattr(args, "labels", None)
+    if isinstance(labels, list):
+        return labels
+    if labels:
+        return read_class_list(labels)
+    if args.task:
+        return TASK_LABELS[args.task]
+    return None
+
+def add_task_argument(parser):
+    from labelme_tools.classes import TASK_LABELS
+    parser.add_argument("--task", choices=sorted(TASK_LABELS),
+                        help="use this task's label list (fixes the class IDs)")
+
+def add_input_argument(parser, help_text):
+    parser.add_argument("input_root", nargs="?", help=help_text + " (or input_root in --config)")
+
+# === CONVERT ===
+def add_convert_arguments(parser):
+    from labelme_tools.images import IMAGE_SOURCES
+    from labelme_tools.metrics import add_metrics_arguments
+    from labelme_tools.shards import add_shard_arguments
+    add_input_argument(parser, "folder searched recursively for LabelMe JSONs")
+    parser.add_argument("-o", "--output", metavar="DIR",
+                        help="output folder (default: INPUT_ROOT/annotated_images_by_label)")
+    parser.add_argument("--lowercase", action="store_true", help="lower-case the class folder names")
+    parser.add_argument("--text-offset", type=int, default=0,
+                        help="label text offset from the first point, in pixels")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to convert with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--image-source", choices=IMAGE_SOURCES, default="file",
+                        help="read images from the file, the JSON's imageData, or imageData when present (auto)")
+    parser.add_argument("--preview-size", type=int, metavar="PX",
+                        help="save small QA previews, at most PX pixels on the longer side (default: full size)")
+    parser.add_argument("--full", action="store_true",
+                        help="reconvert everything instead of only JSONs changed since the last run")
+    add_shard_arguments(parser)
+    add_metrics_arguments(parser)
+
+def run_convert(args):
+    from labelme_tools.discovery import iter_json_files
+    from labelme_tools.engine import convert_annotated
+    output_dir = args.output or os.path.join(args.input_root, "annotated_images_by_label")
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"🔍 Searching for JSON files in: {args.input_root}")
+    convert_annotated(iter_json_files(args.input_root), output_dir, workers=args.workers,
+                      lowercase=args.lowercase, text_offset=args.text_offset, incremental=not args.full,
+                      image_source=args.image_source, preview_size=args.preview_size, log=args.log,
+                      metrics_path=args.metrics, output_format=args.output_format, shard_size=args.shard_size)
+
+# === EXPORT-YOLO ===
+def add_export_yolo_arguments(parser):
+    from labelme_tools.images import IMAGE_MODES, IMAGE_SOURCES
+    from labelme_tools.metrics import add_metrics_arguments
+    from labelme_tools.shards import add_shard_arguments
+    from labelme_tools.split import add_split_arguments
+    add_input_argument(parser, "folder searched recursively for LabelMe JSONs")
+    parser.add_argument("-o", "--output", metavar="DIR",
+                        help="folder images/ and labels/ are written in (default: INPUT_ROOT/YOLOv8-ready)")
+    add_task_argument(parser)
+    parser.add_argument("--classes", metavar="FILE",
+                        help="fixed class list, one label per line (e.g. default_labels.txt); "
+                             "default: --task, else a prepass over all labels, numbered alphabetically")
+    parser.add_argument("--image-mode", choices=IMAGE_MODES, default="copy",
+                        help="how images are placed in images/ (reencode = old decode + save)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to export with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--image-source", choices=IMAGE_SOURCES, default="file",
+                        help="read images from the file, the JSON's imageData, or imageData when present (auto)")
+    parser.add_argument("--full", action="store_true",
+                        help="reconvert everything instead of only JSONs changed since the last run")
+    add_split_arguments(parser)
+    add_shard_arguments(parser)
+    add_metrics_arguments(parser)
+
+def run_export_yolo(args):
+    from labelme_tools.classes import class_map_from_labels, scan_class_map
+    from labelme_tools.discovery import iter_json_files
+    from labelme_tools.split import DatasetSplit
+    from labelme_tools.yolo import export_yolo
+
+    # Fixed before any label file is written, so IDs are stable between runs
+    labels = labels_from(args)
+    if labels is not None:
+        class_map = class_map_from_labels(labels)
+    else:
+        print("🏷️ Collecting class names ...")
+        class_map = scan_class_map(iter_json_files(args.input_root))
+
+    print(f"🔍 Searching for JSON files in: {args.input_root}")
+    split = DatasetSplit(args.split, args.stratify, args.split_seed) if args.split else None
+    export_yolo(iter_json_files(args.input_root), args.output or os.path.join(args.input_root, "YOLOv8-ready"),
+                class_map, image_mode=args.image_mode, incremental=not args.full, workers=args.workers,
+                image_source=args.image_source, log=args.log, metrics_path=args.metrics,
+                output_format=args.output_format, shard_size=args.shard_size, split=split)
+
+# === CROP ===
+def add_crop_arguments(parser):
+    from labelme_tools.images import IMAGE_SOURCES
+    from labelme_tools.metrics import add_metrics_arguments
+    add_input_argument(parser, "folder searched recursively for LabelMe JSONs")
+    parser.add_argument("-o", "--output", metavar="DIR",
+                        help="output folder (default: INPUT_ROOT/crops_by_label)")
+    parser.add_argument("--padding", type=float, default=0.0, metavar="FRACTION",
+                        help="grow each box by this fraction of its size on every side")
+    parser.add_argument("--square", action="store_true", help="widen the shorter side so every crop is square")
+    parser.add_argument("--size", type=int, metavar="PX",
+                        help="resize crops to PX pixels on the longer side (default: no resize)")
+    parser.add_argument("--lowercase", action="store_true", help="lower-case the class folder names")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to crop with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--image-source", choices=IMAGE_SOURCES, default="file",
+                        help="read images from the file, the JSON's imageData, or imageData when present (auto)")
+    parser.add_argument("--full", action="store_true",
+                        help="recrop everything instead of only JSONs changed since the last run")
+    add_metrics_arguments(parser)
+
+def run_crop(args):
+    from labelme_tools.discovery import iter_json_files
+    from labelme_tools.export import export_dataset
+    output_dir = args.output or os.path.join(args.input_root, "crops_by_label")
+    print(f"🔍 Searching for JSON files in: {args.input_root}")
+    export_dataset(iter_json_files(args.input_root), output_dir, ["crops"], {}, workers=args.workers,
+                   incremental=not args.full, lowercase=args.lowercase, target_dirs={"crops": output_dir},
+                   image_source=args.image_source, log=args.log, metrics_path=args.metrics,
+                   crop_padding=args.padding, crop_square=args.square, crop_size=args.size)
+
+# === INDEX ===
+def add_index_arguments(parser):
+    add_input_argument(parser, "folder searched recursively for LabelMe JSONs; the index is kept inside it")
+    parser.add_argument("action", choices=("build", "query"),
+                        help="build: create or incrementally update the index; query: count matching shapes and frames")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="build: worker processes to parse with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--label", help="query: label to match (case-insensitive)")
+    parser.add_argument("--folder", help="query: only files under a folder of this name, e.g. Night")
+    parser.add_argument("--shape-type", help="query: e.g. rectangle or polygon")
+    parser.add_argument("--min-count", type=int, default=1, metavar="N",
+                        help="query: frames need at least N matching shapes (default: 1)")
+    parser.add_argument("--list", action="store_true", help="query: print the matching JSON paths")
+
+def run_index(args):
+    from labelme_tools.index import AnnotationIndex
+    index = AnnotationIndex(args.input_root)
+    if args.action == "build":
+        parsed, kept, removed = index.update(workers=args.workers)
+        print(f"✅ Indexed {len(index)} JSON file(s), {len(index.shapes)} shape(s): "
+              f"{parsed} parsed, {kept} unchanged, {removed} removed.")
+        print(f"📂 Index saved in: {index.folder}")
+        return
+
+    if not len(index):
+        raise SystemExit(f"❌ No index under {args.input_root}; run 'build' first.")
+    conditions = {"label": args.label, "folder": args.folder, "shape_type": args.shape_type,
+                  "min_count": args.min_count}
+    frames = index.frames(**conditions)
+    print(f"🔍 {index.count(**conditions)} matching shape(s) in {len(frames)} frame(s)"
+          + (f" with at least {args.min_count} each." if args.min_count > 1 else "."))
+    for label, n in sorted(index.label_counts(**conditions).items(), key=lambda x: -x[1]):
+        print(f"   {label}: {n}")
+    if args.list:
+        for json_path in index.json_paths(frames):
+            print(json_path)
+
+# === LABEL ===
+def add_label_arguments(parser):
+    add_input_argument(parser, "folder of the images to annotate")
+    add_task_argument(parser)
+    parser.add_argument("--labels", metavar="FILE",
+                        help="label list for LabelMe, one per line; default: --task")
+    parser.add_argument("--labelme", metavar="PATH", help="LabelMe executable (default: labelme on the PATH)")
+    parser.add_argument("--hint", help="reminder printed before each image (default: the numbered labels)")
+    parser.add_argument("--session", action="store_true",
+                        help="open LabelMe once on all unannotated images; each saved JSON is "
+                             "moved to its -json folder as soon as it appears")
+    parser.add_argument("--dedup", action="store_true",
+                        help="open only one image per group of near-duplicates (see the dedup command), "
+                             "then copy its labels to the rest of the group")
+    parser.add_argument("--prelabel", metavar="MODEL",
+                        help="first draft boxes with a detector on the CPU (see the prelabel command)")
+
+def run_label(args):
+    from labelme_tools.discovery import iter_image_files
+    from labelme_tools.labeling import label_per_image, label_session, remaining_queue, write_label_file
+
+    labels = labels_from(args)
+    if labels is None:
+        raise SystemExit("❌ Give the labels with --task or --labels.")
+    labelme_cmd = args.labelme or shutil.which("labelme")
+    if not labelme_cmd or not os.path.exists(labelme_cmd):
+        raise FileNotFoundError(f"❌ LabelMe not found at: {labelme_cmd or 'labelme (not on the PATH)'}")
+    hint = args.hint or "🔧 " + ", ".join(f"{i}={label}" for i, label in enumerate(labels, 1)) + " → Ctrl+S → Close"
+
+    labels_path = write_label_file(args.input_root, labels)
+    print(f"📝 Label file created: {labels_path}")
+    queue = None
+    if args.dedup:
+        from labelme_tools.dedup import dedup_folder
+        queue = dedup_folder(args.input_root, workers=0)
+    if args.prelabel:
+        from labelme_tools.prelabel import prelabel_images
+        _, remaining = remaining_queue(iter_image_files(args.input_root) if queue is None else queue)
+        prelabel_images(remaining, args.prelabel, labels, log="progress")
+    if args.session:
+        found = label_session(args.input_root, labelme_cmd, labels_path, hint, images=queue)
+    elif queue is not None:
+        found = label_per_image(queue, labelme_cmd, labels_path, hint)
+    else:
+        print(f"\n📸 Searching for images in: {args.input_root}")
+        found = label_per_image(iter_image_files(args.input_root), labelme_cmd, labels_path, hint)
+    print(f"\n📸 Went through {found} image(s).")
+    if args.dedup:
+        from labelme_tools.dedup import print_propagation, propagate_labels
+        print_propagation(*propagate_labels(args.input_root))
+
+# === DEDUP ===
+def add_dedup_arguments(parser):
+    from labelme_tools.dedup import DEFAULT_THRESHOLD, HASH_METHODS
+    add_input_argument(parser, "folder searched recursively for images")
+    parser.add_argument("--method", choices=HASH_METHODS, default="phash", help="perceptual hash to compare")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help=f"max differing bits (of 64) between duplicates (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to hash with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--propagate", action="store_true",
+                        help="instead of grouping, copy the labelled representatives' JSONs to their duplicates")
+    parser.add_argument("--overwrite", action="store_true", help="with --propagate, replace existing JSONs")
+
+def run_dedup(args):
+    from labelme_tools.dedup import dedup_folder, print_propagation, propagate_labels
+    if args.propagate:
+        print_propagation(*propagate_labels(args.input_root, args.overwrite))
+    else:
+        dedup_folder(args.input_root, args.method, args.threshold, args.workers)
+
+# === PRELABEL ===
+def add_prelabel_cli_arguments(parser):
+    from labelme_tools.prelabel import add_prelabel_arguments
+    add_input_argument(parser, "folder searched recursively for images")
+    add_task_argument(parser)
+    parser.add_argument("--labels", metavar="FILE", help="label list the drafts use, one per line; default: --task")
+    add_prelabel_arguments(parser)
+
+def run_prelabel(args):
+    from labelme_tools.prelabel import prelabel_folder, prelabel_options
+    labels = labels_from(args)
+    if labels is None:
+        raise SystemExit("❌ Give the labels with --task or --labels.")
+    prelabel_folder(args.input_root, args.model, labels, **prelabel_options(args))
+
+# === STATS ===
+def add_stats_arguments(parser):
+    add_input_argument(parser, "folder searched recursively for LabelMe JSONs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to read with (1 = serial, 0 = one per CPU)")
+
+def run_stats(args):
+    from labelme_tools.discovery import iter_json_files
+    from labelme_tools.stats import collect_stats
+    print(f"🔍 Searching for JSON files in: {args.input_root}")
+    collect_stats(iter_json_files(args.input_root), args.input_root, args.workers).print_summary()
+
+# === VALIDATE ===
+def add_validate_arguments(parser):
+    from labelme_tools.validate import IMAGE_SIZE_SOURCES, SEVERITIES
+    add_input_argument(parser, "folder searched recursively for LabelMe JSONs")
+    add_task_argument(parser)
+    parser.add_argument("--labels", metavar="FILE", help="allowed labels, one per line; default: --task")
+    parser.add_argument("--folder-class", action="append", default=[], metavar="FOLDER=CLASS",
+                        help="class folder names that are meant as they are, e.g. Pedestraints=Pedestrian (repeatable)")
+    parser.add_argument("--image-size", choices=IMAGE_SIZE_SOURCES, default="json",
+                        help="take image sizes from imageWidth/imageHeight only, or also check them "
+                             "against the image headers (images are never decoded)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to check with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--limit", type=int, default=20, help="print at most this many issues of each kind")
+    parser.add_argument("--report", metavar="FILE", help="write every issue to FILE as JSON lines")
+    parser.add_argument("--fail-on", choices=SEVERITIES, default="error",
+                        help="exit with status 1 on errors only, or on warnings too")
+
+def run_validate(args):
+    from labelme_tools.discovery import iter_json_files
+    from labelme_tools.validate import validate_dataset
+    # A --config file may give the mapping as an object
+    folder_classes = args.folder_class
+    if isinstance(folder_classes, list):
+        folder_classes = dict(pair.split("=", 1) for pair in folder_classes)
+    print(f"🔍 Searching for JSON files in: {args.input_root}")
+    report = validate_dataset(iter_json_files(args.input_root), args.input_root, labels_from(args), folder_classes,
+                              args.image_size, args.workers, limit=args.limit, report_path=args.report)
+    report.print_summary()
+    if report.failed(args.fail_on):
+        sys.exit(1)
+    print("✅ No issues that fail the check.")
+
+# name -> (help, add_arguments, run)
+COMMANDS = {
+    "convert": ("draw the annotations onto the images, sorted into a folder per label",
+                add_convert_arguments, run_convert),
+    "export-yolo": ("export images/ and labels/ in YOLO format", add_export_yolo_arguments, run_export_yolo),
+    "crop": ("cut every labelled shape out of its image, one crop per shape, sorted into a folder per label",
+             add_crop_arguments, run_crop),
+    "dedup": ("group near-duplicate images into a shorter labeling queue, and copy labels within groups",
+              add_dedup_arguments, run_dedup),
+    "index": ("build or query a memory-mapped index of every shape in the JSONs",
+              add_index_arguments, run_index),
+    "label": ("open the unannotated images in LabelMe", add_label_arguments, run_label),
+    "prelabel": ("draft boxes for the unannotated images with a detector, for LabelMe to open",
+                 add_prelabel_cli_arguments, run_prelabel),
+    "validate": ("check every JSON for bad shapes, unknown labels and missing images; exit 1 on issues",
+                 add_validate_arguments, run_validate),
+    "stats": ("count the JSONs, shapes and labels of a dataset", add_stats_arguments, run_stats),
+}
+
+def build_parser(command=None):
+    """The CLI parser; only `command` gets its arguments (all commands still show in --help)."""
+    parser = argparse.ArgumentParser(prog="python -m labelme_tools",
+                                     description="Convert, export, crop, pre-label, label, inspect and validate LabelMe datasets.")
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    for name, (help_text, add_arguments, _) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text, description=help_text[0].upper() + help_text[1:] + ".")
+        if name == command:
+            subparser.add_argument("--config", metavar="FILE",
+                                   help=f'JSON file with option defaults under "{name}"; arguments override it')
+            add_arguments(subparser)
+    return parser, subparsers
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = next((arg for arg in argv if arg in COMMANDS), None)
+    parser, subparsers = build_parser(command)
+    args = parser.parse_args(argv)
+    subparser = subparsers.choices[args.command]
+
+    if args.config:
+        values = load_config(args.config, args.command)
+        unknown = sorted(key for key in values if not hasattr(args, key) or key in ("command", "config"))
+        if unknown:
+            subparser.error(f"unknown option(s) in {args.config}: {', '.join(unknown)}")
+        subparser.set_defaults(**values)
+        args = parser.parse_args(argv)
+    if not args.input_root:
+        subparser.error("an input folder is needed, as an argument or as input_root in --config")
+
+    _, _, run = COMMANDS[args.command]
+    run(args)
@@ -0,0 +1,69 @@
+import numpy as np
+
+from labelme_tools.bbox import box_extents_packed, pack_points
+
+# One crop per shape for the CNN classifiers. The boxes of a frame are worked
+# out together, the frame is decoded once (at the lowest JPEG draft scale that
+# still serves the largest zoom among its crops), and every crop is cut from
+# that one image.
+
+# === CROP BOXES ===
+def crop_boxes(point_lists, size, padding=0.0, square=False):
+    """Pixel boxes (x0, y0, x1, y1) to cut for each shape, as an (N, 4) int array.
+
+    Each shape's bounding box grows by `padding` times its width and height on
+    every side. With `square` the shorter side grows to the longer one around
+    the center and the box is moved inside the image where it fits. Boxes are
+    clipped to the image; a shape outside it gets an empty box (see empty_boxes).
+    """
+    width, height = size
+    x0, y0, x1, y1 = box_extents_packed(*pack_points(point_lists))
+    pad_x = (x1 - x0) * padding
+    pad_y = (y1 - y0) * padding
+    x0, x1, y0, y1 = x0 - pad_x, x1 + pad_x, y0 - pad_y, y1 + pad_y
+    outside = (x1 <= 0) | (y1 <= 0) | (x0 >= width) | (y0 >= height)
+    if square:
+        side = np.maximum(x1 - x0, y1 - y0)
+        x0 = np.clip((x0 + x1 - side) / 2, 0, np.maximum(width - side, 0))
+        y0 = np.clip((y0 + y1 - side) / 2, 0, np.maximum(height - side, 0))
+        x1, y1 = x0 + side, y0 + side
+    boxes = np.column_stack((np.floor(x0), np.floor(y0), np.ceil(x1), np.ceil(y1)))
+    boxes = np.clip(boxes, 0, [width, height, width, height]).astype(np.intp)
+    boxes[outside] = 0
+    return boxes
+
+def empty_boxes(boxes):
+    """True for each box with nothing to cut."""
+    return (boxes[:, 2] <= boxes[:, 0]) | (boxes[:, 3] <= boxes[:, 1])
+
+def crop_scale(boxes, crop_size=None):
+    """Lowest decode scale at which every box still has `crop_size` pixels on its longer side (1 = full)."""
+    if not crop_size or len(boxes) == 0:
+        return 1.0
+    longest = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+    return min(1.0, crop_size / max(int(longest.min()), 1))
+
+def crop_output_size(crop_w, crop_h, crop_size, square=False):
+    """(width, height) of a crop resized to `crop_size` on its longer side, or to a square."""
+    if square:
+        return crop_size, crop_size
+    ratio = crop_size / max(crop_w, crop_h)
+    return max(1, round(crop_w * ratio)), max(1, round(crop_h * ratio))
+
+# === CUTTING ===
+def cut_crops(image, boxes, scale=(1.0, 1.0), crop_size=None, square=False):
+    """Yield the crop of every box (full-size pixel coordinates) from one decoded image.
+
+    `scale` is the (sx, sy) the image was decoded at, as returned by
+    images.open_scaled; crops are resized to `crop_size` if given.
+    """
+    from PIL import Image
+    sx, sy = scale
+    for x0, y0, x1, y1 in boxes.tolist():
+        left, top = int(x0 * sx), int(y0 * sy)
+        box = (left, top, max(round(x1 * sx), left + 1), max(round(y1 * sy), top + 1))
+        crop = image.crop(box)
+        if crop_size:
+            # Sized from the full-size box, so the decode scale never changes the output
+            crop = crop.resize(crop_output_size(x1 - x0, y1 - y0, crop_size, square), Image.BILINEAR)
+        yield crop
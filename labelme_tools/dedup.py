@@ -0,0 +1,310 @@
+import os
+import json
+import sys
+from functools import partial
+from itertools import combinations
+
+import numpy as np
+
+from labelme_tools.discovery import iter_image_files
+from labelme_tools.engine import iter_chunk_results, resolve_workers
+from labelme_tools.images import image_size
+from labelme_tools.labeling import json_target_for
+
+# Near-duplicate frames (long runs from a static crossing camera) are grouped
+# by perceptual hash so only one image per group goes to the annotator; its
+# labels are then copied to the rest of the group.
+HASH_METHODS = ("dhash", "phash")
+
+# Hamming distance (of 64 bits) up to which two frames count as duplicates
+DEFAULT_THRESHOLD = 4
+
+# Hidden, so the launchers' image walk never looks inside; holds the hash
+# cache and the queue and groups of the last run
+DEDUP_DIR_NAME = ".labelme-dedup"
+CACHE_VERSION = 1
+QUEUE_FILE_NAME = "dedup-queue.txt"
+GROUPS_FILE_NAME = "dedup-groups.json"
+
+# One row per hashed image; `name_start`/`name_len` locate its path, relative
+# to the image folder, in the packed names
+CACHE_DTYPE = np.dtype([
+    ("name_start", "<u8"),
+    ("name_len", "<u4"),
+    ("size", "<i8"),
+    ("mtime_ns", "<i8"),
+    ("dhash", "<u8"),
+    ("phash", "<u8"),
+])
+
+# The multi-index splits each hash into this many 16-bit keys
+HASH_CHUNKS = 4
+
+# === HASHES ===
+_dct = None
+
+def _dct_matrix(n=32):
+    """DCT-II basis: `_dct_matrix() @ x` transforms the columns of x."""
+    global _dct
+    if _dct is None:
+        k = np.arange(n)[:, None]
+        _dct = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    return _dct
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+def image_hashes(image_path):
+    """(dHash, pHash) of one image as 64-bit ints, from a single small decode.
+
+    JPEGs are decoded at 1/8 scale through draft mode; both hashes only look
+    at a 32x32 or smaller grayscale version anyway.
+    """
+    from PIL import Image
+    with Image.open(image_path) as image:
+        image.draft("L", (64, 64))
+        gray = image.convert("L")
+    # dHash: is each pixel brighter than its left neighbour, on a 9x8 thumbnail
+    small = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    dhash = _bits_to_int(small[:, 1:] > small[:, :-1])
+    # pHash: the 8x8 lowest frequencies of a 32x32 DCT against their median
+    pixels = np.asarray(gray.resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    dct = _dct_matrix()
+    low = (dct @ pixels @ dct.T)[:8, :8]
+    phash = _bits_to_int(low > np.median(low))
+    return dhash, phash
+
+def hash_chunk(entries, root):
+    """Hash a chunk of (relative path, size, mtime_ns); runs inside a worker process in parallel mode."""
+    hashed = []
+    for rel, size, mtime_ns in entries:
+        try:
+            hashed.append((rel, size, mtime_ns, *image_hashes(os.path.join(root, rel))))
+        except Exception as e:
+            hashed.append((rel, e))
+    return hashed
+
+# === HASH CACHE ===
+def dedup_path(image_folder, file_name):
+    """Path of one of the dedup files (hash cache, queue, groups) of `image_folder`."""
+    return os.path.join(image_folder, DEDUP_DIR_NAME, file_name)
+
+def _cache_path(image_folder):
+    return dedup_path(image_folder, "hashes.npz")
+
+def load_hash_cache(image_folder):
+    """{relative path: (size, mtime_ns, dhash, phash)} from the last run, or {}."""
+    path = _cache_path(image_folder)
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        if int(data["version"]) != CACHE_VERSION:
+            return {}
+        rows = data["rows"]
+        blob = data["names"].tobytes()
+    names = [blob[start:start + length].decode('utf-8')
+             for start, length in zip(rows["name_start"].tolist(), rows["name_len"].tolist())]
+    values = zip(rows["size"].tolist(), rows["mtime_ns"].tolist(), rows["dhash"].tolist(), rows["phash"].tolist())
+    return dict(zip(names, values))
+
+def save_hash_cache(image_folder, names, rows):
+    """Write the hashes of `names` (CACHE_DTYPE `rows` in the same order)."""
+    encoded = [name.encode('utf-8') for name in names]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    rows["name_len"] = lengths
+    rows["name_start"] = np.cumsum(lengths) - lengths
+    path = _cache_path(image_folder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, version=CACHE_VERSION, rows=rows, names=np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    os.replace(tmp_path, path)
+
+def update_hashes(image_folder, workers=1, chunk_size=64):
+    """Hash every image under `image_folder`, reusing cached hashes of unchanged files.
+
+    Returns (paths, rows, hashed): the relative paths in walk order (sorted, so
+    frame sequences stay in order), their CACHE_DTYPE rows, and how many were
+    hashed in this run. Images that cannot be read are reported and left out.
+    """
+    cache = load_hash_cache(image_folder)
+    names = []
+    values = []
+    todo = []
+    for image_path in iter_image_files(image_folder):
+        rel = os.path.relpath(image_path, image_folder).replace(os.sep, "/")
+        st = os.stat(image_path)
+        cached = cache.get(rel)
+        if cached is not None and cached[:2] == (st.st_size, st.st_mtime_ns):
+            names.append(rel)
+            values.append(cached)
+        else:
+            todo.append((rel, st.st_size, st.st_mtime_ns))
+
+    chunk_func = partial(hash_chunk, root=image_folder)
+    hashed = 0
+    for entry in iter_chunk_results(chunk_func, todo, resolve_workers(workers), chunk_size):
+        if isinstance(entry[1], Exception):
+            print(f"❌ Could not hash {entry[0]}: {entry[1]}")
+            continue
+        names.append(entry[0])
+        values.append(entry[1:])
+        hashed += 1
+
+    # Cached and new entries back in walk order
+    order = sorted(range(len(names)), key=names.__getitem__)
+    names = [names[i] for i in order]
+    rows = np.zeros(len(names), dtype=CACHE_DTYPE)
+    for column, column_values in zip(("size", "mtime_ns", "dhash", "phash"), zip(*values) if values else ()):
+        rows[column] = np.array(column_values, dtype=CACHE_DTYPE[column])[order]
+    save_hash_cache(image_folder, names, rows)
+    return names, rows, hashed
+
+# === GROUPING ===
+try:
+    _popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def _popcount(x):
+        return bin(x).count("1")
+
+def group_duplicates(hashes, threshold=DEFAULT_THRESHOLD, recent=8):
+    """Index of the representative of each hash's group (its own index for a representative).
+
+    Hashes are visited in order and each joins a representative within
+    `threshold` bits, else starts a group, so every member is close to the
+    frame whose labels it will get (unlike chained single-link groups, which
+    drift along a slow pan). Repeated hashes are settled once, and the
+    `recent` last representatives are tried before any search, which handles
+    runs of similar frames. Otherwise the nearest representative is looked up
+    in a multi-index: each is filed under its HASH_CHUNKS 16-bit sub-hashes,
+    and a hash within `threshold` of it differs in at most
+    threshold // HASH_CHUNKS bits on one of them (pigeonhole), so only those
+    few neighbouring keys are probed.
+    """
+    bits = 64 // HASH_CHUNKS
+    key_mask = (1 << bits) - 1
+    flips = [0] + [sum(1 << b for b in combo)
+                   for r in range(1, threshold // HASH_CHUNKS + 1) for combo in combinations(range(bits), r)]
+    tables = [{} for _ in range(HASH_CHUNKS)]
+    rep_hashes = []
+    rep_rows = []
+    recent_reps = []
+
+    unique, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    unique_leaders = np.empty(len(unique), dtype=np.intp)
+    unique = unique.tolist()
+    first = first.tolist()
+    # Distinct hashes in the order they first appear
+    for u in sorted(range(len(unique)), key=first.__getitem__):
+        h = unique[u]
+        best = next((rep for rep in recent_reps if _popcount(h ^ rep_hashes[rep]) <= threshold), -1)
+        if best < 0:
+            keys = [(h >> (bits * j)) & key_mask for j in range(HASH_CHUNKS)]
+            best_distance = threshold + 1
+            seen = set()
+            for table, key in zip(tables, keys):
+                get = table.get
+                for flip in flips:
+                    candidates = get(key ^ flip)
+                    if candidates is None:
+                        continue
+                    for rep in candidates:
+                        if rep in seen:
+                            continue
+                        seen.add(rep)
+                        distance = _popcount(h ^ rep_hashes[rep])
+                        if distance < best_distance or (distance == best_distance and rep < best):
+                            best, best_distance = rep, distance
+            if best < 0:
+                best = len(rep_hashes)
+                rep_hashes.append(h)
+                rep_rows.append(first[u])
+                for table, key in zip(tables, keys):
+                    table.setdefault(key, []).append(best)
+        if not recent_reps or recent_reps[0] != best:
+            if best in recent_reps:
+                recent_reps.remove(best)
+            recent_reps.insert(0, best)
+            del recent_reps[recent:]
+        unique_leaders[u] = rep_rows[best]
+    return unique_leaders[inverse.reshape(-1)]
+
+# === QUEUE AND GROUPS ===
+def write_groups(image_folder, names, leaders, method, threshold):
+    """Write the labeling queue (one representative per line) and the group mapping next to the hash cache."""
+    representatives = [name for i, name in enumerate(names) if leaders[i] == i]
+    with open(dedup_path(image_folder, QUEUE_FILE_NAME), 'w', encoding='utf-8') as f:
+        for name in representatives:
+            f.write(name + "\n")
+    groups = {}
+    for name, leader in zip(names, leaders.tolist()):
+        if names[leader] != name:
+            groups.setdefault(names[leader], []).append(name)
+    with open(dedup_path(image_folder, GROUPS_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump({"method": method, "threshold": threshold, "groups": groups}, f, indent=1)
+    return representatives, groups
+
+def dedup_folder(image_folder, method="phash", threshold=DEFAULT_THRESHOLD, workers=1):
+    """Hash, group and write the queue and groups of `image_folder`; returns the queued image paths."""
+    if method not in HASH_METHODS:
+        raise ValueError(f"Unknown hash method: {method}")
+    print(f"🔍 Hashing images in: {image_folder}")
+    names, rows, hashed = update_hashes(image_folder, workers)
+    leaders = group_duplicates(rows[method], threshold)
+    representatives, groups = write_groups(image_folder, names, leaders, method, threshold)
+    print(f"#️⃣ {len(names)} image(s): {hashed} hashed, {len(names) - hashed} from the cache.")
+    print(f"🧹 {len(representatives)} to label; {len(names) - len(representatives)} near-duplicate(s) "
+          f"in {len(groups)} group(s) will get their representative's labels.")
+    print(f"📝 Queue: {dedup_path(image_folder, QUEUE_FILE_NAME)}")
+    print(f"📝 Groups: {dedup_path(image_folder, GROUPS_FILE_NAME)}")
+    return [os.path.join(image_folder, *name.split("/")) for name in representatives]
+
+# === LABEL PROPAGATION ===
+def propagate_labels(image_folder, overwrite=False):
+    """Copy each representative's JSON to the duplicates of its group; returns (copied, waiting, kept).
+
+    A copy points at the duplicate's own image and carries no imageData. An
+    existing JSON of a duplicate is kept unless `overwrite`; so is a duplicate
+    whose size differs from the representative's. `waiting` counts groups
+    whose representative is not labelled yet.
+    """
+    with open(dedup_path(image_folder, GROUPS_FILE_NAME), 'r', encoding='utf-8') as f:
+        groups = json.load(f)["groups"]
+    copied = waiting = kept = 0
+    for rep, duplicates in groups.items():
+        rep_json = json_target_for(os.path.join(image_folder, *rep.split("/")))
+        if not os.path.exists(rep_json):
+            waiting += 1
+            continue
+        with open(rep_json, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        size = (data.get('imageWidth'), data.get('imageHeight'))
+        for name in duplicates:
+            image_path = os.path.join(image_folder, *name.split("/"))
+            json_target = json_target_for(image_path)
+            if os.path.exists(json_target) and not overwrite:
+                kept += 1
+                continue
+            if image_size(image_path) != size:
+                print(f"⚠️ Not copying labels to {image_path}: its size differs from {rep}")
+                kept += 1
+                continue
+            os.makedirs(os.path.dirname(json_target), exist_ok=True)
+            with open(json_target, 'w', encoding='utf-8') as f:
+                json.dump(dict(data, imagePath=os.path.basename(image_path), imageData=None), f, indent=2)
+            copied += 1
+    return copied, waiting, kept
+
+def print_propagation(copied, waiting, kept):
+    print(f"📋 Copied labels to {copied} near-duplicate(s); kept {kept} existing or mismatched JSON(s); "
+          f"{waiting} group(s) still wait for their representative.")
+
+
+def main(argv=None):
+    # The same options as `python -m labelme_tools dedup`, defined once in the CLI
+    from labelme_tools.cli import main as cli_main
+    cli_main(["dedup"] + list(sys.argv[1:] if argv is None else argv))
+
+
+if __name__ == "__main__":
+    main()
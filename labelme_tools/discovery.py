@@ -0,0 +1,46 @@
+import os
+
+# Image types the labeling launchers pick up (matched case-insensitively)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+JSON_EXTENSIONS = ('.json',)
+
+# === STREAMING WALKER ===
+def walk_files(root, extensions, sort=False, recursive=True):
+    """Lazily yield the paths under `root` whose extension is in `extensions`.
+
+    One os.scandir pass per folder, depth first; nothing is collected up front,
+    so callers can start working on the first match straight away. Hidden files
+    and folders are skipped, like glob's '**'. With `sort`, entries are visited
+    in name order within each folder so the order is stable between runs.
+    Without `recursive` only `root` itself is listed, like a plain '*' glob.
+    """
+    extensions = frozenset(ext.lower() for ext in extensions)
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name) if sort else it
+                subfolders = []
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if recursive:
+                            subfolders.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions:
+                        yield entry.path
+        except OSError:
+            continue
+        # Reversed so the first subfolder is walked next
+        stack.extend(reversed(subfolders))
+
+def iter_json_files(root, recursive=True):
+    return walk_files(root, JSON_EXTENSIONS, recursive=recursive)
+
+def iter_image_files(root, sort=True):
+    return walk_files(root, IMAGE_EXTENSIONS, sort=sort)
@@ -0,0 +1,329 @@
+import io
+import os
+import re
+from collections import deque, namedtuple
+from functools import partial
+
+from labelme_tools.images import image_data_mode, locate_image, open_preview, prefetch_image
+from labelme_tools.manifest import ConversionManifest
+from labelme_tools.metrics import ConversionMetrics, ResultLog, count_bytes, measured_stages, timed
+from labelme_tools.normalize import normalize_json
+from labelme_tools.parsing import is_draft
+from labelme_tools.pipeline import Stages, iter_pipeline, pipeline_chunk
+from labelme_tools.shards import DEFAULT_SHARD_SIZE, ShardWriter, sample_key
+
+# Outcome of converting one JSON file. `status` is "converted", "skipped" or
+# "error"; `reason` says why a file was skipped; `detail` is the saved path,
+# the missing image path or the error message; `cleaned` tells whether the
+# JSON had to be rewritten with a cleaned imagePath. `image_path`, `outputs` and
+# `label` feed the incremental-conversion manifest; `notes` are extra warnings;
+# `tally` holds the file's timings and byte counts (see metrics.Tally);
+# `payload` is the (key, members) sample still to be appended to a shard.
+FileResult = namedtuple("FileResult",
+                        "status json_path reason detail cleaned image_path outputs label notes tally payload",
+                        defaults=(None, (), None, (), None, None))
+
+# === SANITIZER: make label safe for folder names ===
+def clean_label(label):
+    return re.sub(r'[\\/:*?"<>|]', '_', label.strip())
+
+# === ANNOTATION DRAWING ===
+def first_label_folder(shapes, lowercase=False):
+    """Class folder an annotated image is filed under: the first shape's cleaned label."""
+    first_label_raw = shapes[0].get('label', '')
+    if lowercase:
+        first_label_raw = first_label_raw.lower()
+    return clean_label(first_label_raw)
+
+def draw_shapes(image, shapes, text_offset=0):
+    """Draw rectangles in red and polygons in blue, each with its label."""
+    from PIL import ImageDraw
+    draw = ImageDraw.Draw(image)
+    for shape in shapes:
+        label = shape.get('label', '').strip()
+        points = shape.get('points', [])
+        if not label or not points:
+            continue
+        text_pos = (points[0][0] + text_offset, points[0][1] + text_offset)
+        if len(points) == 2:
+            draw.rectangle([tuple(points[0]), tuple(points[1])], outline='red', width=3)
+            draw.text(text_pos, label, fill='red')
+        else:
+            draw.polygon([tuple(p) for p in points], outline='blue')
+            draw.text(text_pos, label, fill='blue')
+
+def scale_shapes(shapes, sx, sy):
+    """Copy of `shapes` with their points mapped onto an image resized by (sx, sy)."""
+    return [dict(shape, points=[[p[0] * sx, p[1] * sy] for p in shape.get('points', [])]) for shape in shapes]
+
+# === PER-FILE CONVERSION ===
+# One conversion in pipeline stages (see pipeline.Stages): load_json reads,
+# draw_loaded decodes and draws, save_drawn encodes and writes.
+LoadedJson = namedtuple("LoadedJson", "json_path data cleaned image_path pixels")
+
+def load_json(json_path, image_source="file"):
+    """Reader stage: clean the JSON's imagePath and read the image bytes."""
+    cleaned = False
+    try:
+        # === CLEAN IMAGE PATH (rewrites the JSON only if it changes) ===
+        with timed("parse"):
+            data, cleaned = normalize_json(json_path, image_data_mode(image_source))
+        if is_draft(data):
+            return FileResult("skipped", json_path, "draft", None, cleaned)
+
+        shapes = data.get('shapes', [])
+        if not shapes:
+            return FileResult("skipped", json_path, "no-shapes", None, cleaned)
+
+        # === LOAD IMAGE ===
+        image_path = os.path.join(os.path.dirname(json_path), data['imagePath'])
+        found, embedded = locate_image(image_path, data, image_source)
+        if not found:
+            return FileResult("skipped", json_path, "image-missing", image_path, cleaned, image_path)
+        if embedded is not None:
+            # The pixels come from the JSON, so the image file is not a dependency
+            return LoadedJson(json_path, data, cleaned, None, embedded)
+        with timed("read"):
+            pixels = prefetch_image(image_path)
+        count_bytes(read=len(pixels))
+        return LoadedJson(json_path, data, cleaned, image_path, pixels)
+
+    except Exception as e:
+        return FileResult("error", json_path, "exception", str(e), cleaned)
+
+def draw_loaded(loaded, output_dir, lowercase=False, text_offset=0, preview_size=None):
+    """Compute stage: decode the image and draw the shapes; returns (result, image) to save.
+
+    With `preview_size`, the image is decoded at most that many pixels on its
+    longer side and the shapes are scaled to match.
+    """
+    if isinstance(loaded, FileResult):
+        return loaded
+    json_path, data, cleaned, image_path, pixels = loaded
+    try:
+        with timed("decode"):
+            image, (sx, sy) = open_preview(image_path, pixels, preview_size)
+        shapes = data['shapes']
+
+        # === CLEAN FIRST LABEL (for folder name) ===
+        first_label = first_label_folder(shapes, lowercase)
+        if not first_label:
+            return FileResult("skipped", json_path, "invalid-label", None, cleaned, image_path)
+
+        # === DRAW SHAPES ===
+        if (sx, sy) != (1.0, 1.0):
+            shapes = scale_shapes(shapes, sx, sy)
+        with timed("draw"):
+            draw_shapes(image, shapes, text_offset)
+
+        save_name = os.path.splitext(data['imagePath'])[0] + "_annotated.jpg"
+        save_path = os.path.join(output_dir, first_label, save_name)
+        return FileResult("converted", json_path, None, save_path, cleaned, image_path, (save_path,), first_label), image
+
+    except Exception as e:
+        return FileResult("error", json_path, "exception", str(e), cleaned)
+
+def draw_batch(loaded_list, **options):
+    return [draw_loaded(loaded, **options) for loaded in loaded_list]
+
+def save_drawn(job):
+    """Writer stage: encode and write one annotated image."""
+    if isinstance(job, FileResult):
+        return job
+    result, image = job
+    try:
+        # === SAVE ANNOTATED IMAGE ===
+        with timed("encode"):
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG")
+        with timed("write"):
+            os.makedirs(os.path.dirname(result.detail), exist_ok=True)
+            with open(result.detail, 'wb') as f:
+                f.write(buffer.getbuffer())
+        count_bytes(written=buffer.tell())
+        return result
+    except Exception as e:
+        return FileResult("error", result.json_path, "exception", str(e), result.cleaned)
+
+def encode_drawn(job, output_dir):
+    """Writer stage for shard output: encode one annotated image into the result's payload."""
+    if isinstance(job, FileResult):
+        return job
+    result, image = job
+    try:
+        with timed("encode"):
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG")
+        # Keyed like the loose file: <label>/<name>_annotated
+        key = sample_key(*os.path.splitext(os.path.relpath(result.detail, output_dir))[0].split(os.sep))
+        return result._replace(payload=(key, {"jpg": buffer.getvalue(), "cls": result.label.encode('utf-8')}))
+    except Exception as e:
+        return FileResult("error", result.json_path, "exception", str(e), result.cleaned)
+
+def annotated_stages(output_dir, lowercase=False, text_offset=0, image_source="file", preview_size=None,
+                     output_format="files"):
+    store = save_drawn if output_format == "files" else partial(encode_drawn, output_dir=output_dir)
+    return Stages(partial(load_json, image_source=image_source),
+                  partial(draw_batch, output_dir=output_dir, lowercase=lowercase, text_offset=text_offset,
+                          preview_size=preview_size),
+                  store)
+
+# === WORK DISTRIBUTION ===
+def resolve_workers(workers):
+    """Turn a --workers value into a process count (0 or less means one per CPU)."""
+    if workers is None or workers < 1:
+        return os.cpu_count() or 1
+    return workers
+
+def iter_chunks(items, chunk_size):
+    """Group any iterable into lists of `chunk_size` without reading it all first."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_chunk_results(chunk_func, items, workers=1, chunk_size=32):
+    """Yield the results of `chunk_func` over `items` in input order, serially or on a process pool.
+
+    `items` may be a lazy iterator (e.g. a directory walk): chunks are submitted
+    as they fill up and at most two per worker are in flight at a time.
+    """
+    chunks = iter_chunks(items, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from chunk_func(chunk)
+        return
+    from concurrent.futures import ProcessPoolExecutor  # serial runs never load multiprocessing
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(chunk_func, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def iter_stage_results(stages, items, workers=1, chunk_size=32, io_threads=4):
+    """Yield the results of pipeline `stages` over `items` in input order.
+
+    In one process the whole stream runs through a single pipeline with
+    `io_threads` reader threads and half as many writer threads; with several
+    `workers`, each chunk runs through its own pipeline in a worker process.
+    `io_threads` 0 runs every stage in sequence.
+    """
+    if workers <= 1 and io_threads >= 1:
+        return iter_pipeline(items, stages, io_threads, max(1, io_threads // 2))
+    return iter_chunk_results(partial(pipeline_chunk, stages=stages, io_threads=io_threads), items,
+                              workers, chunk_size)
+
+def iter_outdated(json_files, manifest, counts, metrics=None):
+    """Pass through the JSON files that need converting, counting found and unchanged ones."""
+    if metrics is not None:
+        json_files = metrics.timed_iter(json_files, "discover")
+    for json_path in json_files:
+        counts["found"] += 1
+        if manifest is not None:
+            if metrics is not None:
+                with metrics.timing("check"):
+                    up_to_date = manifest.is_up_to_date(json_path)
+            else:
+                up_to_date = manifest.is_up_to_date(json_path)
+            if up_to_date:
+                counts["unchanged"] += 1
+                continue
+        yield json_path
+
+# === REPORTING ===
+def print_result(result):
+    """Print the status line the conversion scripts have always printed for one file."""
+    if result.status == "converted":
+        print(f"✅ Saved: {result.detail}")
+    elif result.reason == "no-shapes":
+        print(f"⚠️ No annotations found in: {result.json_path}")
+    elif result.reason == "image-missing":
+        print(f"❌ Image not found: {result.detail}")
+    elif result.reason == "draft":
+        print(f"⏩ Skipping pre-label draft not yet saved from LabelMe: {result.json_path}")
+    elif result.reason == "invalid-label":
+        print(f"⚠️ Skipping {result.json_path}: label missing or invalid")
+    else:
+        print(f"❌ Error processing {result.json_path}: {result.detail}")
+
+def convert_annotated(json_files, output_dir, workers=1, chunk_size=32, lowercase=False, text_offset=0,
+                      incremental=True, image_source="file", preview_size=None, io_threads=4, log="files",
+                      metrics_path=None, output_format="files", shard_size=DEFAULT_SHARD_SIZE):
+    """Convert every JSON into an annotated image under `output_dir/<label>/` and print the totals.
+
+    With `incremental`, sources whose JSON, image and outputs are unchanged since
+    the last run (per the manifest in `output_dir`) are skipped, and outputs of
+    removed or relabelled sources are deleted. `image_source` (one of
+    images.IMAGE_SOURCES) says where the pixels are read from; `preview_size`
+    caps the saved images at that many pixels on the longer side.
+
+    Reading, decoding/drawing and encoding/writing overlap in a pipeline with
+    `io_threads` reader threads (see iter_stage_results).
+
+    `log` (one of metrics.LOG_MODES) picks which per-file lines are printed; a
+    table of step timings and counters follows the totals, and is also written
+    to `metrics_path` if given.
+
+    With `output_format` "shards", the annotated images go into tar shards of
+    `shard_size` samples in `output_dir` instead (see shards.ShardWriter),
+    rebuilt in full on every run.
+    """
+    workers = resolve_workers(workers)
+    if workers > 1:
+        print(f"⚙️ Using {workers} worker processes.")
+
+    shards = None
+    manifest = None
+    if output_format == "shards":
+        shards = ShardWriter(output_dir, "annotated", shard_size)
+    else:
+        manifest = ConversionManifest(output_dir, {"kind": "annotated", "lowercase": lowercase,
+                                                   "text_offset": text_offset, "image_source": image_source,
+                                                   "preview_size": preview_size})
+    metrics = ConversionMetrics("annotated")
+    results_log = ResultLog(log)
+    counts = {"found": 0, "unchanged": 0}
+    todo = iter_outdated(json_files, manifest if incremental else None, counts, metrics)
+
+    stages = measured_stages(annotated_stages(output_dir, lowercase=lowercase, text_offset=text_offset,
+                                              image_source=image_source, preview_size=preview_size,
+                                              output_format=output_format))
+    cleaned = 0
+    converted = 0
+    for result in iter_stage_results(stages, todo, workers, chunk_size, io_threads):
+        if shards is not None:
+            result = shards.add_result(result, metrics)
+        if results_log.show(result):
+            print_result(result)
+        metrics.record(result)
+        if manifest is not None:
+            with metrics.timing("manifest"):
+                manifest.record(result)
+        cleaned += result.cleaned
+        converted += result.status == "converted"
+    if shards is not None:
+        shards.close()
+        removed = 0
+    else:
+        removed = manifest.finish()
+    metrics.count("skipped", "unchanged", counts["unchanged"])
+    metrics.finish()
+
+    print(f"\n🔍 Found {counts['found']} JSON file(s).")
+    if counts["unchanged"]:
+        print(f"⏩ Skipped {counts['unchanged']} unchanged JSON file(s).")
+    if removed:
+        print(f"🗑️ Removed {removed} output(s) of deleted or relabelled JSON file(s).")
+    print(f"\n✅ Cleaned and fixed {cleaned} JSON file(s).")
+    print(f"✅ Annotated {converted} image(s) saved in: {output_dir}")
+    metrics.print_summary()
+    if metrics_path:
+        metrics.save(metrics_path)
+    return cleaned, converted
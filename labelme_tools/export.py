@@ -0,0 +1,443 @@
+import os
+import argparse
+from functools import partial
+
+from labelme_tools.bbox import format_yolo_lines, yolo_bboxes
+from labelme_tools.classes import TASK_LABELS, class_map_from_labels, read_class_list, scan_class_map
+from labelme_tools.classes import yolo_class_name
+from labelme_tools.crops import crop_boxes, crop_scale, cut_crops, empty_boxes
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.engine import FileResult, clean_label, draw_shapes, first_label_folder
+from labelme_tools.engine import iter_chunk_results, iter_outdated, resolve_workers
+from labelme_tools.images import IMAGE_MODES, IMAGE_SOURCES, image_data_mode, image_size, locate_image
+from labelme_tools.images import open_image, open_scaled, place_image
+from labelme_tools.manifest import ConversionManifest
+from labelme_tools.masks import (MASK_FORMATS, MASK_SUFFIXES, SEMANTIC_OFFSET, rasterize, save_npz, save_png,
+                                 save_rle, semantic_values)
+from labelme_tools.metrics import ConversionMetrics, ResultLog, add_metrics_arguments, count_bytes, measure
+from labelme_tools.metrics import tallying, timed
+from labelme_tools.normalize import load_labelme_json
+from labelme_tools.parsing import is_draft
+from labelme_tools.yolo import write_classes
+
+# Writers run in this order; "annotated" draws on the decoded image, so it goes
+# last, after "crops" has cut its crops from the clean pixels
+TARGETS = ("yolo-txt", "mask-png", "mask-rle", "mask-npz", "folderwise", "crops", "annotated")
+
+# Default output folder of each target under the export's output folder
+TARGET_DIRS = {
+    "yolo-txt": "YOLOv8-ready",
+    "mask-png": "masks",
+    "mask-rle": "masks-rle",
+    "mask-npz": "masks-npz",
+    "folderwise": "YOLOv8-folderwise",
+    "crops": "crops_by_label",
+    "annotated": "annotated_images_by_label",
+}
+
+_made_dirs = set()
+
+def ensure_dir(path):
+    """os.makedirs once per folder per process."""
+    if path not in _made_dirs:
+        os.makedirs(path, exist_ok=True)
+        _made_dirs.add(path)
+
+# === FRAME ===
+class Frame:
+    """One parsed LabelMe JSON and its image, decoded at most once and only if a writer asks."""
+
+    def __init__(self, json_path, data, image_source="file"):
+        self.json_path = json_path
+        self.data = data
+        self.shapes = data.get('shapes', [])
+        self.image_file_name = os.path.basename(data.get('imagePath', ''))
+        self.image_path = os.path.join(os.path.dirname(json_path), self.image_file_name)
+        self.stem = os.path.splitext(self.image_file_name)[0]
+        self.found, self.embedded = locate_image(self.image_path, data, image_source)
+        self._size = None
+        self._rgb = None
+        self._labelled = None
+
+    @property
+    def size(self):
+        """(width, height) from the JSON or the image header; never decodes."""
+        if self._size is None:
+            self._size = image_size(self.image_path, self.data, self.embedded)
+        return self._size
+
+    def rgb(self):
+        if self._rgb is None:
+            if self.embedded is None and tallying():
+                count_bytes(read=os.path.getsize(self.image_path))
+            self._rgb = open_image(self.image_path, self.embedded).convert("RGB")
+        return self._rgb
+
+    def rgb_at(self, scale):
+        """(image, (sx, sy)) decoded at no less than `scale` of full size; a full decode is kept."""
+        if self._rgb is not None:
+            return self._rgb, (1.0, 1.0)
+        if self.embedded is None and tallying():
+            count_bytes(read=os.path.getsize(self.image_path))
+        image, image_scale = open_scaled(self.image_path, self.embedded, scale)
+        if image_scale == (1.0, 1.0):
+            self._rgb = image
+        return image, image_scale
+
+    def labelled_shapes(self, class_map):
+        """(class_ids, point_lists, unknown_labels) for the shapes that have a label and points."""
+        if self._labelled is None:
+            class_ids, point_lists, unknown = [], [], []
+            for shape in self.shapes:
+                label = shape.get('label', '').strip()
+                points = shape.get('points', [])
+                if not label or not points:
+                    continue
+                class_id = class_map.get(yolo_class_name(label))
+                if class_id is None:
+                    unknown.append(label)
+                    continue
+                class_ids.append(class_id)
+                point_lists.append(points)
+            self._labelled = class_ids, point_lists, unknown
+        return self._labelled
+
+    def place_image(self, dst, image_mode):
+        decoded = self.rgb() if image_mode == "reencode" else None
+        place_image(self.image_path, dst, image_mode, decoded, self.embedded)
+
+# === WRITERS ===
+# Each writer returns (outputs, notes) for one frame.
+def _unknown_notes(unknown):
+    return [f"label '{label}' is not in the class list" for label in unknown]
+
+def _write_yolo_label(frame, label_path, options):
+    class_ids, point_lists, unknown = frame.labelled_shapes(options["class_map"])
+    img_w, img_h = frame.size
+    lines = format_yolo_lines(class_ids, yolo_bboxes(point_lists, img_w, img_h))
+    with open(label_path, 'w') as out_f:
+        out_f.write(lines)
+    count_bytes(written=len(lines))
+    return _unknown_notes(unknown)
+
+def _write_masks(frame, path_stem, mask_format, options):
+    """Rasterize the frame's shapes once per mask and write them as one of MASK_FORMATS.
+
+    Pixels hold class ID + 1 in the semantic PNG (0 is background) and
+    instance IDs (1, 2, ... in shape order) in the instance PNG, RLE and npz
+    outputs. Returns (paths, notes).
+    """
+    class_ids, point_lists, unknown = frame.labelled_shapes(options["class_map"])
+    notes = _unknown_notes(unknown)
+    paths = [path_stem + MASK_SUFFIXES[mask_format]]
+    if mask_format == "png":
+        save_png(rasterize(frame.size, point_lists, semantic_values(class_ids)), paths[0])
+        if options["instance_masks"]:
+            paths.append(path_stem + "_instances.png")
+            save_png(rasterize(frame.size, point_lists), paths[1])
+    elif mask_format == "rle":
+        class_names = {class_id: name for name, class_id in options["class_map"].items()}
+        instances = rasterize(frame.size, point_lists, column_major=True)
+        hidden = save_rle(paths[0], instances, class_ids, [class_names[class_id] for class_id in class_ids],
+                          frame.image_file_name)
+        notes += [f"shape {index + 1} is hidden by later shapes" for index in hidden]
+    else:
+        save_npz(paths[0], rasterize(frame.size, point_lists), class_ids)
+    if tallying():
+        count_bytes(written=sum(os.path.getsize(path) for path in paths))
+    return paths, notes
+
+def write_yolo_txt(frame, options):
+    out = options["dirs"]["yolo-txt"]
+    ensure_dir(os.path.join(out, "images"))
+    ensure_dir(os.path.join(out, "labels"))
+    image_dst = os.path.join(out, "images", frame.image_file_name)
+    frame.place_image(image_dst, options["image_mode"])
+    label_txt = os.path.join(out, "labels", frame.stem + ".txt")
+    notes = _write_yolo_label(frame, label_txt, options)
+    return [image_dst, label_txt], notes
+
+def write_masks(frame, options, mask_format="png"):
+    out = options["dirs"]["mask-" + mask_format]
+    ensure_dir(out)
+    return _write_masks(frame, os.path.join(out, frame.stem), mask_format, options)
+
+def folder_class(json_path, folder_classes):
+    """Class of the nearest parent folder listed in `folder_classes`, else None."""
+    folder = os.path.dirname(os.path.abspath(json_path))
+    while True:
+        class_name = folder_classes.get(os.path.basename(folder))
+        if class_name is not None:
+            return class_name
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return None
+        folder = parent
+
+def write_folderwise(frame, options):
+    class_name = folder_class(frame.json_path, options["folder_classes"])
+    if class_name is None:
+        return [], ["folder is not in the folder-to-class mapping"]
+    out = options["dirs"]["folderwise"]
+    image_dir = os.path.join(out, "images", class_name)
+    label_dir = os.path.join(out, "labels", class_name)
+    ensure_dir(image_dir)
+    ensure_dir(label_dir)
+    image_dst = os.path.join(image_dir, frame.image_file_name)
+    frame.place_image(image_dst, options["image_mode"])
+    if options["folderwise_labels"] in MASK_FORMATS:
+        label_paths, notes = _write_masks(frame, os.path.join(label_dir, frame.stem), options["folderwise_labels"],
+                                          options)
+    else:
+        label_paths = [os.path.join(label_dir, frame.stem + ".txt")]
+        notes = _write_yolo_label(frame, label_paths[0], options)
+    return [image_dst, *label_paths], notes
+
+def write_crops(frame, options):
+    """Save every labelled shape as <class>/<stem>_<shape index>.jpg, all cut from one decode."""
+    indexes, folders, point_lists = [], [], []
+    for index, shape in enumerate(frame.shapes):
+        label = shape.get('label', '').strip()
+        points = shape.get('points', [])
+        if not label or not points:
+            continue
+        indexes.append(index)
+        folders.append(clean_label(label.lower() if options["lowercase"] else label))
+        point_lists.append(points)
+    if not point_lists:
+        return [], ["no labelled shapes to crop"]
+
+    boxes = crop_boxes(point_lists, frame.size, options["crop_padding"], options["crop_square"])
+    empty = empty_boxes(boxes).tolist()
+    notes = [f"shape {index} lies outside the image" for index, skip in zip(indexes, empty) if skip]
+    keep = [i for i, skip in enumerate(empty) if not skip]
+    boxes = boxes[keep]
+    # The annotated target decodes the full image anyway, so the crops share it
+    scale = 1.0 if "annotated" in options["dirs"] else crop_scale(boxes, options["crop_size"])
+    image, image_scale = frame.rgb_at(scale)
+
+    outputs = []
+    crops = cut_crops(image, boxes, image_scale, options["crop_size"], options["crop_square"])
+    for i, crop in zip(keep, crops):
+        class_folder = os.path.join(options["dirs"]["crops"], folders[i])
+        ensure_dir(class_folder)
+        save_path = os.path.join(class_folder, f"{frame.stem}_{indexes[i]}.jpg")
+        crop.save(save_path)
+        outputs.append(save_path)
+    if tallying():
+        count_bytes(written=sum(os.path.getsize(path) for path in outputs))
+    return outputs, notes
+
+def write_annotated(frame, options):
+    first_label = first_label_folder(frame.shapes, options["lowercase"])
+    if not first_label:
+        return [], ["label missing or invalid"]
+    class_folder = os.path.join(options["dirs"]["annotated"], first_label)
+    ensure_dir(class_folder)
+    image = frame.rgb()
+    draw_shapes(image, frame.shapes, options["text_offset"])
+    save_path = os.path.join(class_folder, frame.stem + "_annotated.jpg")
+    image.save(save_path)
+    if tallying():
+        count_bytes(written=os.path.getsize(save_path))
+    return [save_path], []
+
+WRITERS = {
+    "yolo-txt": write_yolo_txt,
+    "mask-png": write_masks,
+    "mask-rle": partial(write_masks, mask_format="rle"),
+    "mask-npz": partial(write_masks, mask_format="npz"),
+    "folderwise": write_folderwise,
+    "crops": write_crops,
+    "annotated": write_annotated,
+}
+
+# === PER-FILE EXPORT ===
+def export_frame(json_path, targets, options):
+    """Parse one JSON once and hand it to every requested writer."""
+    try:
+        with timed("parse"):
+            data = load_labelme_json(json_path, image_data_mode(options["image_source"]))
+        if is_draft(data):
+            return FileResult("skipped", json_path, "draft", None, False)
+        frame = Frame(json_path, data, options["image_source"])
+        if not frame.shapes:
+            return FileResult("skipped", json_path, "no-shapes", None, False)
+        if not frame.found:
+            return FileResult("skipped", json_path, "image-missing", frame.image_path, False, frame.image_path)
+
+        outputs = []
+        notes = []
+        for target in TARGETS:
+            if target in targets:
+                # A target that decodes the image is charged for the decode
+                with timed(target):
+                    written, target_notes = WRITERS[target](frame, options)
+                outputs.extend(written)
+                notes.extend(f"{target}: {note}" for note in target_notes)
+        # An embedded image is part of the JSON, so the image file is not a dependency
+        image_path = frame.image_path if frame.embedded is None else None
+        return FileResult("converted", json_path, None, frame.image_file_name, False, image_path,
+                          tuple(outputs), first_label_folder(frame.shapes, options["lowercase"]), tuple(notes))
+
+    except Exception as e:
+        return FileResult("error", json_path, "exception", str(e), False)
+
+def export_frame_chunk(json_paths, targets, options):
+    """Export a chunk of JSON files; runs inside a worker process in parallel mode."""
+    return [measure(export_frame, json_path, targets, options) for json_path in json_paths]
+
+# === EXPORT ===
+def print_frame_result(result):
+    for note in result.notes:
+        print(f"⚠️ {result.json_path}: {note}")
+    if result.status == "converted":
+        print(f"✅ Exported: {result.detail}")
+    elif result.reason == "image-missing":
+        print(f"❌ Image not found: {result.detail}")
+    elif result.reason == "draft":
+        print(f"⏩ Skipping pre-label draft not yet saved from LabelMe: {result.json_path}")
+    elif result.status == "error":
+        print(f"❌ Error processing {result.json_path}: {result.detail}")
+
+def export_dataset(json_files, output_dir, targets, class_map, image_mode="copy", workers=1, chunk_size=32,
+                   incremental=True, lowercase=False, text_offset=0, folder_classes=None,
+                   folderwise_labels="txt", target_dirs=None, image_source="file", log="files", metrics_path=None,
+                   instance_masks=False, crop_padding=0.0, crop_square=False, crop_size=None):
+    """Export every JSON to all `targets` in one pass and print the totals.
+
+    Each JSON is parsed once and each image decoded at most once (only the
+    crops and annotated targets and --image-mode reencode need pixels).
+    `folderwise_labels` is "txt" or one of masks.MASK_FORMATS; `instance_masks`
+    adds an instance PNG next to each semantic PNG. The crops target pads each
+    box by `crop_padding` times its size, makes it square with `crop_square`
+    and resizes it to `crop_size` pixels if given (see crops.crop_boxes).
+    `log` and `metrics_path` work as in engine.convert_annotated.
+    """
+    targets = [target for target in TARGETS if target in targets]
+    dirs = {target: os.path.join(output_dir, TARGET_DIRS[target]) for target in targets}
+    dirs.update(target_dirs or {})
+    options = {
+        "dirs": dirs,
+        "class_map": class_map,
+        "image_mode": image_mode,
+        "image_source": image_source,
+        "lowercase": lowercase,
+        "text_offset": text_offset,
+        "folder_classes": folder_classes or {},
+        "folderwise_labels": folderwise_labels,
+        "instance_masks": instance_masks,
+        "crop_padding": crop_padding,
+        "crop_square": crop_square,
+        "crop_size": crop_size,
+    }
+
+    workers = resolve_workers(workers)
+    if workers > 1:
+        print(f"⚙️ Using {workers} worker processes.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = ConversionManifest(output_dir, {"kind": "export", "targets": targets,
+                                               **options})
+    metrics = ConversionMetrics("export")
+    results_log = ResultLog(log)
+    counts = {"found": 0, "unchanged": 0}
+    todo = iter_outdated(json_files, manifest if incremental else None, counts, metrics)
+
+    chunk_func = partial(export_frame_chunk, targets=targets, options=options)
+    exported = 0
+    for result in iter_chunk_results(chunk_func, todo, workers, chunk_size):
+        with metrics.timing("manifest"):
+            manifest.record(result)
+        metrics.record(result)
+        exported += result.status == "converted"
+        if results_log.show(result):
+            print_frame_result(result)
+    removed = manifest.finish()
+    metrics.count("skipped", "unchanged", counts["unchanged"])
+    metrics.finish()
+
+    label_formats = {"yolo-txt": "txt", "folderwise": folderwise_labels,
+                     **{"mask-" + mask_format: mask_format for mask_format in MASK_FORMATS}}
+    for target in targets:
+        if target in label_formats:
+            # Semantic masks (png, and npz read back with load_npz) list their pixel values
+            offset = SEMANTIC_OFFSET if label_formats[target] in ("png", "npz") else 0
+            os.makedirs(dirs[target], exist_ok=True)
+            write_classes(class_map, os.path.join(dirs[target], "classes.txt"), offset)
+
+    print(f"\n🔍 Found {counts['found']} JSON file(s).")
+    if counts["unchanged"]:
+        print(f"⏩ Skipped {counts['unchanged']} unchanged JSON file(s).")
+    if removed:
+        print(f"🗑️ Removed {removed} output(s) of deleted or relabelled JSON file(s).")
+    print(f"\n✅ Exported {exported} image(s) to: {', '.join(targets)}")
+    for target in targets:
+        print(f"📂 {target}: {dirs[target]}")
+    metrics.print_summary()
+    if metrics_path:
+        metrics.save(metrics_path)
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export LabelMe JSONs to several dataset formats in one pass.")
+    parser.add_argument("input_root", help="folder searched recursively for LabelMe JSONs")
+    parser.add_argument("output_dir", help="folder the target folders are created in")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=["annotated", "yolo-txt"],
+                        help="outputs to write (default: annotated yolo-txt)")
+    parser.add_argument("--task", choices=sorted(TASK_LABELS),
+                        help="take class IDs from this task's label list")
+    parser.add_argument("--classes", metavar="FILE",
+                        help="fixed class list, one label per line; default: --task, else a prepass over all labels")
+    parser.add_argument("--folder-class", action="append", default=[], metavar="FOLDER=CLASS",
+                        help="folderwise target: files under FOLDER go to class CLASS (repeatable)")
+    parser.add_argument("--folderwise-labels", choices=("txt",) + MASK_FORMATS, default="txt",
+                        help="folderwise target: YOLO txt labels, or masks as PNG, COCO RLE JSON or npz")
+    parser.add_argument("--instance-masks", action="store_true",
+                        help="PNG masks: also write <name>_instances.png with one ID per object")
+    parser.add_argument("--crop-padding", type=float, default=0.0, metavar="FRACTION",
+                        help="crops target: grow each box by this fraction of its size on every side")
+    parser.add_argument("--crop-square", action="store_true",
+                        help="crops target: widen the shorter side so every crop is square")
+    parser.add_argument("--crop-size", type=int, metavar="PX",
+                        help="crops target: resize crops to PX pixels on the longer side (default: no resize)")
+    parser.add_argument("--image-mode", choices=IMAGE_MODES, default="copy",
+                        help="how images are placed in images/ (reencode = decode + save)")
+    parser.add_argument("--image-source", choices=IMAGE_SOURCES, default="file",
+                        help="read images from the file, the JSON's imageData, or imageData when present (auto)")
+    parser.add_argument("--lowercase", action="store_true",
+                        help="annotated target: lower-case the class folder names")
+    parser.add_argument("--text-offset", type=int, default=0,
+                        help="annotated target: label text offset from the first point, in pixels")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to export with (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--full", action="store_true",
+                        help="re-export everything instead of only JSONs changed since the last run")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # === CLASS MAPPING ===
+    if args.classes:
+        class_map = class_map_from_labels(read_class_list(args.classes))
+    elif args.task:
+        class_map = class_map_from_labels(TASK_LABELS[args.task])
+    else:
+        print("🏷️ Collecting class names ...")
+        class_map = scan_class_map(iter_json_files(args.input_root))
+
+    folder_classes = dict(pair.split("=", 1) for pair in args.folder_class)
+    if "folderwise" in args.targets and not folder_classes:
+        parser.error("the folderwise target needs at least one --folder-class FOLDER=CLASS")
+
+    print(f"🔍 Searching for JSON files in: {args.input_root}")
+    export_dataset(iter_json_files(args.input_root), args.output_dir, args.targets, class_map,
+                   image_mode=args.image_mode, image_source=args.image_source, workers=args.workers, incremental=not args.full,
+                   lowercase=args.lowercase, text_offset=args.text_offset, folder_classes=folder_classes,
+                   folderwise_labels=args.folderwise_labels, log=args.log, metrics_path=args.metrics,
+                   instance_masks=args.instance_masks, crop_padding=args.crop_padding,
+                   crop_square=args.crop_square, crop_size=args.crop_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import io
+import os
+import math
+import shutil
+
+# PIL is imported inside the functions that open images: the CLI and the
+# commands that never decode start without paying for it
+from labelme_tools.metrics import count_bytes, tallying
+from labelme_tools.parsing import EmbeddedImage
+
+# How an exported image gets into the output folder:
+#   copy     - copy the original bytes (default)
+#   hardlink - hardlink the original file, falling back to a copy across drives
+#   reflink  - copy-on-write clone where the filesystem supports it, else a copy
+#   reencode - decode and save through PIL (the old behaviour; lossy for JPEG)
+IMAGE_MODES = ("copy", "hardlink", "reflink", "reencode")
+
+# Where the converters read an image from:
+#   file     - the image file next to the JSON (default)
+#   embedded - the base64 imageData inside the JSON, decoded in memory
+#   auto     - imageData when the JSON carries it (already read with the JSON), else the file
+IMAGE_SOURCES = ("file", "embedded", "auto")
+
+# Linux ioctl request for a copy-on-write clone (btrfs, XFS)
+FICLONE = 0x40049409
+
+# === IMAGE SOURCE ===
+def image_data_mode(source):
+    """How load_labelme should treat imageData for an image source."""
+    if source not in IMAGE_SOURCES:
+        raise ValueError(f"Unknown image source: {source}")
+    return "skip" if source == "file" else "lazy"
+
+def locate_image(image_path, data, source="file"):
+    """Decide where the pixels of one JSON come from.
+
+    Returns (found, embedded): `embedded` is the EmbeddedImage to read, or None
+    to read the file at `image_path`; `found` is False if neither is available.
+    """
+    embedded = None
+    if source != "file":
+        embedded = data.get('imageData') or None
+        if isinstance(embedded, str):
+            embedded = EmbeddedImage(embedded.encode('ascii'))
+    if embedded is not None:
+        return True, embedded
+    return source != "embedded" and os.path.exists(image_path), None
+
+class PrefetchedImage:
+    """Image file bytes read ahead of decoding; used wherever an EmbeddedImage is."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def decode(self):
+        return self.data
+
+def prefetch_image(image_path):
+    with open(image_path, 'rb') as f:
+        return PrefetchedImage(f.read())
+
+def open_image(image_path, embedded=None):
+    """Open the image from the embedded bytes (in memory, no temp file) or from the file."""
+    from PIL import Image
+    if embedded is not None:
+        return Image.open(io.BytesIO(embedded.decode()))
+    return Image.open(image_path)
+
+def open_preview(image_path, embedded=None, max_size=None):
+    """Decode an image as RGB, at most `max_size` pixels on its longer side if given.
+
+    JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale through the decoder's
+    draft mode; the remaining reduction is a resize of the small image. Returns
+    (image, (sx, sy)) where sx/sy map original coordinates onto the result.
+    """
+    image = open_image(image_path, embedded)
+    if not max_size:
+        return image.convert("RGB"), (1.0, 1.0)
+    full_w, full_h = image.size
+    ratio = max_size / max(full_w, full_h)
+    if ratio < 1:
+        # No-op for formats without draft support
+        image.draft("RGB", (max(1, round(full_w * ratio)), max(1, round(full_h * ratio))))
+    from PIL import Image
+    image = image.convert("RGB")
+    image.thumbnail((max_size, max_size), Image.BILINEAR)
+    return image, (image.width / full_w, image.height / full_h)
+
+def open_scaled(image_path, embedded=None, scale=1.0):
+    """Decode an image as RGB at no less than `scale` of its full size.
+
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale through draft mode when that
+    still gives at least `scale`; other formats are decoded at full size.
+    Returns (image, (sx, sy)) as open_preview does.
+    """
+    image = open_image(image_path, embedded)
+    full_w, full_h = image.size
+    if scale < 1:
+        image.draft("RGB", (max(1, math.ceil(full_w * scale)), max(1, math.ceil(full_h * scale))))
+    # convert() would copy an image that is RGB already
+    if image.mode == "RGB":
+        image.load()
+    else:
+        image = image.convert("RGB")
+    return image, (image.width / full_w, image.height / full_h)
+
+# === IMAGE SIZE ===
+def image_size(image_path, data=None, embedded=None):
+    """Return (width, height) from the LabelMe JSON if recorded, else from the image header only."""
+    if data:
+        width, height = data.get('imageWidth'), data.get('imageHeight')
+        if isinstance(width, int) and isinstance(height, int) and width > 0 and height > 0:
+            return width, height
+    # Image.open only parses the header; pixels are never decoded here
+    with open_image(image_path, embedded) as image:
+        return image.size
+
+# === IMAGE PLACEMENT ===
+def _remove_existing(dst):
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+def _reflink(src, dst):
+    import fcntl  # not available on Windows; the caller falls back to a copy
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+def place_image(src, dst, mode="copy", decoded=None, embedded=None):
+    """Put the image at `src` into `dst` using one of IMAGE_MODES.
+
+    `decoded` is an already decoded RGB copy of `src` that "reencode" can save
+    instead of decoding the file again. With `embedded` (an EmbeddedImage) the
+    image comes from the JSON instead of `src`: its bytes are written as they
+    are, since they cannot be linked.
+    """
+    if mode not in IMAGE_MODES:
+        raise ValueError(f"Unknown image mode: {mode}")
+    if embedded is None and os.path.exists(dst) and os.path.samefile(src, dst):
+        return
+    # Never write through an existing file: it may be a hardlink to another source
+    _remove_existing(dst)
+
+    if mode == "reencode":
+        if decoded is None:
+            decoded = open_image(src, embedded).convert("RGB")
+        decoded.save(dst)
+    elif embedded is not None:
+        with open(dst, 'wb') as f:
+            f.write(embedded.decode())
+    elif mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            shutil.copyfile(src, dst)
+    elif mode == "reflink":
+        try:
+            _reflink(src, dst)
+        except (ImportError, OSError):
+            shutil.copyfile(src, dst)
+    else:
+        shutil.copyfile(src, dst)
+
+    if tallying():
+        size = os.path.getsize(dst)
+        # Copies read the source in full; embedded bytes were read with the JSON
+        count_bytes(read=size if embedded is None and mode != "reencode" else 0, written=size)
+
+def image_bytes(src, mode="copy", embedded=None):
+    """The bytes place_image would write to a file, for outputs that are not loose files (shards)."""
+    if mode not in IMAGE_MODES:
+        raise ValueError(f"Unknown image mode: {mode}")
+    if mode == "reencode":
+        from PIL import Image
+        buffer = io.BytesIO()
+        extension = os.path.splitext(src)[1].lower()
+        open_image(src, embedded).convert("RGB").save(buffer, format=Image.registered_extensions().get(extension, "JPEG"))
+        return buffer.getvalue()
+    if embedded is not None:
+        return embedded.decode()
+    with open(src, 'rb') as f:
+        data = f.read()
+    count_bytes(read=len(data))
+    return data
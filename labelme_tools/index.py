@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+from functools import partial
+
+import numpy as np
+
+from labelme_tools.bbox import box_extents_packed, pack_points
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.engine import iter_chunk_results, resolve_workers
+from labelme_tools.normalize import load_labelme_json
+
+# Kept under the indexed root; the leading dot keeps it out of the JSON walk
+INDEX_DIR_NAME = ".labelme-index"
+INDEX_VERSION = 1
+
+# One row per indexed JSON. `name_start`/`name_len` locate its path, relative
+# to the root, in names.bin; its shapes are rows first_shape .. first_shape + shape_count.
+FILE_DTYPE = np.dtype([
+    ("folder", "<u4"),
+    ("name_start", "<u8"),
+    ("name_len", "<u4"),
+    ("size", "<i8"),
+    ("mtime_ns", "<i8"),
+    ("image_w", "<u4"),
+    ("image_h", "<u4"),
+    ("first_shape", "<u8"),
+    ("shape_count", "<u4"),
+])
+
+# One row per labelled shape; the box is the min/max of its points, in pixels,
+# exactly as the YOLO exporter computes it
+SHAPE_DTYPE = np.dtype([
+    ("file", "<u4"),
+    ("label", "<u4"),
+    ("shape_type", "u1"),
+    ("x_min", "<f8"),
+    ("y_min", "<f8"),
+    ("x_max", "<f8"),
+    ("y_max", "<f8"),
+])
+
+# === PARSING ===
+def _index_entry(json_path, root):
+    """(relative path, size, mtime_ns, width, height, [(label, shape type)], boxes) for one JSON."""
+    st = os.stat(json_path)
+    data = load_labelme_json(json_path)
+    labels = []
+    point_lists = []
+    for shape in data.get('shapes', []):
+        label = shape.get('label', '').strip()
+        points = shape.get('points', [])
+        if not label or not points:
+            continue
+        labels.append((label, shape.get('shape_type') or ("rectangle" if len(points) == 2 else "polygon")))
+        point_lists.append(points)
+    boxes = np.empty((0, 4))
+    if point_lists:
+        boxes = np.column_stack(box_extents_packed(*pack_points(point_lists)))
+    width, height = data.get('imageWidth'), data.get('imageHeight')
+    return (os.path.relpath(json_path, root), st.st_size, st.st_mtime_ns,
+            width if isinstance(width, int) else 0, height if isinstance(height, int) else 0, labels, boxes)
+
+def index_chunk(json_paths, root):
+    """Parse a chunk of JSONs for the index; runs inside a worker process in parallel mode."""
+    entries = []
+    for json_path in json_paths:
+        try:
+            entries.append(_index_entry(json_path, root))
+        except Exception as e:
+            entries.append((os.path.relpath(json_path, root), e))
+    return entries
+
+# === INDEX ===
+class AnnotationIndex:
+    """Columnar, memory-mapped index of every shape in a tree of LabelMe JSONs.
+
+    files.npy and shapes.npy hold FILE_DTYPE and SHAPE_DTYPE rows and are opened
+    with mmap, so queries run as NumPy operations over the columns without
+    building a Python object per annotation. The string tables (labels, shape
+    types, folders) are small and live in meta.json; file paths are packed into
+    names.bin and only decoded for the rows a query returns.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.folder = os.path.join(root, INDEX_DIR_NAME)
+        self._load()
+
+    def _load(self):
+        self.labels = []
+        self.shape_types = []
+        self.folders = []
+        self.files = np.zeros(0, dtype=FILE_DTYPE)
+        self.shapes = np.zeros(0, dtype=SHAPE_DTYPE)
+        self.names = b""
+        meta_path = os.path.join(self.folder, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            return
+        self.labels = meta["labels"]
+        self.shape_types = meta["shape_types"]
+        self.folders = meta["folders"]
+        if meta["files"]:
+            self.files = np.load(os.path.join(self.folder, "files.npy"), mmap_mode="r")
+            self.names = np.memmap(os.path.join(self.folder, "names.bin"), dtype=np.uint8, mode="r")
+        if meta["shapes"]:
+            self.shapes = np.load(os.path.join(self.folder, "shapes.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.files)
+
+    # === LOOKUPS ===
+    def path(self, file_id):
+        """Path of an indexed JSON, relative to the root."""
+        row = self.files[file_id]
+        start = int(row["name_start"])
+        return bytes(self.names[start:start + int(row["name_len"])]).decode('utf-8')
+
+    def paths(self):
+        """Relative paths of every indexed JSON, in file ID order."""
+        blob = bytes(self.names)
+        return [blob[start:start + length].decode('utf-8')
+                for start, length in zip(self.files["name_start"].tolist(), self.files["name_len"].tolist())]
+
+    def json_paths(self, file_ids):
+        """Full JSON paths of `file_ids`, e.g. as the input of a converter."""
+        for file_id in file_ids:
+            yield os.path.join(self.root, self.path(file_id))
+
+    def label_ids(self, label):
+        """IDs of the labels equal to `label`, ignoring case."""
+        wanted = label.strip().lower()
+        return [i for i, name in enumerate(self.labels) if name.lower() == wanted]
+
+    def folder_ids(self, folder):
+        """IDs of the folders that have a path component named `folder`."""
+        return [i for i, name in enumerate(self.folders) if folder in name.split("/")]
+
+    # === QUERIES ===
+    def shape_mask(self, label=None, folder=None, shape_type=None, min_count=1):
+        """Boolean mask over the shape rows matching every given condition.
+
+        With `min_count` only the shapes of files that have at least that many
+        matching shapes are kept, so counts agree with frames().
+        """
+        mask = np.ones(len(self.shapes), dtype=bool)
+        if label is not None:
+            mask &= np.isin(self.shapes["label"], self.label_ids(label))
+        if shape_type is not None:
+            type_ids = [i for i, name in enumerate(self.shape_types) if name == shape_type]
+            mask &= np.isin(self.shapes["shape_type"], type_ids)
+        if folder is not None:
+            in_folder = np.isin(self.files["folder"], self.folder_ids(folder))
+            mask &= in_folder[self.shapes["file"]]
+        if min_count > 1:
+            per_file = np.bincount(self.shapes["file"][mask], minlength=len(self.files))
+            mask &= (per_file >= min_count)[self.shapes["file"]]
+        return mask
+
+    def count(self, **conditions):
+        """Number of shapes matching `conditions` (see shape_mask)."""
+        return int(np.count_nonzero(self.shape_mask(**conditions)))
+
+    def frames(self, min_count=1, **conditions):
+        """IDs of the files with at least `min_count` shapes matching `conditions`."""
+        per_file = np.bincount(self.shapes["file"][self.shape_mask(**conditions)], minlength=len(self.files))
+        return np.flatnonzero(per_file >= min_count)
+
+    def label_counts(self, **conditions):
+        """{label: shape count} for the shapes matching `conditions`."""
+        counts = np.bincount(self.shapes["label"][self.shape_mask(**conditions)], minlength=len(self.labels))
+        return {self.labels[i]: int(n) for i, n in enumerate(counts) if n}
+
+    # === BUILDING ===
+    def update(self, workers=1, chunk_size=256):
+        """Bring the index in line with the JSONs under the root; returns (parsed, kept, removed).
+
+        Only JSONs whose size or mtime changed since the last build are parsed
+        again; the rows of the others are copied over column-wise. Label,
+        shape type and folder IDs only ever get appended, so they stay stable.
+        """
+        old_paths = self.paths()
+        old_rows = {path: i for i, path in enumerate(old_paths)}
+        old_signatures = list(zip(self.files["size"].tolist(), self.files["mtime_ns"].tolist()))
+        label_ids = {name: i for i, name in enumerate(self.labels)}
+        type_ids = {name: i for i, name in enumerate(self.shape_types)}
+        folder_ids = {name: i for i, name in enumerate(self.folders)}
+
+        def intern(table, ids, value):
+            if value not in ids:
+                ids[value] = len(table)
+                table.append(value)
+            return ids[value]
+
+        kept = []       # old file rows to carry over, in walk order
+        changed = []
+        present = 0
+        for json_path in iter_json_files(self.root):
+            rel = os.path.relpath(json_path, self.root)
+            row = old_rows.get(rel)
+            if row is not None:
+                present += 1
+                st = os.stat(json_path)
+                if (st.st_size, st.st_mtime_ns) == old_signatures[row]:
+                    kept.append(row)
+                    continue
+            changed.append(json_path)
+
+        workers = resolve_workers(workers)
+        chunk_func = partial(index_chunk, root=self.root)
+        parsed = []
+        for entry in iter_chunk_results(chunk_func, changed, workers, chunk_size):
+            if isinstance(entry[1], Exception):
+                print(f"❌ Error reading {entry[0]}: {entry[1]}")
+                continue
+            parsed.append(entry)
+
+        # === OLD ROWS ===
+        kept = np.array(kept, dtype=np.intp)
+        old_files = np.array(self.files[kept]) if len(kept) else np.zeros(0, dtype=FILE_DTYPE)
+        counts = old_files["shape_count"].astype(np.intp)
+        # Row k of file j's shapes moves from first_shape[j] + k to offsets[j] + k
+        offsets = np.cumsum(counts) - counts
+        shape_rows = np.repeat(old_files["first_shape"].astype(np.intp) - offsets, counts) + np.arange(counts.sum())
+        old_shapes = np.array(self.shapes[shape_rows]) if len(shape_rows) else np.zeros(0, dtype=SHAPE_DTYPE)
+        old_shapes["file"] = np.repeat(np.arange(len(kept), dtype=np.uint32), counts)
+        old_names = [old_paths[i].encode('utf-8') for i in kept.tolist()]
+
+        # === NEW ROWS ===
+        new_files = np.zeros(len(parsed), dtype=FILE_DTYPE)
+        new_shapes = np.zeros(sum(len(entry[5]) for entry in parsed), dtype=SHAPE_DTYPE)
+        new_names = []
+        shape_at = 0
+        for i, (rel, size, mtime_ns, width, height, labels, boxes) in enumerate(parsed):
+            folder = os.path.dirname(rel).replace(os.sep, "/")
+            new_files[i] = (intern(self.folders, folder_ids, folder), 0, 0, size, mtime_ns, width, height, 0,
+                            len(labels))
+            new_names.append(rel.encode('utf-8'))
+            rows = new_shapes[shape_at:shape_at + len(labels)]
+            rows["file"] = len(kept) + i
+            rows["label"] = [intern(self.labels, label_ids, label) for label, _ in labels]
+            rows["shape_type"] = [intern(self.shape_types, type_ids, shape_type) for _, shape_type in labels]
+            for column, values in zip(("x_min", "y_min", "x_max", "y_max"), boxes.T):
+                rows[column] = values
+            shape_at += len(labels)
+
+        files = np.concatenate((old_files, new_files))
+        shapes = np.concatenate((old_shapes, new_shapes))
+        names = old_names + new_names
+        name_lens = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+        files["name_len"] = name_lens
+        files["name_start"] = np.cumsum(name_lens) - name_lens
+        shape_counts = files["shape_count"].astype(np.int64)
+        files["first_shape"] = np.cumsum(shape_counts) - shape_counts
+        self._save(files, shapes, b"".join(names))
+        return len(parsed), len(kept), len(old_rows) - present
+
+    def _save(self, files, shapes, names):
+        os.makedirs(self.folder, exist_ok=True)
+        # Drop the maps first: Windows cannot replace a file that is mapped
+        self.files = self.shapes = self.names = None
+        for name, array in (("files.npy", files), ("shapes.npy", shapes)):
+            tmp_path = os.path.join(self.folder, name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, os.path.join(self.folder, name))
+        tmp_path = os.path.join(self.folder, "names.bin.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(names)
+        os.replace(tmp_path, os.path.join(self.folder, "names.bin"))
+        meta = {"version": INDEX_VERSION, "files": len(files), "shapes": len(shapes),
+                "labels": self.labels, "shape_types": self.shape_types, "folders": self.folders}
+        tmp_path = os.path.join(self.folder, "meta.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.folder, "meta.json"))
+        self._load()
+
+
+def main(argv=None):
+    # The same options as `python -m labelme_tools index`, defined once in the CLI
+    from labelme_tools.cli import main as cli_main
+    cli_main(["index"] + list(sys.argv[1:] if argv is None else argv))
+
+
+if __name__ == "__main__":
+    main()
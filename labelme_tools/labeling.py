@@ -0,0 +1,299 @@
+import os
+import filecmp
+import shutil
+import subprocess
+import threading
+
+from labelme_tools.discovery import JSON_EXTENSIONS, iter_image_files, walk_files
+from labelme_tools.images import place_image
+from labelme_tools.normalize import write_json_atomic
+from labelme_tools.parsing import DRAFT_KEY, is_draft, parse_labelme
+
+# Hidden, so the launchers' image walk never picks up the staged copies
+SESSION_DIR_NAME = ".labelme-session"
+
+# === PATHS ===
+def json_folder_for(img_path):
+    """`<subfolder>-json` next to the image's folder, where finished annotations live."""
+    folder_path = os.path.dirname(img_path)
+    return os.path.join(os.path.dirname(folder_path), f"{os.path.basename(folder_path)}-json")
+
+def json_target_for(img_path):
+    img_stem = os.path.splitext(os.path.basename(img_path))[0]
+    return os.path.join(json_folder_for(img_path), img_stem + ".json")
+
+def draft_path_for(img_path):
+    """LabelMe's own JSON next to the image, which it opens with the image (pre-label drafts live here)."""
+    return os.path.splitext(img_path)[0] + ".json"
+
+def file_signature(path):
+    """(size, mtime) of a file, None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def write_label_file(image_folder, labels):
+    labels_path = os.path.join(image_folder, "default_labels.txt")
+    with open(labels_path, "w", encoding="utf-8") as f:
+        for label in labels:
+            f.write(label + "\n")
+    return labels_path
+
+def _reviewed_draft(json_path):
+    """Content of a saved JSON that still carries the pre-label draft mark, without it; else None."""
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    if DRAFT_KEY.encode() not in raw:
+        return None
+    try:
+        data = parse_labelme(raw, "keep")
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not is_draft(data):
+        return None
+    del data[DRAFT_KEY]
+    return data
+
+def move_annotation(src, dst):
+    """Move a saved JSON into its -json folder, replacing an older save of the same image.
+
+    A save of a pre-label draft (LabelMe keeps the draft mark) is filed without the mark.
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    reviewed = _reviewed_draft(src)
+    if reviewed is not None:
+        write_json_atomic(dst, reviewed)
+        os.remove(src)
+        return
+    try:
+        os.replace(src, dst)
+    except OSError:
+        # Different drive
+        shutil.move(src, dst)
+
+# === ANNOTATED INDEX ===
+class AnnotatedIndex:
+    """Stems of the JSONs already in each -json folder, from one listing per folder.
+
+    Replaces an os.path.exists probe per image with a set lookup.
+    """
+
+    def __init__(self):
+        self._stems = {}
+
+    def stems(self, json_folder):
+        stems = self._stems.get(json_folder)
+        if stems is None:
+            try:
+                with os.scandir(json_folder) as it:
+                    stems = {name[:-5] for name in (entry.name for entry in it) if name.endswith(".json")}
+            except OSError:
+                stems = set()
+            self._stems[json_folder] = stems
+        return stems
+
+    def is_annotated(self, img_path):
+        img_stem = os.path.splitext(os.path.basename(img_path))[0]
+        return img_stem in self.stems(json_folder_for(img_path))
+
+def remaining_queue(images):
+    """Walk `images` once and return (found, remaining) where `remaining` lists the unannotated ones."""
+    index = AnnotatedIndex()
+    found = 0
+    remaining = []
+    for img_path in images:
+        found += 1
+        if not index.is_annotated(img_path):
+            remaining.append(img_path)
+    print(f"⏩ {len(remaining)} of {found} image(s) remaining.")
+    return found, remaining
+
+# === ONE LABELME PER IMAGE ===
+def label_per_image(images, labelme_cmd, labels_path, hint):
+    """The original loop: start LabelMe for each unannotated image and wait for it to close.
+
+    A pre-label draft next to the image counts as an annotation only once it
+    has been saved again from LabelMe.
+    """
+    found, remaining = remaining_queue(images)
+    for position, img_path in enumerate(remaining):
+        original_json = draft_path_for(img_path)
+        draft = file_signature(original_json)
+        json_target = json_target_for(img_path)
+
+        print(f"\n🖼️ Opening LabelMe for: {img_path} ({len(remaining) - position} of {found} remaining)")
+        print(hint)
+
+        try:
+            subprocess.run(f'"{labelme_cmd}" "{img_path}" --labels "{labels_path}"', shell=True)
+        except Exception as e:
+            print(f"❌ ERROR: Could not open LabelMe: {e}")
+            continue
+
+        saved = file_signature(original_json)
+        if saved is not None and saved != draft:
+            move_annotation(original_json, json_target)
+            print(f"✅ Annotation saved to: {json_target}")
+        elif saved is not None:
+            print(f"⚠️ Draft not saved, left in place for: {img_path}")
+        else:
+            print(f"⚠️ No annotation saved for: {img_path}")
+    return found
+
+# === PERSISTENT SESSION ===
+def session_json_target(json_path, session_dir):
+    """JSON target of the original image behind a JSON saved in the session folder."""
+    return json_target_for(session_original(json_path, session_dir))
+
+def session_original(path, session_dir):
+    """Path in the image folder that a file in the session folder was staged from."""
+    return os.path.join(os.path.dirname(session_dir), os.path.relpath(path, session_dir))
+
+class AnnotationWatcher:
+    """Polls the session folder and moves each saved JSON to its -json folder.
+
+    A JSON is moved once its size and mtime are unchanged between two polls, so
+    a file LabelMe is still writing is left alone. A staged pre-label draft is
+    left alone until it differs from the draft next to the original image; once
+    a save of it is filed, that draft is removed.
+    """
+
+    def __init__(self, session_dir, interval=0.5):
+        self.session_dir = session_dir
+        self.interval = interval
+        self.filed = set()
+        self._pending = {}
+        self._drafts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling and move whatever has been saved since the last poll."""
+        self._stop.set()
+        self._thread.join()
+        self.sweep(settled_only=False)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sweep()
+
+    def sweep(self, settled_only=True):
+        for json_path in walk_files(self.session_dir, JSON_EXTENSIONS):
+            try:
+                stat = os.stat(json_path)
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._drafts.get(json_path) == signature:
+                continue
+            if settled_only and self._pending.get(json_path) != signature:
+                self._pending[json_path] = signature
+                continue
+            self._pending.pop(json_path, None)
+            draft_path = session_original(json_path, self.session_dir)
+            has_draft = os.path.exists(draft_path)
+            if has_draft and filecmp.cmp(json_path, draft_path, shallow=False):
+                self._drafts[json_path] = signature
+                continue
+            json_target = session_json_target(json_path, self.session_dir)
+            try:
+                move_annotation(json_path, json_target)
+            except OSError as e:
+                print(f"❌ Could not move {json_path}: {e}")
+                continue
+            if has_draft:
+                os.remove(draft_path)
+            self.filed.add(json_target)
+            print(f"✅ Annotation saved to: {json_target}")
+
+def stage_images(images, session_dir):
+    """Hardlink `images` into `session_dir`, keeping their subfolders, with a copy of any pre-label draft."""
+    image_folder = os.path.dirname(session_dir)
+    for img_path in images:
+        staged_path = os.path.join(session_dir, os.path.relpath(img_path, image_folder))
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+        # Falls back to a copy where hardlinks are not possible
+        place_image(img_path, staged_path, "hardlink")
+        draft_path = draft_path_for(img_path)
+        if os.path.exists(draft_path):
+            # A copy, so LabelMe's save never rewrites the draft it is compared with
+            shutil.copyfile(draft_path, draft_path_for(staged_path))
+
+def clear_session(session_dir):
+    """Delete the staged images and unchanged draft copies; return the JSONs still to be filed.
+
+    A saved JSON that could not be moved is the only copy of that annotation,
+    so it is kept, and the session folder with it.
+    """
+    unfiled = []
+    for folder, _, files in os.walk(session_dir, topdown=False):
+        for name in files:
+            path = os.path.join(folder, name)
+            if name.lower().endswith(JSON_EXTENSIONS):
+                draft_path = session_original(path, session_dir)
+                if not (os.path.exists(draft_path) and filecmp.cmp(path, draft_path, shallow=False)):
+                    unfiled.append(path)
+                    continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        try:
+            # Only succeeds once the folder is empty
+            os.rmdir(folder)
+        except OSError:
+            pass
+    return sorted(unfiled)
+
+def print_unfiled(session_dir, unfiled):
+    print(f"❌ {len(unfiled)} saved annotation(s) could not be filed and are kept in: {session_dir}")
+    for json_path in unfiled:
+        print(f"   {json_path} → {session_json_target(json_path, session_dir)}")
+
+def label_session(image_folder, labelme_cmd, labels_path, hint, interval=0.5, images=None):
+    """Open LabelMe once on every unannotated image and file the JSONs while it runs.
+
+    `images` limits the session to those images under `image_folder` (e.g. a
+    dedup queue); by default every image in the folder is offered. A session
+    folder holding saves that could not be filed is kept, and no new session
+    starts until they are filed (every start tries again).
+    """
+    session_dir = os.path.join(image_folder, SESSION_DIR_NAME)
+    if os.path.isdir(session_dir):
+        # Left over from an interrupted session: keep its saved work, then start clean
+        AnnotationWatcher(session_dir).sweep(settled_only=False)
+        unfiled = clear_session(session_dir)
+        if unfiled:
+            print_unfiled(session_dir, unfiled)
+            print("⚠️ Move them to their -json folders (or fix what stops the move), then start again.")
+            return 0
+
+    found, remaining = remaining_queue(iter_image_files(image_folder) if images is None else images)
+    staged = len(remaining)
+    if not staged:
+        return found
+    stage_images(remaining, session_dir)
+
+    print(f"\n🖼️ Opening LabelMe once for {staged} image(s) in: {session_dir}")
+    print(hint)
+    print("➡️ D = next image, A = previous image; every save is filed right away")
+
+    watcher = AnnotationWatcher(session_dir, interval)
+    watcher.start()
+    try:
+        subprocess.run([labelme_cmd, session_dir, "--labels", labels_path])
+    except Exception as e:
+        print(f"❌ ERROR: Could not open LabelMe: {e}")
+    finally:
+        watcher.stop()
+        unfiled = clear_session(session_dir)
+        if unfiled:
+            print_unfiled(session_dir, unfiled)
+
+    print(f"\n✅ Filed {len(watcher.filed)} annotation(s); {staged - len(watcher.filed)} image(s) left unannotated.")
+    return found
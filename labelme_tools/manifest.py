@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+
+# Kept in the output folder; the leading dot keeps it out of the '**/*.json' globs
+MANIFEST_NAME = ".conversion-manifest.json"
+MANIFEST_VERSION = 1
+
+# === SIGNATURES ===
+def file_signature(path):
+    """Return [size, mtime_ns] for `path`, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+# === MANIFEST ===
+class ConversionManifest:
+    """Per-source record of what a conversion run read and wrote.
+
+    Each entry is keyed by the absolute JSON path and holds the JSON's size,
+    mtime and SHA-1, the image path and its size/mtime, the outputs written and
+    the class they were filed under. A source whose inputs are unchanged and
+    whose outputs still exist can be skipped on the next run. Outputs that no
+    source claims any more (removed or relabelled sources) are deleted by
+    `finish()`.
+    """
+
+    def __init__(self, output_dir, settings):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.settings = settings
+        self.sources = {}
+        self.extra = {}
+        self.stale_outputs = set()
+        self.seen = set()
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            old_sources = saved.get("sources", {})
+            if saved.get("version") == MANIFEST_VERSION and saved.get("settings") == settings:
+                self.sources = old_sources
+                self.extra = saved.get("extra", {})
+            else:
+                # Settings changed: every output gets rebuilt, old ones may be stale
+                for entry in old_sources.values():
+                    self.stale_outputs.update(entry.get("outputs", []))
+
+    @staticmethod
+    def key(json_path):
+        return os.path.abspath(json_path)
+
+    def is_up_to_date(self, json_path):
+        """Tell whether `json_path` can be skipped; marks it as seen either way."""
+        key = self.key(json_path)
+        self.seen.add(key)
+        entry = self.sources.get(key)
+        if entry is None:
+            return False
+
+        signature = file_signature(json_path)
+        if signature is None:
+            return False
+        if signature != entry["json"][:2]:
+            # Touched but maybe not edited (copies, restores): compare contents
+            digest = file_hash(json_path)
+            if digest != entry["json"][2]:
+                return False
+            entry["json"] = signature + [digest]
+
+        if entry.get("image") and file_signature(entry["image"]) != entry.get("image_sig"):
+            return False
+        return all(os.path.exists(path) for path in entry.get("outputs", []))
+
+    def record(self, result):
+        """Store the outcome of converting one source; errors are retried next run."""
+        key = self.key(result.json_path)
+        self.seen.add(key)
+        old = self.sources.pop(key, None)
+        if result.status == "error":
+            if old:
+                # Keep the old outputs but make sure the source is retried
+                old["json"] = [None, None, None]
+                self.sources[key] = old
+            return
+        new_outputs = [os.path.abspath(path) for path in result.outputs]
+        if old:
+            self.stale_outputs.update(set(old.get("outputs", [])) - set(new_outputs))
+
+        signature = file_signature(result.json_path)
+        if signature is None:
+            return
+        image_path = os.path.abspath(result.image_path) if result.image_path else None
+        self.sources[key] = {
+            "json": signature + [file_hash(result.json_path)],
+            "image": image_path,
+            "image_sig": file_signature(image_path) if image_path else None,
+            "outputs": new_outputs,
+            "class": result.label,
+            "status": result.status,
+        }
+
+    def finish(self):
+        """Forget sources that disappeared, delete unclaimed outputs and save."""
+        for key in list(self.sources):
+            if key not in self.seen:
+                self.stale_outputs.update(self.sources.pop(key).get("outputs", []))
+
+        claimed = set()
+        for entry in self.sources.values():
+            claimed.update(entry.get("outputs", []))
+        removed = 0
+        for path in self.stale_outputs - claimed:
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        self.stale_outputs = set()
+
+        self.save()
+        return removed
+
+    def save(self):
+        # A run that skipped every file has written nothing into the output folder yet
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "settings": self.settings,
+                "extra": self.extra,
+                "sources": self.sources,
+            }, f)
+        os.replace(tmp_path, self.path)
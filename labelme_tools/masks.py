@@ -0,0 +1,240 @@
+import json
+import math
+
+import numpy as np
+
+from labelme_tools.bbox import pack_points
+
+# How the masks of a frame are written:
+#   png - semantic PNG (pixel = class ID + 1, 0 = background), plus an instance PNG when asked for
+#   rle - COCO-style JSON: each object's visible pixels run-length encoded, with its class and box
+#   npz - the instance map as row-major runs plus each instance's class, in a compressed NumPy archive
+MASK_FORMATS = ("png", "rle", "npz")
+
+MASK_SUFFIXES = {"png": ".png", "rle": ".rle.json", "npz": ".npz"}
+
+# Semantic masks hold class ID + 1, so class 0 is not taken for background
+SEMANTIC_OFFSET = 1
+
+# === RASTERIZATION ===
+def _exclusive_cumsum(values):
+    out = np.zeros(len(values), dtype=np.intp)
+    np.cumsum(values[:-1], out=out[1:])
+    return out
+
+def _pixel_range(a, b, limit):
+    """Pixels whose centers lie in [min, max) of two coordinates, within 0..limit."""
+    lo, hi = min(a, b), max(a, b)
+    return min(max(math.ceil(lo - 0.5), 0), limit), min(max(math.ceil(hi - 0.5), 0), limit)
+
+def _polygon_spans(coords, counts, height, width):
+    """(first, last, polygon) of every scan-line span inside packed polygons, as flat offsets.
+
+    All edges of all polygons are cut with all rows in one vectorized pass,
+    at pixel centers and by the even-odd rule; spans come out in polygon order.
+    """
+    polygon_of = np.repeat(np.arange(len(counts)), counts)
+    starts = _exclusive_cumsum(counts)
+    # Edge i runs from point i to the next point of its polygon (the last one closes it)
+    following = np.arange(1, len(coords) + 1)
+    following[starts + counts - 1] = starts
+    x0, y0 = coords[:, 0], coords[:, 1]
+    x1, y1 = x0[following], y0[following]
+
+    # Rows whose center lies in [top, bottom) of the edge; horizontal edges cut none
+    row_lo = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, height).astype(np.intp)
+    row_hi = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, height).astype(np.intp)
+    n_rows = row_hi - row_lo
+    edge = np.repeat(np.arange(len(coords)), n_rows)
+    row = np.repeat(row_lo - _exclusive_cumsum(n_rows), n_rows) + np.arange(int(n_rows.sum()))
+    t = (row + 0.5 - y0[edge]) / (y1[edge] - y0[edge])
+    x = x0[edge] + t * (x1[edge] - x0[edge])
+    polygon = polygon_of[edge]
+
+    # Sorted per polygon and row, crossings pair up: inside from the 1st to the 2nd, 3rd to 4th, ...
+    order = np.lexsort((x, row, polygon))
+    x, row, polygon = x[order], row[order][0::2], polygon[order][0::2]
+    col_lo = np.clip(np.ceil(x[0::2] - 0.5), 0, width).astype(np.intp)
+    col_hi = np.clip(np.ceil(x[1::2] - 0.5), 0, width).astype(np.intp)
+    keep = col_hi > col_lo
+    return row[keep] * width + col_lo[keep], row[keep] * width + col_hi[keep], polygon[keep]
+
+def rasterize(size, point_lists, values=None, column_major=False):
+    """Paint the shapes of one frame into a (height, width) array, 0 = background.
+
+    A pixel takes the value of the last shape covering its center, so later
+    shapes cover earlier ones as they did with ImageDraw; `values` defaults to
+    the instance IDs 1..N. Two-point shapes are rectangles (as in
+    draw_shapes) and are painted as one block; the spans of all polygons are
+    found in one batched pass. With `column_major` the frame is scanned by
+    columns into a Fortran-ordered array, whose column-major runs (COCO RLE)
+    are then read without a transposed copy; the pixels only differ where a
+    center lies exactly on a slanted edge.
+    """
+    width, height = size
+    values = list(range(1, len(point_lists) + 1) if values is None else values)
+    top = max(values, default=0)
+    dtype = np.uint8 if top < 2 ** 8 else np.uint16 if top < 2 ** 16 else np.uint32
+    canvas = np.zeros((width, height) if column_major else (height, width), dtype=dtype)
+    rows, cols = canvas.shape
+    # (column, row) coordinate of a point on the canvas
+    axes = (1, 0) if column_major else (0, 1)
+
+    polygon_ids = [i for i, points in enumerate(point_lists) if len(points) > 2]
+    spans = {}
+    if polygon_ids:
+        coords, counts = pack_points([point_lists[i] for i in polygon_ids])
+        first, last, polygon = _polygon_spans(coords[:, axes], counts, rows, cols)
+        bounds = np.searchsorted(polygon, np.arange(len(polygon_ids) + 1)).tolist()
+        first, last = first.tolist(), last.tolist()
+        for k, i in enumerate(polygon_ids):
+            spans[i] = zip(first[bounds[k]:bounds[k + 1]], last[bounds[k]:bounds[k + 1]])
+
+    flat = canvas.reshape(-1)
+    for i, (points, value) in enumerate(zip(point_lists, values)):
+        if i in spans:
+            for a, b in spans[i]:
+                flat[a:b] = value
+        elif len(points) == 2:
+            c0, c1 = _pixel_range(points[0][axes[0]], points[1][axes[0]], cols)
+            r0, r1 = _pixel_range(points[0][axes[1]], points[1][axes[1]], rows)
+            canvas[r0:r1, c0:c1] = value
+    return canvas.T if column_major else canvas
+
+def semantic_values(class_ids):
+    """Pixel value of each class ID in a semantic mask."""
+    return [class_id + SEMANTIC_OFFSET for class_id in class_ids]
+
+def semantic_mask(instances, class_ids):
+    """Class ID + 1 per pixel, 0 for background (the values of the semantic PNG)."""
+    values = semantic_values(class_ids)
+    lut = np.array([0, *values], dtype=np.uint8 if max(values, default=0) < 256 else np.uint16)
+    return lut[instances]
+
+# === RUN-LENGTH ENCODING ===
+def _runs(flat):
+    """(starts, ends, values) of the runs of equal values in a 1-D array."""
+    change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [flat.size]))
+    return starts, ends, flat[starts]
+
+def rle_string(counts):
+    """COCO's compressed string form of RLE counts (pycocotools' rleToString, vectorized).
+
+    From the fourth count on, the difference to the count two before is
+    stored; each value is written as 5-bit groups, low bits first, in
+    characters from '0' with bit 0x20 meaning another group follows.
+    """
+    x = np.asarray(counts, dtype=np.int64)
+    x[3:] = x[3:] - np.asarray(counts, dtype=np.int64)[1:-2]
+    # 7 groups hold any count of a frame below 2^34 pixels
+    shifts = 5 * np.arange(7)
+    groups = (x[:, None] >> shifts) & 0x1f
+    rest = x[:, None] >> (shifts + 5)
+    more = np.where(groups & 0x10, rest != -1, rest != 0)
+    # Groups after the first without a follow-up are not written
+    written = np.concatenate((np.ones((len(x), 1), dtype=bool), np.cumprod(more, axis=1)[:, :-1] > 0), axis=1)
+    chars = (groups | np.where(more, 0x20, 0)) + 48
+    return chars[written].astype(np.uint8).tobytes().decode('ascii')
+
+def rle_counts(string):
+    """Inverse of rle_string."""
+    counts = []
+    p = 0
+    while p < len(string):
+        x = 0
+        k = 0
+        more = True
+        while more:
+            c = ord(string[p]) - 48
+            x |= (c & 0x1f) << 5 * k
+            more = c & 0x20
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << 5 * k
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+def rle_mask(rle):
+    """Decode one COCO RLE ({"size": [h, w], "counts": str}) into a boolean (h, w) array."""
+    height, width = rle["size"]
+    counts = rle_counts(rle["counts"]) if isinstance(rle["counts"], str) else rle["counts"]
+    values = np.arange(len(counts)) % 2 == 1
+    return np.repeat(values, counts).reshape(width, height).T
+
+def instance_rles(instances):
+    """{instance ID: (COCO RLE, area, [x, y, w, h])} for every instance with visible pixels.
+
+    COCO runs go down the columns; one pass over the whole map finds the runs
+    of every instance at once.
+    """
+    height, width = instances.shape
+    starts, ends, values = _runs(instances.ravel(order='F'))  # a view for rasterize(column_major=True)
+    keep = values != 0
+    starts, ends, values = starts[keep], ends[keep], values[keep]
+    order = np.argsort(values, kind='stable')
+    starts, ends, values = starts[order], ends[order], values[order]
+    group_starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))[:len(values)]
+    group_ends = np.concatenate((group_starts[1:], [len(values)]))
+
+    # A run over several columns covers rows 0..h-1 between them
+    one_column = starts // height == (ends - 1) // height
+    row_min = np.where(one_column, starts % height, 0)
+    row_max = np.where(one_column, (ends - 1) % height, height - 1)
+    rles = {}
+    for lo, hi in zip(group_starts.tolist(), group_ends.tolist()):
+        s, e = starts[lo:hi], ends[lo:hi]
+        counts = np.empty(2 * len(s) + 1, dtype=np.int64)
+        counts[0:-1:2] = s - np.concatenate(([0], e[:-1]))
+        counts[1::2] = e - s
+        counts[-1] = instances.size - e[-1]
+        x_min, x_max = int(s[0]) // height, (int(e[-1]) - 1) // height
+        y_min, y_max = int(row_min[lo:hi].min()), int(row_max[lo:hi].max())
+        rles[int(values[lo])] = ({"size": [height, width], "counts": rle_string(counts.tolist())},
+                                 int((e - s).sum()), [x_min, y_min, x_max - x_min + 1, y_max - y_min + 1])
+    return rles
+
+# === WRITERS ===
+def save_png(mask, path):
+    """Write a uint8 mask as an 8-bit PNG and anything wider as 16-bit."""
+    from PIL import Image
+    if mask.dtype != np.uint8:
+        mask = mask.astype(np.uint16)
+    Image.fromarray(mask).save(path)
+
+def save_rle(path, instances, class_ids, labels, image_file_name=""):
+    """COCO-style annotations of one image; objects hidden by later shapes are left out.
+
+    Returns the indexes (into class_ids) of the hidden objects.
+    """
+    height, width = instances.shape
+    rles = instance_rles(instances)
+    annotations = []
+    for instance_id, (class_id, label) in enumerate(zip(class_ids, labels), 1):
+        if instance_id in rles:
+            rle, area, bbox = rles[instance_id]
+            annotations.append({"id": instance_id, "category_id": class_id, "label": label,
+                                "segmentation": rle, "area": area, "bbox": bbox, "iscrowd": 0})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"file_name": image_file_name, "height": height, "width": width,
+                   "annotations": annotations}, f)
+    return [index for index in range(len(class_ids)) if index + 1 not in rles]
+
+def save_npz(path, instances, class_ids):
+    """Row-major runs of the instance map; read back with load_npz."""
+    starts, ends, values = _runs(instances.reshape(-1))
+    np.savez_compressed(path, size=np.array(instances.shape, dtype=np.uint32), values=values,
+                        lengths=(ends - starts).astype(np.uint32),
+                        class_ids=np.array(class_ids, dtype=np.uint16))
+
+def load_npz(path):
+    """(semantic, instances) arrays of a mask written by save_npz."""
+    with np.load(path) as data:
+        height, width = data["size"].tolist()
+        instances = np.repeat(data["values"], data["lengths"]).reshape(height, width)
+        class_ids = data["class_ids"].tolist()
+    return semantic_mask(instances, class_ids), instances
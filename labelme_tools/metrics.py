@@ -0,0 +1,301 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from functools import partial
+
+from labelme_tools.pipeline import Stages
+
+# How the converters report each file:
+#   files    - one status line per file (the scripts' old output)
+#   progress - problems only, plus a progress line every few seconds
+#   quiet    - nothing until the summary
+LOG_MODES = ("files", "progress", "quiet")
+
+# Upper bounds of the per-file latency histogram, in seconds
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, float("inf"))
+
+# === PER-FILE TALLY ===
+# Steps inside the stage functions (parse, decode, draw, ...) report to the
+# tally of the file the current thread is working on, if any; outside a
+# measured call timed() and count_bytes() cost one attribute lookup.
+_local = threading.local()
+
+class Tally:
+    """Seconds per step, total seconds and bytes read/written for one file."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.total = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def add(self, other, share=1.0):
+        for step, seconds in other.seconds.items():
+            self.seconds[step] = self.seconds.get(step, 0.0) + seconds * share
+        self.total += other.total * share
+        self.bytes_read += round(other.bytes_read * share)
+        self.bytes_written += round(other.bytes_written * share)
+
+@contextmanager
+def timed(step):
+    """Add the time spent in the block to `step` of the current file's tally."""
+    tally = getattr(_local, "tally", None)
+    if tally is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tally.seconds[step] = tally.seconds.get(step, 0.0) + time.perf_counter() - start
+
+def count_bytes(read=0, written=0):
+    tally = getattr(_local, "tally", None)
+    if tally is not None:
+        tally.bytes_read += read
+        tally.bytes_written += written
+
+def tallying():
+    """Tell whether the current thread is measuring a file (to skip stat calls otherwise)."""
+    return getattr(_local, "tally", None) is not None
+
+def _run_measured(func, *args):
+    previous = getattr(_local, "tally", None)
+    tally = _local.tally = Tally()
+    start = time.perf_counter()
+    try:
+        value = func(*args)
+    finally:
+        tally.total += time.perf_counter() - start
+        _local.tally = previous
+    return tally, value
+
+def measure(func, *args):
+    """Call `func` and attach the tally of the call to the FileResult it returns."""
+    tally, result = _run_measured(func, *args)
+    return result._replace(tally=tally)
+
+# === MEASURED PIPELINE STAGES ===
+Measured = namedtuple("Measured", "value tally")
+
+def _measured_load(load, item):
+    tally, loaded = _run_measured(load, item)
+    return Measured(loaded, tally)
+
+def _measured_compute(compute, measured_list):
+    tally, jobs = _run_measured(compute, [m.value for m in measured_list])
+    # A batch is computed in one go; each file is charged an equal share
+    share = 1.0 / max(1, len(measured_list))
+    for m in measured_list:
+        m.tally.add(tally, share)
+    return [Measured(job, m.tally) for job, m in zip(jobs, measured_list)]
+
+def _measured_store(store, measured):
+    tally, result = _run_measured(store, measured.value)
+    measured.tally.add(tally)
+    return result._replace(tally=measured.tally)
+
+def measured_stages(stages):
+    """Wrap pipeline `stages` so every FileResult carries the Tally of its file."""
+    return Stages(partial(_measured_load, stages.load), partial(_measured_compute, stages.compute),
+                  partial(_measured_store, stages.store), stages.batch_size)
+
+# === RUN METRICS ===
+def _format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+def _format_bound(seconds):
+    return "∞" if seconds == float("inf") else f"{seconds * 1000:g} ms"
+
+class ConversionMetrics:
+    """Timers, latency histogram, byte and outcome counters of one conversion run.
+
+    Per-file numbers come from the Tally attached to each FileResult, so they
+    add up across threads and worker processes; steps run by the calling thread
+    (discovery, manifest checks) are timed with `timing()`.
+    """
+
+    def __init__(self, converter):
+        self.converter = converter
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self.seconds = Counter()
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.measured = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.outcomes = Counter()
+
+    @contextmanager
+    def timing(self, step):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[step] += time.perf_counter() - start
+
+    def timed_iter(self, iterable, step):
+        """Pass `iterable` through, timing how long each item takes to produce."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.seconds[step] += time.perf_counter() - start
+                return
+            self.seconds[step] += time.perf_counter() - start
+            yield item
+
+    def add_bytes(self, read=0, written=0):
+        self.bytes_read += read
+        self.bytes_written += written
+
+    def count(self, status, reason=None, n=1):
+        if n:
+            self.outcomes[status, reason or ""] += n
+
+    def record(self, result):
+        self.count(result.status, result.reason)
+        tally = result.tally
+        if tally is None:
+            return
+        self.seconds.update(tally.seconds)
+        self.buckets[bisect_left(LATENCY_BUCKETS, tally.total)] += 1
+        self.latency_sum += tally.total
+        self.latency_max = max(self.latency_max, tally.total)
+        self.measured += 1
+        self.bytes_read += tally.bytes_read
+        self.bytes_written += tally.bytes_written
+
+    def finish(self):
+        self.wall = time.perf_counter() - self.started
+
+    def percentile(self, q):
+        """Upper bound of the histogram bucket holding the q-th percentile latency."""
+        if not self.measured:
+            return None
+        rank = q / 100 * self.measured
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return LATENCY_BUCKETS[-1]
+
+    # === OUTPUT ===
+    def print_summary(self):
+        files = sum(self.outcomes.values())
+        print(f"\n⏱️ {self.converter}: {files} file(s) in {self.wall:.2f} s"
+              + (f" ({files / self.wall:.1f} files/s)" if self.wall > 0 else ""))
+        if self.seconds:
+            print(f"   {'step':<12}{'seconds':>10}{'ms/file':>10}")
+            for step, seconds in self.seconds.most_common():
+                per_file = seconds / self.measured * 1000 if self.measured else 0.0
+                print(f"   {step:<12}{seconds:>10.2f}{per_file:>10.2f}")
+        if self.measured:
+            p50, p95, p99 = (_format_bound(self.percentile(q)) for q in (50, 95, 99))
+            print(f"📈 Per-file latency: p50 ≤ {p50}, p95 ≤ {p95}, p99 ≤ {p99}, "
+                  f"max {self.latency_max * 1000:.1f} ms")
+            print(f"💾 Read {_format_bytes(self.bytes_read)}, wrote {_format_bytes(self.bytes_written)}")
+        outcomes = ", ".join(f"{status}{'/' + reason if reason else ''} {n}"
+                             for (status, reason), n in sorted(self.outcomes.items()))
+        print(f"📋 Outcomes: {outcomes or 'none'}")
+
+    def to_dict(self):
+        return {
+            "converter": self.converter,
+            "wall_seconds": round(self.wall, 4),
+            "step_seconds": {step: round(seconds, 4) for step, seconds in self.seconds.items()},
+            "latency": {
+                "buckets": {_format_bound(bound): n for bound, n in zip(LATENCY_BUCKETS, self.buckets)},
+                "count": self.measured,
+                "sum_seconds": round(self.latency_sum, 4),
+                "max_seconds": round(self.latency_max, 4),
+            },
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "outcomes": [{"status": status, "reason": reason or None, "count": n}
+                         for (status, reason), n in sorted(self.outcomes.items())],
+        }
+
+    def to_prometheus(self):
+        """The metrics in the Prometheus text exposition format (e.g. for the node exporter's textfile collector)."""
+        c = f'converter="{self.converter}"'
+        lines = [
+            "# TYPE labelme_conversion_wall_seconds gauge",
+            f"labelme_conversion_wall_seconds{{{c}}} {self.wall:.6f}",
+            "# TYPE labelme_conversion_step_seconds_total counter",
+        ]
+        lines += [f'labelme_conversion_step_seconds_total{{{c},step="{step}"}} {seconds:.6f}'
+                  for step, seconds in sorted(self.seconds.items())]
+        lines.append("# TYPE labelme_conversion_file_seconds histogram")
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'labelme_conversion_file_seconds_bucket{{{c},le="{le}"}} {cumulative}')
+        lines += [
+            f"labelme_conversion_file_seconds_sum{{{c}}} {self.latency_sum:.6f}",
+            f"labelme_conversion_file_seconds_count{{{c}}} {self.measured}",
+            "# TYPE labelme_conversion_bytes_total counter",
+            f'labelme_conversion_bytes_total{{{c},direction="read"}} {self.bytes_read}',
+            f'labelme_conversion_bytes_total{{{c},direction="written"}} {self.bytes_written}',
+            "# TYPE labelme_conversion_files_total counter",
+        ]
+        lines += [f'labelme_conversion_files_total{{{c},status="{status}",reason="{reason}"}} {n}'
+                  for (status, reason), n in sorted(self.outcomes.items())]
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        """Write the metrics to `path`: Prometheus text for .prom files, JSON otherwise."""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+        print(f"📂 Metrics saved in: {path}")
+
+# === PER-FILE LOG ===
+class ResultLog:
+    """Decides which per-file status lines get printed; see LOG_MODES.
+
+    Printing millions of lines to a Windows console costs more than some of the
+    conversions, so "progress" only prints problems and a count every
+    `interval` seconds.
+    """
+
+    def __init__(self, mode="files", interval=5.0):
+        if mode not in LOG_MODES:
+            raise ValueError(f"Unknown log mode: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.done = 0
+        self.started = self.last = time.monotonic()
+
+    def show(self, result):
+        """Count `result` and tell whether its status line(s) should be printed."""
+        self.done += 1
+        if self.mode == "files":
+            return True
+        if self.mode == "quiet":
+            return False
+        now = time.monotonic()
+        if now - self.last >= self.interval:
+            self.last = now
+            print(f"⏳ {self.done} file(s) done ({self.done / (now - self.started):.1f} files/s)")
+        return result.status != "converted" or bool(result.notes)
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--log", choices=LOG_MODES, default="files",
+                        help="per-file output: every file, problems plus periodic progress, or none")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="also write timings and counters to FILE (Prometheus text if it ends in .prom, else JSON)")
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.metrics import count_bytes
+from labelme_tools.parsing import load_labelme, normalized_image_path, parse_labelme
+
+# === JSON LOADING ===
+def load_labelme_json(json_path, image_data="skip"):
+    """Read a LabelMe JSON, by default without its imageData blob; drive prefixes are dropped from imagePath."""
+    return load_labelme(json_path, image_data)
+
+# === ATOMIC WRITE ===
+def write_json_atomic(json_path, data):
+    """Write `data` to a temp file next to `json_path`, then rename it into place."""
+    folder = os.path.dirname(json_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.', suffix='.json.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+        if os.path.exists(json_path):
+            shutil.copymode(json_path, tmp_path)  # mkstemp creates the file owner-only
+        os.replace(tmp_path, json_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+# === NORMALIZATION STAGE ===
+def normalize_json(json_path, image_data="skip"):
+    """Reduce imagePath to a bare file name, rewriting the JSON only if that changes it.
+
+    Returns (data, changed) where `data` is the normalized content, with imageData
+    handled as `image_data` (see parsing.IMAGE_DATA_MODES).
+    """
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    count_bytes(read=len(raw))
+    # Only imagePath is checked, so the imageData blob is not parsed for that
+    data = parse_labelme(raw, image_data)
+    image_path = normalized_image_path(data)
+
+    changed = data.get('imagePath') != image_path
+    if changed:
+        # The rewrite keeps every other field, imageData included, as it was
+        original = parse_labelme(raw, "keep")
+        original['imagePath'] = image_path
+        write_json_atomic(json_path, original)
+    data['imagePath'] = image_path
+    return data, changed
+
+def normalize_tree(input_root):
+    """Normalize every JSON under `input_root`; returns (checked, modified)."""
+    checked = 0
+    modified = 0
+    for json_path in iter_json_files(input_root):
+        try:
+            _, changed = normalize_json(json_path)
+        except Exception as e:
+            print(f"❌ Error processing {json_path}: {e}")
+            continue
+        checked += 1
+        modified += changed
+    return checked, modified
+
+
+if __name__ == "__main__":
+    for root in sys.argv[1:]:
+        checked, modified = normalize_tree(root)
+        print(f"✅ Cleaned and fixed {modified} of {checked} JSON file(s) in: {root}")
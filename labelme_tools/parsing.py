@@ -0,0 +1,126 @@
+import os
+import base64
+import codecs
+import json
+
+# orjson is optional, several times faster than json on large files. It is
+# imported on the first parse: the import alone takes longer than starting
+# the CLI, which never parses anything for --help or the label command.
+orjson = None
+_orjson_checked = False
+
+from labelme_tools.metrics import count_bytes
+
+# Drive prefixes left in imagePath by the annotation machines
+DRIVE_PREFIXES = ('T:/', 'T:\\', 'V:/', 'V:\\')
+
+# How load_labelme treats the base64 imageData blob:
+#   skip - cut it out of the bytes before parsing; data['imageData'] is None
+#   lazy - cut it out too, but keep it as an EmbeddedImage decoded on request
+#   keep - parse it like any other field (needed to write the JSON back)
+IMAGE_DATA_MODES = ("skip", "lazy", "keep")
+
+_IMAGE_DATA_KEY = b'"imageData"'
+_JSON_WHITESPACE = b' \t\r\n'
+
+# === BACKEND ===
+def loads(raw):
+    """Parse JSON bytes with orjson when installed, else the standard library."""
+    global orjson, _orjson_checked
+    if not _orjson_checked:
+        _orjson_checked = True
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+# === IMAGE DATA ===
+class EmbeddedImage:
+    """The base64 imageData of a LabelMe JSON, decoded only when asked for."""
+
+    def __init__(self, b64):
+        self.b64 = b64
+
+    def __len__(self):
+        return len(self.b64)
+
+    def decode(self):
+        """Return the image file bytes."""
+        return base64.b64decode(self.b64)
+
+def _find_image_data(raw):
+    """Return (start, end) of the imageData string value in `raw`, or None.
+
+    Base64 never contains a quote or a backslash, so the value ends at the
+    next quote; nothing in between is scanned by the JSON parser.
+    """
+    key = raw.find(_IMAGE_DATA_KEY)
+    if key < 0:
+        return None
+    pos = key + len(_IMAGE_DATA_KEY)
+    while pos < len(raw) and raw[pos] in _JSON_WHITESPACE:
+        pos += 1
+    if raw[pos:pos + 1] != b':':
+        return None
+    pos += 1
+    while pos < len(raw) and raw[pos] in _JSON_WHITESPACE:
+        pos += 1
+    if raw[pos:pos + 1] != b'"':
+        return None  # null
+    end = raw.find(b'"', pos + 1)
+    if end < 0:
+        return None
+    return pos, end + 1
+
+def parse_labelme(raw, image_data="skip"):
+    """Parse LabelMe JSON bytes; see IMAGE_DATA_MODES for `image_data`."""
+    if image_data not in IMAGE_DATA_MODES:
+        raise ValueError(f"Unknown imageData mode: {image_data}")
+    if raw.startswith(codecs.BOM_UTF8):
+        raw = raw[len(codecs.BOM_UTF8):]
+    if image_data == "keep":
+        return loads(raw)
+
+    span = _find_image_data(raw)
+    if span is None:
+        return loads(raw)
+    start, end = span
+    data = loads(b''.join((raw[:start], b'null', raw[end:])))
+    if image_data == "lazy":
+        # A view, so the blob is not copied until it is decoded
+        data['imageData'] = EmbeddedImage(memoryview(raw)[start + 1:end - 1])
+    return data
+
+# === PRE-LABEL DRAFTS ===
+# Top-level key of the JSONs the prelabel command drafts. LabelMe keeps unknown
+# keys when it saves, so the launchers drop it as they file a reviewed save;
+# until then the converters and the validator leave the file out.
+DRAFT_KEY = "prelabelDraft"
+
+def is_draft(data):
+    """True for a pre-label draft no annotator has saved yet."""
+    return DRAFT_KEY in data
+
+# === IMAGE PATH ===
+def strip_drive_prefixes(value):
+    for prefix in DRIVE_PREFIXES:
+        value = value.replace(prefix, '')
+    return value
+
+def normalized_image_path(data):
+    """imagePath without drive prefixes and folders, as the converters look it up."""
+    return os.path.basename(strip_drive_prefixes(data.get('imagePath') or ''))
+
+# === FILE LOADING ===
+def load_labelme(json_path, image_data="skip"):
+    """Read a LabelMe JSON in binary and drop the drive prefixes from imagePath only."""
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    count_bytes(read=len(raw))
+    data = parse_labelme(raw, image_data)
+    if isinstance(data.get('imagePath'), str):
+        data['imagePath'] = strip_drive_prefixes(data['imagePath'])
+    return data
@@ -0,0 +1,58 @@
+from collections import deque, namedtuple
+
+# The three steps of converting one source:
+#   load(item) -> loaded         reads the JSON and image bytes (reader threads)
+#   compute(loaded list) -> jobs parses, decodes and draws, `batch_size` items at a time
+#   store(job) -> result         encodes and writes the outputs (writer threads)
+# Each step passes a FileResult through untouched, so a skipped or failed file
+# reaches the end of the pipeline in its place.
+Stages = namedtuple("Stages", "load compute store batch_size", defaults=(1,))
+
+def run_serial(items, stages):
+    """Run the stages one item (or batch) after another, without threads."""
+    items = list(items)
+    results = []
+    for start in range(0, len(items), stages.batch_size):
+        loaded = [stages.load(item) for item in items[start:start + stages.batch_size]]
+        results.extend(stages.store(job) for job in stages.compute(loaded))
+    return results
+
+def iter_pipeline(items, stages, readers=4, writers=2):
+    """Yield the results of `stages` over `items` in input order, with reads and writes overlapped.
+
+    Reads run on `readers` threads and writes on `writers` threads while this
+    thread computes. Both queues are bounded: at most `batch_size + 2 * readers`
+    loads and `2 * writers` stores are pending, which caps memory on large frames.
+    """
+    from concurrent.futures import ThreadPoolExecutor  # imported on first use to keep startup short
+
+    read_ahead = stages.batch_size + 2 * readers
+    with ThreadPoolExecutor(max_workers=readers) as read_pool, \
+            ThreadPoolExecutor(max_workers=writers) as write_pool:
+        loading = deque()
+        storing = deque()
+
+        def compute_next():
+            count = min(stages.batch_size, len(loading))
+            loaded = [loading.popleft().result() for _ in range(count)]
+            for job in stages.compute(loaded):
+                storing.append(write_pool.submit(stages.store, job))
+
+        for item in items:
+            loading.append(read_pool.submit(stages.load, item))
+            if len(loading) >= read_ahead:
+                compute_next()
+                while len(storing) > 2 * writers:
+                    yield storing.popleft().result()
+        while loading:
+            compute_next()
+            while len(storing) > 2 * writers:
+                yield storing.popleft().result()
+        while storing:
+            yield storing.popleft().result()
+
+def pipeline_chunk(items, stages, io_threads=4):
+    """Run a chunk through the stages; runs inside a worker process in parallel mode."""
+    if io_threads < 1:
+        return run_serial(items, stages)
+    return list(iter_pipeline(items, stages, io_threads, max(1, io_threads // 2)))
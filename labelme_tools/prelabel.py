@@ -0,0 +1,371 @@
+import os
+import ast
+import sys
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+
+from labelme_tools.classes import yolo_class_name
+from labelme_tools.discovery import iter_image_files
+from labelme_tools.engine import FileResult
+from labelme_tools.labeling import draft_path_for, remaining_queue
+from labelme_tools.metrics import ConversionMetrics, ResultLog, add_metrics_arguments, count_bytes
+from labelme_tools.metrics import measured_stages, timed
+from labelme_tools.normalize import write_json_atomic
+from labelme_tools.parsing import DRAFT_KEY
+from labelme_tools.pipeline import Stages, iter_pipeline
+
+# A detector drafts the boxes of every image in the labeling queue, so the
+# annotators only correct them. Drafts are LabelMe JSONs next to the images,
+# where LabelMe opens them; the launchers only file a draft once it has been
+# saved again from LabelMe. Drafts carry parsing.DRAFT_KEY until then.
+#
+# Models are run on the CPU through one of:
+#   onnx        - an ONNX export (yolo export format=onnx) on onnxruntime; used for .onnx files
+#   ultralytics - any model the ultralytics package loads (.pt); needs torch
+BACKENDS = ("onnx", "ultralytics")
+
+# Written into the drafts; the LabelMe release the README pins
+LABELME_VERSION = "5.2.1"
+
+DEFAULT_IMAGE_SIZE = 640
+DEFAULT_CONFIDENCE = 0.25
+DEFAULT_IOU = 0.45
+DEFAULT_BATCH_SIZE = 8
+
+# Padding colour of the letterbox, as in ultralytics
+LETTERBOX_FILL = 114
+
+def backend_for(model_path):
+    return "onnx" if model_path.lower().endswith(".onnx") else "ultralytics"
+
+# === DETECTORS ===
+# detect(batch) takes uint8 (N, size, size, 3) letterboxed RGB images and
+# returns (boxes as x1 y1 x2 y2 in batch pixels, scores, class IDs) per image.
+def non_max_suppression(boxes, scores, iou):
+    """Indexes of the boxes kept by greedy NMS, best score first."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        overlap = w * h / (areas[i] + areas[rest] - w * h + 1e-9)
+        order = rest[overlap <= iou]
+    return np.array(keep, dtype=np.intp)
+
+def decode_yolo_output(output, confidence, iou, max_detections=300):
+    """Detections of one image from a YOLOv8-style head output of shape (4 + classes, anchors)."""
+    predictions = output.T
+    class_ids = predictions[:, 4:].argmax(axis=1)
+    scores = predictions[np.arange(len(predictions)), 4 + class_ids]
+    keep = scores >= confidence
+    predictions, class_ids, scores = predictions[keep], class_ids[keep], scores[keep]
+    cx, cy, w, h = predictions[:, :4].T
+    boxes = np.column_stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2))
+    # Offsetting each class keeps NMS from merging boxes of different classes
+    keep = non_max_suppression(boxes + class_ids[:, None] * 4096.0, scores, iou)[:max_detections]
+    return boxes[keep], scores[keep], class_ids[keep]
+
+class OnnxDetector:
+    """A YOLO ONNX export on onnxruntime's CPU provider, `threads` intra-op threads (0 = all cores)."""
+
+    def __init__(self, model_path, confidence=DEFAULT_CONFIDENCE, iou=DEFAULT_IOU, threads=0):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("❌ .onnx models need onnxruntime: pip install onnxruntime") from None
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Exports without dynamic=True have a fixed batch and image size
+        batch, _, height, _ = model_input.shape
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        self.image_size = height if isinstance(height, int) else None
+        names = self.session.get_modelmeta().custom_metadata_map.get("names")
+        self.names = ast.literal_eval(names) if names else None
+        self.confidence = confidence
+        self.iou = iou
+
+    def detect(self, batch):
+        pixels = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        step = self.fixed_batch or len(pixels)
+        outputs = []
+        for start in range(0, len(pixels), step):
+            part = pixels[start:start + step]
+            if self.fixed_batch and len(part) < step:
+                part = np.concatenate((part, np.zeros((step - len(part),) + part.shape[1:], np.float32)))
+            outputs.extend(self.session.run(None, {self.input_name: part})[0][:len(pixels) - start])
+        return [decode_yolo_output(output, self.confidence, self.iou) for output in outputs]
+
+class UltralyticsDetector:
+    """A model loaded by ultralytics, run with torch on the CPU with `threads` threads (0 = torch's default)."""
+
+    def __init__(self, model_path, confidence=DEFAULT_CONFIDENCE, iou=DEFAULT_IOU, threads=0):
+        try:
+            import torch
+            from ultralytics import YOLO
+        except ImportError:
+            raise ImportError("❌ .pt models need ultralytics (pip install ultralytics), "
+                              "or export them to ONNX and use onnxruntime") from None
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+        self.image_size = None
+        self.confidence = confidence
+        self.iou = iou
+
+    def detect(self, batch):
+        # Already letterboxed: a BCHW float tensor skips ultralytics' own preprocessing
+        pixels = self.torch.from_numpy(batch).permute(0, 3, 1, 2).float().div(255.0)
+        results = self.model.predict(pixels, conf=self.confidence, iou=self.iou, device="cpu", verbose=False)
+        return [(r.boxes.xyxy.numpy(), r.boxes.conf.numpy(), r.boxes.cls.numpy().astype(np.intp)) for r in results]
+
+def load_detector(model_path, backend=None, **options):
+    backend = backend or backend_for(model_path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    return (OnnxDetector if backend == "onnx" else UltralyticsDetector)(model_path, **options)
+
+# === CLASSES ===
+def class_labels_for(model_names, labels, mapping=None):
+    """{model class ID: task label} for the classes that are drafted.
+
+    With `mapping` ({model class name: task label}, e.g. {"car": "Vehicle"})
+    only the mapped classes are kept. Otherwise a model class named like a task
+    label keeps that label (a model trained on this repo's YOLO export), and a
+    model without class names is taken to use the task's label order.
+    """
+    if model_names is None:
+        return dict(enumerate(labels)) if mapping is None else {}
+    model_names = dict(enumerate(model_names)) if isinstance(model_names, (list, tuple)) else model_names
+    if mapping is not None:
+        return {class_id: mapping[name] for class_id, name in model_names.items() if name in mapping}
+    by_name = {yolo_class_name(label): label for label in labels}
+    return {class_id: by_name[yolo_class_name(name)] for class_id, name in model_names.items()
+            if yolo_class_name(name) in by_name}
+
+# === STAGES ===
+Letterboxed = namedtuple("Letterboxed", "image_path size pixels scale pad")
+
+def load_letterboxed(image_path, image_size):
+    """Reader stage: decode an image and fit it into an `image_size` square, as the model expects.
+
+    JPEGs bigger than the square are decoded at 1/2, 1/4 or 1/8 scale through
+    draft mode when that still covers the square; the rest is a resize.
+    """
+    draft_path = draft_path_for(image_path)
+    try:
+        from PIL import Image
+        with timed("decode"):
+            image = Image.open(image_path)
+            full_w, full_h = image.size
+            ratio = image_size / max(full_w, full_h)
+            new_w, new_h = max(1, round(full_w * ratio)), max(1, round(full_h * ratio))
+            if ratio < 1:
+                # No-op for formats without draft support
+                image.draft("RGB", (new_w, new_h))
+            # convert() would copy an image that is RGB already
+            if image.mode == "RGB":
+                image.load()
+            else:
+                image = image.convert("RGB")
+        with timed("letterbox"):
+            if image.size != (new_w, new_h):
+                image = image.resize((new_w, new_h), Image.BILINEAR)
+            left, top = (image_size - new_w) // 2, (image_size - new_h) // 2
+            pixels = np.full((image_size, image_size, 3), LETTERBOX_FILL, dtype=np.uint8)
+            pixels[top:top + new_h, left:left + new_w] = np.asarray(image)
+        count_bytes(read=os.path.getsize(image_path))
+        return Letterboxed(image_path, (full_w, full_h), pixels, (new_w / full_w, new_h / full_h), (left, top))
+    except Exception as e:
+        return FileResult("error", draft_path, "exception", str(e), False, image_path)
+
+def draft_shapes(item, boxes, scores, class_ids, class_labels):
+    """LabelMe rectangles of the detections kept by `class_labels`, in original image pixels."""
+    (sx, sy), (left, top) = item.scale, item.pad
+    width, height = item.size
+    boxes = (boxes - [left, top, left, top]) / [sx, sy, sx, sy]
+    boxes = np.clip(boxes, 0, [width, height, width, height])
+    shapes = []
+    for (x1, y1, x2, y2), score, class_id in zip(boxes.tolist(), scores.tolist(), class_ids.tolist()):
+        label = class_labels.get(class_id)
+        if label is None or x2 <= x1 or y2 <= y1:
+            continue
+        shapes.append({
+            "label": label,
+            "points": [[round(x1, 1), round(y1, 1)], [round(x2, 1), round(y2, 1)]],
+            "group_id": None,
+            # Lets the annotator see how sure the model was
+            "description": f"prelabel {score:.2f}",
+            "shape_type": "rectangle",
+            "flags": {},
+        })
+    return shapes
+
+def detect_batch(items, detector, class_labels):
+    """Compute stage: run the detector once on the batch of letterboxed images."""
+    loaded = [item for item in items if isinstance(item, Letterboxed)]
+    if not loaded:
+        return items
+    with timed("infer"):
+        detections = iter(detector.detect(np.stack([item.pixels for item in loaded])))
+    with timed("postprocess"):
+        return [(item, draft_shapes(item, *next(detections), class_labels))
+                if isinstance(item, Letterboxed) else item for item in items]
+
+def write_draft(job, model_name=None):
+    """Writer stage: save the detections as a LabelMe JSON next to the image, marked as a draft."""
+    if isinstance(job, FileResult):
+        return job
+    item, shapes = job
+    draft_path = draft_path_for(item.image_path)
+    if not shapes:
+        return FileResult("skipped", draft_path, "no-detections", item.image_path, False, item.image_path)
+    width, height = item.size
+    data = {
+        "version": LABELME_VERSION,
+        "flags": {},
+        "shapes": shapes,
+        "imagePath": os.path.basename(item.image_path),
+        "imageData": None,
+        "imageHeight": height,
+        "imageWidth": width,
+        DRAFT_KEY: {"model": model_name},
+    }
+    try:
+        with timed("write"):
+            write_json_atomic(draft_path, data)
+        count_bytes(written=os.path.getsize(draft_path))
+    except OSError as e:
+        return FileResult("error", draft_path, "exception", str(e), False, item.image_path)
+    return FileResult("converted", draft_path, None, f"{len(shapes)} box(es)", False, item.image_path, (draft_path,))
+
+def print_draft_result(result):
+    if result.status == "converted":
+        print(f"✅ Drafted {result.detail}: {result.json_path}")
+    elif result.reason == "no-detections":
+        print(f"➖ Nothing detected: {result.image_path}")
+    elif result.status == "error":
+        print(f"❌ Error processing {result.image_path}: {result.detail}")
+
+# === PRE-LABELING ===
+def iter_undrafted(images, counts, overwrite=False):
+    """Yield the images without a JSON next to them (all of them with `overwrite`), counting both."""
+    for image_path in images:
+        counts["found"] += 1
+        if not overwrite and os.path.exists(draft_path_for(image_path)):
+            counts["drafted"] += 1
+            continue
+        yield image_path
+
+def prelabel_images(images, model_path, labels, class_mapping=None, backend=None, batch_size=DEFAULT_BATCH_SIZE,
+                    image_size=None, confidence=DEFAULT_CONFIDENCE, iou=DEFAULT_IOU, threads=0, readers=4,
+                    overwrite=False, log="files", metrics_path=None):
+    """Draft LabelMe JSONs with `model_path`'s detections for each image and print the totals.
+
+    Images are decoded and letterboxed on `readers` threads while the model
+    runs on `batch_size` images at a time, and the drafts are written on two
+    more threads. Only classes that map onto `labels` are drafted (see
+    class_labels_for); images that already have a JSON next to them are left
+    alone unless `overwrite`. `log` and `metrics_path` work as in
+    engine.convert_annotated.
+    """
+    print(f"🤖 Loading model: {model_path}")
+    detector = load_detector(model_path, backend, confidence=confidence, iou=iou, threads=threads)
+    unknown = sorted(set((class_mapping or {}).values()) - set(labels))
+    if unknown:
+        raise ValueError(f"Class mapping targets labels the task does not have: {', '.join(unknown)}")
+    class_labels = class_labels_for(detector.names, labels, class_mapping)
+    if not class_labels:
+        raise ValueError(f"None of the model's classes map onto the labels {labels}; use a class mapping")
+    print(f"🏷️ Drafting: {', '.join(sorted(set(class_labels.values())))}")
+    # A model exported with a fixed input size only takes that size
+    image_size = detector.image_size or image_size or DEFAULT_IMAGE_SIZE
+
+    stages = measured_stages(Stages(partial(load_letterboxed, image_size=image_size),
+                                    partial(detect_batch, detector=detector, class_labels=class_labels),
+                                    partial(write_draft, model_name=os.path.basename(model_path)), batch_size))
+    metrics = ConversionMetrics("prelabel")
+    results_log = ResultLog(log)
+    counts = {"found": 0, "drafted": 0}
+    drafted = 0
+    for result in iter_pipeline(iter_undrafted(images, counts, overwrite), stages, readers, 2):
+        metrics.record(result)
+        drafted += result.status == "converted"
+        if results_log.show(result):
+            print_draft_result(result)
+    metrics.count("skipped", "draft-exists", counts["drafted"])
+    metrics.finish()
+
+    if counts["drafted"]:
+        print(f"\n⏩ Skipped {counts['drafted']} of {counts['found']} image(s) that already have a draft.")
+    print(f"\n✅ Drafted {drafted} image(s); open them in LabelMe to correct the boxes.")
+    metrics.print_summary()
+    if metrics_path:
+        metrics.save(metrics_path)
+    return drafted
+
+def prelabel_folder(image_folder, model_path, labels, **options):
+    """Pre-label every image under `image_folder` that has no annotation in its -json folder yet."""
+    _, remaining = remaining_queue(iter_image_files(image_folder))
+    return prelabel_images(remaining, model_path, labels, **options)
+
+def parse_class_mapping(pairs):
+    """{model class: task label} from MODEL_CLASS=LABEL pairs, None if there are none."""
+    return dict(pair.split("=", 1) for pair in pairs) if pairs else None
+
+def add_prelabel_arguments(parser):
+    parser.add_argument("--model", required=True,
+                        help="detector to draft with: .onnx (onnxruntime) or anything ultralytics loads (.pt)")
+    parser.add_argument("--class-map", action="append", default=[], metavar="MODEL_CLASS=LABEL",
+                        help="draft MODEL_CLASS boxes as LABEL, e.g. car=Vehicle (repeatable); "
+                             "default: model classes named like a task label")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"images per model call (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMAGE_SIZE,
+                        help=f"model input size, unless the model fixes it (default: {DEFAULT_IMAGE_SIZE})")
+    parser.add_argument("--conf", type=float, default=DEFAULT_CONFIDENCE,
+                        help=f"lowest score a box is drafted with (default: {DEFAULT_CONFIDENCE})")
+    parser.add_argument("--iou", type=float, default=DEFAULT_IOU,
+                        help=f"overlap above which NMS drops the weaker box (default: {DEFAULT_IOU})")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="CPU threads for the model (0 = the runtime's default, all cores)")
+    parser.add_argument("--readers", type=int, default=4,
+                        help="threads decoding images while the model runs (default: 4)")
+    parser.add_argument("--overwrite", action="store_true", help="replace drafts from an earlier run")
+    add_metrics_arguments(parser)
+
+def prelabel_options(args):
+    return {
+        "class_mapping": parse_class_mapping(args.class_map),
+        "batch_size": args.batch_size,
+        "image_size": args.imgsz,
+        "confidence": args.conf,
+        "iou": args.iou,
+        "threads": args.threads,
+        "readers": args.readers,
+        "overwrite": args.overwrite,
+        "log": args.log,
+        "metrics_path": args.metrics,
+    }
+
+
+def main(argv=None):
+    # The same options as `python -m labelme_tools prelabel`, defined once in the CLI
+    from labelme_tools.cli import main as cli_main
+    cli_main(["prelabel"] + list(sys.argv[1:] if argv is None else argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import io
+import json
+import time
+import tarfile
+
+# Where a converter puts its samples:
+#   files  - one file per image/label in class or images/labels folders (default)
+#   shards - numbered tar archives in WebDataset layout plus an index
+OUTPUT_FORMATS = ("files", "shards")
+
+DEFAULT_SHARD_SIZE = 10000         # samples per shard
+DEFAULT_SHARD_BYTES = 1024 ** 3    # a shard is closed once it passes this size
+
+INDEX_SUFFIX = "-index.jsonl"
+
+# === KEYS ===
+def sample_key(*parts):
+    """WebDataset key from path parts: the first dot of a member name starts its extension."""
+    return "/".join(part.replace(".", "_") for part in parts if part)
+
+def image_extension(file_name):
+    return os.path.splitext(file_name)[1].lstrip(".").lower() or "jpg"
+
+# === WRITING ===
+class ShardWriter:
+    """Append samples to `<prefix>-000000.tar`, `<prefix>-000001.tar`, ... in `output_dir`.
+
+    A sample is a key and its members (extension -> bytes), stored as
+    consecutive `<key>.<extension>` tar entries as WebDataset expects. A shard
+    is closed after `shard_size` samples or `shard_bytes` bytes. Each sample
+    also gets a line in `<prefix>-index.jsonl` with its shard and the offset
+    and size of each member's data, for random access without scanning the
+    tars. Shards of an earlier run under the same prefix are
+    removed first: they are always rebuilt in full.
+    """
+
+    def __init__(self, output_dir, prefix, shard_size=DEFAULT_SHARD_SIZE, shard_bytes=DEFAULT_SHARD_BYTES):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.shard_bytes = shard_bytes
+        self.mtime = int(time.time())
+        self.shards = []
+        self.samples = 0
+        self._tar = None
+        self._count = 0
+        os.makedirs(output_dir, exist_ok=True)
+        self._remove_old()
+        self._index = open(self.index_path, 'w', encoding='utf-8')
+
+    @property
+    def index_path(self):
+        return os.path.join(self.output_dir, self.prefix + INDEX_SUFFIX)
+
+    def _remove_old(self):
+        for name in os.listdir(self.output_dir):
+            if name.startswith(self.prefix + "-") and (name.endswith(".tar") or name.endswith(INDEX_SUFFIX)):
+                os.remove(os.path.join(self.output_dir, name))
+
+    def _open_next(self):
+        name = f"{self.prefix}-{len(self.shards):06d}.tar"
+        self.shards.append(name)
+        self._tar = tarfile.open(os.path.join(self.output_dir, name), 'w', format=tarfile.PAX_FORMAT)
+        self._count = 0
+
+    def _close_current(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+
+    def add(self, key, members):
+        """Append one sample; returns (shard file name, bytes written)."""
+        if self._tar is None or self._count >= self.shard_size or self._tar.offset >= self.shard_bytes:
+            self._close_current()
+            self._open_next()
+        start = self._tar.offset
+        offsets = {}
+        for extension, data in members.items():
+            info = tarfile.TarInfo(f"{key}.{extension}")
+            info.size = len(data)
+            info.mtime = self.mtime
+            self._tar.addfile(info, io.BytesIO(data))
+            # The data ends the entry, padded to whole 512-byte blocks
+            padded = (len(data) + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+            offsets[extension] = [self._tar.offset - padded, len(data)]
+        shard = self.shards[-1]
+        self._index.write(json.dumps({"key": key, "shard": shard, "members": offsets}) + "\n")
+        self._count += 1
+        self.samples += 1
+        return shard, self._tar.offset - start
+
+    def add_result(self, result, metrics=None):
+        """Append the sample a converter put in `result.payload`; returns the result to report."""
+        if result.payload is None:
+            return result
+        key, members = result.payload
+        if metrics is None:
+            shard, written = self.add(key, members)
+        else:
+            with metrics.timing("shard"):
+                shard, written = self.add(key, members)
+            metrics.add_bytes(written=written)
+        return result._replace(detail=f"{shard}:{key}", outputs=(), payload=None)
+
+    def close(self):
+        self._close_current()
+        self._index.close()
+        print(f"📦 {self.samples} sample(s) in {len(self.shards)} shard(s), index: {self.index_path}")
+
+# === OPTIONS ===
+def add_shard_arguments(parser):
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="files",
+                        help="loose files, or tar shards with an index (always rebuilt in full)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, metavar="N",
+                        help=f"samples per shard (default: {DEFAULT_SHARD_SIZE})")
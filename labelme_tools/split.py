@@ -0,0 +1,115 @@
+import os
+import json
+import math
+import hashlib
+
+SPLITS = ("train", "val", "test")
+
+# === RATIOS ===
+def parse_ratios(value):
+    """'80/10/10' or '0.8,0.2' -> normalized (train, val, test) fractions."""
+    parts = [float(part) for part in value.replace(",", "/").split("/") if part.strip()]
+    if not 1 <= len(parts) <= len(SPLITS) or any(part < 0 for part in parts) or sum(parts) <= 0:
+        raise ValueError(f"Invalid split ratios: {value}")
+    parts += [0.0] * (len(SPLITS) - len(parts))
+    total = sum(parts)
+    return tuple(part / total for part in parts)
+
+def hash_fraction(key, seed=""):
+    """Stable number in [0, 1) for `key`; the same in every process and on every run."""
+    digest = hashlib.sha1(f"{seed}:{key}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+# === ASSIGNMENT ===
+class DatasetSplit:
+    """Assign samples to train/val/test by a hash of their file stem.
+
+    The hash split of a stem never changes, so a sample stays in its split
+    across runs and machines whatever else is added. With `stratify`, each
+    class (a sample's first labelled class) is also kept within one sample of
+    the ratios: a sample whose hash split is already full for its class goes
+    to the split furthest below its share instead. That correction depends on
+    the order samples are assigned in, so assign() must be called in input
+    order from one thread.
+    """
+
+    def __init__(self, ratios, stratify=False, seed=""):
+        self.ratios = ratios
+        self.stratify = stratify
+        self.seed = seed
+        self.names = [name for name, ratio in zip(SPLITS, ratios) if ratio > 0]
+        self.counts = {}        # stratum -> {split: samples}
+        self.previous = {}      # source key -> (stratum, split) of an earlier run
+
+    @property
+    def settings(self):
+        return {"ratios": list(self.ratios), "stratify": self.stratify, "seed": self.seed}
+
+    def hash_split(self, stem):
+        fraction = hash_fraction(stem, self.seed)
+        bound = 0.0
+        for name, ratio in zip(SPLITS, self.ratios):
+            bound += ratio
+            if fraction < bound and ratio > 0:
+                return name
+        return self.names[-1]
+
+    def _stratum_counts(self, stratum):
+        return self.counts.setdefault(stratum, dict.fromkeys(self.names, 0))
+
+    def keep(self, key, stratum, split):
+        """Count a sample kept from an earlier run (unchanged, so never passed to assign())."""
+        if split in self.names:
+            self._stratum_counts(stratum)[split] += 1
+            self.previous[key] = stratum, split
+
+    def assign(self, key, stem, stratum=None):
+        """Final split of one sample; `key` identifies its source across runs."""
+        old = self.previous.pop(key, None)
+        if old is not None:
+            # Converted again: its earlier place no longer counts
+            self.counts[old[0]][old[1]] -= 1
+        counts = self._stratum_counts(stratum)
+        split = self.hash_split(stem)
+        if self.stratify:
+            total = sum(counts.values()) + 1
+            ratios = dict(zip(SPLITS, self.ratios))
+            if counts[split] + 1 > math.ceil(ratios[split] * total):
+                split = max(self.names, key=lambda name: ratios[name] * total - counts[name])
+        counts[split] += 1
+        return split
+
+    def totals(self):
+        totals = dict.fromkeys(self.names, 0)
+        for counts in self.counts.values():
+            for name, n in counts.items():
+                totals[name] += n
+        return totals
+
+def split_of(path):
+    """The split folder a path sits in, or None."""
+    parts = os.path.normpath(path).split(os.sep)
+    return next((part for part in reversed(parts[:-1]) if part in SPLITS), None)
+
+# === DATA.YAML ===
+def write_data_yaml(path, dataset_dir, split_dirs, class_map):
+    """Write the dataset file Ultralytics trains from.
+
+    `split_dirs` maps split names to image folders relative to `dataset_dir`.
+    Strings are written as JSON, which YAML reads as quoted strings.
+    """
+    lines = [f"path: {json.dumps(os.path.abspath(dataset_dir))}"]
+    lines += [f"{name}: {json.dumps(folder)}" for name, folder in split_dirs.items()]
+    lines.append("names:")
+    lines += [f"  {idx}: {json.dumps(cls)}" for cls, idx in sorted(class_map.items(), key=lambda x: x[1])]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+def add_split_arguments(parser):
+    parser.add_argument("--split", type=parse_ratios, metavar="TRAIN/VAL/TEST",
+                        help="write images/ and labels/ in train, val and test folders, e.g. 80/10/10, "
+                             "and a data.yaml; default: one flat folder")
+    parser.add_argument("--stratify", action="store_true",
+                        help="with --split: keep every class close to the ratios")
+    parser.add_argument("--split-seed", default="", metavar="TEXT",
+                        help="with --split: change the seed to draw a different split")
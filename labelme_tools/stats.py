@@ -0,0 +1,85 @@
+import os
+from collections import Counter
+from functools import partial
+
+from labelme_tools.engine import iter_chunk_results, resolve_workers
+from labelme_tools.normalize import load_labelme_json
+
+# === PER-FILE SUMMARY ===
+def _file_entry(json_path, root):
+    """(top folder, [(label, shape type)], image found, has imageData) for one JSON."""
+    data = load_labelme_json(json_path, "lazy")
+    shapes = []
+    for shape in data.get('shapes', []):
+        label = shape.get('label', '').strip()
+        points = shape.get('points', [])
+        if not label or not points:
+            continue
+        shapes.append((label, shape.get('shape_type') or ("rectangle" if len(points) == 2 else "polygon")))
+    image_file_name = os.path.basename(data.get('imagePath') or '')
+    image_found = bool(image_file_name) and os.path.exists(os.path.join(os.path.dirname(json_path), image_file_name))
+    parts = os.path.relpath(json_path, root).split(os.sep)
+    return parts[0] if len(parts) > 1 else ".", shapes, image_found, data.get('imageData') is not None
+
+def stats_chunk(json_paths, root):
+    """Summarize a chunk of JSONs; runs inside a worker process in parallel mode."""
+    entries = []
+    for json_path in json_paths:
+        try:
+            entries.append(_file_entry(json_path, root))
+        except Exception as e:
+            entries.append((json_path, e))
+    return entries
+
+# === DATASET TOTALS ===
+class DatasetStats:
+    """Files, shapes and labels of a LabelMe dataset, counted from its JSONs."""
+
+    def __init__(self):
+        self.files = 0
+        self.empty = 0
+        self.missing_images = 0
+        self.embedded = 0
+        self.errors = []
+        self.shapes = Counter()         # label -> shapes
+        self.frames = Counter()         # label -> files with at least one such shape
+        self.shape_types = Counter()
+        self.folders = Counter()        # top-level folder -> files
+
+    def add(self, entry):
+        if isinstance(entry[1], Exception):
+            self.errors.append(entry)
+            return
+        folder, shapes, image_found, embedded = entry
+        self.files += 1
+        self.folders[folder] += 1
+        self.empty += not shapes
+        self.missing_images += not image_found and not embedded
+        self.embedded += embedded
+        self.shapes.update(label for label, _ in shapes)
+        self.frames.update({label for label, _ in shapes})
+        self.shape_types.update(shape_type for _, shape_type in shapes)
+
+    def print_summary(self):
+        print(f"\n📊 {self.files} JSON file(s), {sum(self.shapes.values())} shape(s), "
+              f"{len(self.shapes)} label(s).")
+        if self.shapes:
+            print(f"   {'label':<32}{'shapes':>10}{'frames':>10}")
+            for label, n in self.shapes.most_common():
+                print(f"   {label:<32}{n:>10}{self.frames[label]:>10}")
+        if self.shape_types:
+            print("🔷 Shape types: " + ", ".join(f"{name} {n}" for name, n in self.shape_types.most_common()))
+        if len(self.folders) > 1:
+            print("📂 Folders: " + ", ".join(f"{name} {n}" for name, n in sorted(self.folders.items())))
+        print(f"🖼️ Embedded imageData: {self.embedded}, image missing: {self.missing_images}, "
+              f"no shapes: {self.empty}")
+        for json_path, error in self.errors:
+            print(f"❌ Failed to read {json_path}: {error}")
+
+def collect_stats(json_files, root, workers=1, chunk_size=64):
+    """Count the shapes, labels and images of every JSON in `json_files` under `root`."""
+    stats = DatasetStats()
+    chunk_func = partial(stats_chunk, root=root)
+    for entry in iter_chunk_results(chunk_func, json_files, resolve_workers(workers), chunk_size):
+        stats.add(entry)
+    return stats
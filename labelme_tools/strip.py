@@ -0,0 +1,66 @@
+import os
+import argparse
+
+from labelme_tools.discovery import iter_json_files
+from labelme_tools.normalize import write_json_atomic
+from labelme_tools.parsing import parse_labelme
+
+# === STRIP ===
+def strip_image_data(json_path, allow_missing_image=False, dry_run=False):
+    """Set imageData to null in one LabelMe JSON.
+
+    Returns the number of bytes saved, 0 if there was nothing to strip, or None
+    if the JSON was kept because its image file is missing (the embedded copy
+    would be the only one) and `allow_missing_image` is not set.
+    """
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    # imageData is cut out of the bytes, so the blob is never parsed
+    data = parse_labelme(raw, "lazy")
+    if not data.get('imageData'):
+        return 0
+    if not allow_missing_image:
+        image_path = os.path.join(os.path.dirname(json_path), os.path.basename(data.get('imagePath') or ''))
+        if not os.path.isfile(image_path):
+            return None
+    embedded_size = len(data['imageData'])
+    data['imageData'] = None
+    if dry_run:
+        return embedded_size
+    write_json_atomic(json_path, data)
+    return max(len(raw) - os.path.getsize(json_path), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove the embedded imageData from LabelMe JSONs.")
+    parser.add_argument("roots", nargs="+", help="folders searched recursively for LabelMe JSONs")
+    parser.add_argument("--allow-missing-image", action="store_true",
+                        help="also strip JSONs whose image file is not next to them (their only copy of the image)")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be stripped")
+    args = parser.parse_args(argv)
+
+    for root in args.roots:
+        checked = stripped = kept = saved = 0
+        for json_path in iter_json_files(root):
+            checked += 1
+            try:
+                result = strip_image_data(json_path, args.allow_missing_image, args.dry_run)
+            except Exception as e:
+                print(f"❌ Error processing {json_path}: {e}")
+                continue
+            if result is None:
+                kept += 1
+                print(f"⚠️ Image missing, imageData kept: {json_path}")
+            elif result:
+                stripped += 1
+                saved += result
+        verb = "Would strip" if args.dry_run else "Stripped"
+        print(f"✅ {verb} imageData from {stripped} of {checked} JSON file(s) in: {root} "
+              f"({saved / 1e6:.1f} MB)")
+        if kept:
+            print(f"⚠️ Kept imageData in {kept} JSON file(s) without a local image "
+                  f"(--allow-missing-image strips them anyway).")
+
+
+if __name__ == "__main__":
+    main()
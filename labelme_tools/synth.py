@@ -0,0 +1,145 @@
+import os
+import io
+import json
+import base64
+import random
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from labelme_tools.classes import TASK_LABELS
+
+# Class folders of the inclusion-exclusion dataset and the class each holds,
+# as read by the folderwise exporter
+CLASS_FOLDERS = {
+    "Vehicle": "Vehicle",
+    "TRAIN": "Train",
+    "Pedestraints": "Pedestrian",
+    "Crossing": "Empty crossing"
+}
+
+# Folder layouts of the real datasets:
+#   flat          - every image and JSON in the root folder
+#   day-night     - Day/ and Night/ subfolders, as in the README
+#   class-folders - one folder per class, see CLASS_FOLDERS
+LAYOUTS = {
+    "flat": [""],
+    "day-night": ["Day", "Night"],
+    "class-folders": list(CLASS_FOLDERS),
+}
+
+# === IMAGES ===
+def synthetic_frame(width, height, rng):
+    """A smooth gradient with some noise; compresses roughly like a camera frame."""
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    phase = rng.random(3).astype(np.float32) * 6.28
+    channels = [
+        np.sin(x * 3 + phase[0]) * np.cos(y * 2 + phase[1]),
+        np.sin(x * 5 + y * 4 + phase[2]),
+        np.cos(y * 6 + phase[0]) * x,
+    ]
+    frame = np.stack([np.broadcast_to(c, (height, width)) for c in channels], axis=-1)
+    frame = (frame * 90 + 128 + rng.normal(0, 6, (height, width, 3)).astype(np.float32))
+    return Image.fromarray(np.clip(frame, 0, 255).astype(np.uint8))
+
+# === SHAPES ===
+def random_shape(labels, width, height, polygon_ratio, rnd):
+    label = rnd.choice(labels)
+    if rnd.random() < polygon_ratio:
+        cx, cy = rnd.uniform(0, width), rnd.uniform(0, height)
+        radius = rnd.uniform(0.05, 0.25) * min(width, height)
+        points = [[min(max(cx + rnd.uniform(-radius, radius), 0), width),
+                   min(max(cy + rnd.uniform(-radius, radius), 0), height)]
+                  for _ in range(rnd.randrange(3, 9))]
+        return {"label": label, "points": points, "group_id": None, "shape_type": "polygon", "flags": {}}
+    x0, y0 = rnd.uniform(0, width * 0.8), rnd.uniform(0, height * 0.8)
+    x1, y1 = rnd.uniform(x0 + 1, width), rnd.uniform(y0 + 1, height)
+    return {"label": label, "points": [[x0, y0], [x1, y1]], "group_id": None,
+            "shape_type": "rectangle", "flags": {}}
+
+# === DATASET ===
+def generate_dataset(root, count=100, size=(1920, 1080), shapes=(1, 4), polygon_ratio=0.5,
+                     embed_image_data=False, layout="class-folders", task="inclusion-exclusion", seed=0):
+    """Write `count` images with LabelMe JSONs under `root` and return the JSON paths.
+
+    Frames are spread round-robin over the folders of `layout`. `shapes` is the
+    (min, max) number of shapes per image; `polygon_ratio` the share of
+    polygons among them, the rest being rectangles.
+    """
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    labels = TASK_LABELS[task]
+    folders = LAYOUTS[layout]
+    width, height = size
+    # A few distinct frames are enough; encoding one per file would dominate generation
+    frames = [synthetic_frame(width, height, rng) for _ in range(min(count, 8))]
+    encoded = []
+    for frame in frames:
+        buffer = io.BytesIO()
+        frame.save(buffer, format="JPEG", quality=90)
+        encoded.append(buffer.getvalue())
+
+    json_paths = []
+    for i in range(count):
+        folder = os.path.join(root, folders[i % len(folders)])
+        os.makedirs(folder, exist_ok=True)
+        stem = f"frame_{i:06d}"
+        image_bytes = encoded[i % len(encoded)]
+        with open(os.path.join(folder, stem + ".jpg"), 'wb') as f:
+            f.write(image_bytes)
+
+        data = {
+            "version": "5.2.1",
+            "flags": {},
+            "shapes": [random_shape(labels, width, height, polygon_ratio, rnd)
+                       for _ in range(rnd.randint(*shapes))],
+            "imagePath": stem + ".jpg",
+            "imageData": base64.b64encode(image_bytes).decode('ascii') if embed_image_data else None,
+            "imageHeight": height,
+            "imageWidth": width,
+        }
+        json_path = os.path.join(folder, stem + ".json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        json_paths.append(json_path)
+    return json_paths
+
+def parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+def parse_range(value):
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+def add_dataset_arguments(parser):
+    parser.add_argument("--count", type=int, default=100, help="number of images (default: 100)")
+    parser.add_argument("--size", type=parse_size, default=(1920, 1080), metavar="WxH",
+                        help="image resolution (default: 1920x1080)")
+    parser.add_argument("--shapes", type=parse_range, default=(1, 4), metavar="MIN-MAX",
+                        help="shapes per image (default: 1-4)")
+    parser.add_argument("--polygons", type=float, default=0.5, metavar="RATIO",
+                        help="share of polygons among the shapes (default: 0.5)")
+    parser.add_argument("--embed", action="store_true", help="store the image as imageData in each JSON")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="class-folders",
+                        help="folder layout (default: class-folders)")
+    parser.add_argument("--seed", type=int, default=0)
+
+def dataset_options(args):
+    return {"count": args.count, "size": args.size, "shapes": args.shapes, "polygon_ratio": args.polygons,
+            "embed_image_data": args.embed, "layout": args.layout, "seed": args.seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic LabelMe dataset.")
+    parser.add_argument("root", help="folder to write the dataset into")
+    add_dataset_arguments(parser)
+    args = parser.parse_args(argv)
+    json_paths = generate_dataset(args.root, **dataset_options(args))
+    print(f"✅ Generated {len(json_paths)} LabelMe JSON file(s) in: {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import math
+import difflib
+from collections import Counter, namedtuple
+from functools import partial
+
+from labelme_tools.classes import yolo_class_name
+from labelme_tools.engine import iter_chunk_results, resolve_workers
+from labelme_tools.normalize import load_labelme_json
+from labelme_tools.parsing import is_draft
+
+# Every problem the validator reports, with how bad it is. Errors make the
+# converters fail, skip a file or write a wrong label; warnings are worth a
+# look but convert fine.
+ISSUES = {
+    "unreadable": "error",          # not valid JSON, or not a LabelMe file
+    "image-missing": "error",       # no image file next to the JSON and no imageData
+    "empty-label": "error",
+    "unknown-label": "error",       # not in the task's label list
+    "bad-points": "error",          # points missing, not numbers, or too few for the shape type
+    "zero-area": "error",           # rectangle under a pixel wide or high, polygon under a square pixel
+    "outside-image": "error",       # shape entirely outside the image
+    "size-mismatch": "error",       # imageWidth/imageHeight differ from the image header (--image-size header)
+    "folder-name": "error",         # folder named like a label or class folder, but misspelled
+    "out-of-bounds": "warning",     # shape partly outside the image
+    "no-image-size": "warning",     # no imageWidth/imageHeight, so bounds are not checked
+    "no-shapes": "warning",
+    "unsupported-shape": "warning", # circle, line, point...: converters treat them as polygons
+    "draft": "warning",             # pre-label draft not yet saved from LabelMe; the converters skip it
+}
+SEVERITIES = ("error", "warning")
+
+# Where the image size comes from:
+#   json   - imageWidth/imageHeight only; no image file is opened
+#   header - also read the image header (never the pixels) to check them
+IMAGE_SIZE_SOURCES = ("json", "header")
+
+# Points may stray this far past the image border before they count as outside
+BOUNDS_TOLERANCE = 1.0
+# Folder names at least this similar to a label (difflib ratio) are taken for misspellings
+FOLDER_NAME_CUTOFF = 0.75
+
+# shape is the shape's index in the JSON, None for issues of the whole file or folder
+Issue = namedtuple("Issue", "path shape code detail")
+
+# === SHAPE CHECKS ===
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def _polygon_area(points):
+    area = 0.0
+    for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+        area += x0 * y1 - x1 * y0
+    return abs(area) / 2
+
+def shape_issues(shape, size, label_names=None):
+    """(code, detail) of each problem of one shape; `size` is (width, height) or None."""
+    if not isinstance(shape, dict):
+        return [("bad-points", "shape is not an object")]
+    issues = []
+    label = shape.get('label')
+    label = label.strip() if isinstance(label, str) else ''
+    if not label:
+        issues.append(("empty-label", "shape has no label"))
+    elif label_names is not None and yolo_class_name(label) not in label_names:
+        issues.append(("unknown-label", f"label {label!r} is not in the task's label list"))
+
+    points = shape.get('points')
+    if (not isinstance(points, list) or not points
+            or not all(isinstance(p, (list, tuple)) and len(p) == 2 and _is_number(p[0]) and _is_number(p[1])
+                       for p in points)):
+        issues.append(("bad-points", "points are missing or not [x, y] numbers"))
+        return issues
+    shape_type = shape.get('shape_type') or ("rectangle" if len(points) == 2 else "polygon")
+    if shape_type == "rectangle":
+        if len(points) != 2:
+            issues.append(("bad-points", f"rectangle has {len(points)} points instead of 2"))
+            return issues
+        (x0, y0), (x1, y1) = points
+        if abs(x1 - x0) < 1 or abs(y1 - y0) < 1:
+            issues.append(("zero-area", f"rectangle is {abs(x1 - x0):g} x {abs(y1 - y0):g} px"))
+    elif shape_type == "polygon":
+        if len(points) < 3:
+            issues.append(("bad-points", f"polygon has {len(points)} point(s)"))
+            return issues
+        if _polygon_area([tuple(p) for p in points]) < 1:
+            issues.append(("zero-area", "polygon encloses less than one square pixel"))
+    else:
+        issues.append(("unsupported-shape", f"shape type {shape_type!r}"))
+
+    if size is not None:
+        width, height = size
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        x_min, x_max, y_min, y_max = min(xs), max(xs), min(ys), max(ys)
+        if x_max <= 0 or y_max <= 0 or x_min >= width or y_min >= height:
+            issues.append(("outside-image", f"shape spans x {x_min:g}..{x_max:g}, y {y_min:g}..{y_max:g} "
+                                            f"of a {width}x{height} image"))
+        elif (x_min < -BOUNDS_TOLERANCE or y_min < -BOUNDS_TOLERANCE
+              or x_max > width + BOUNDS_TOLERANCE or y_max > height + BOUNDS_TOLERANCE):
+            issues.append(("out-of-bounds", f"shape spans x {x_min:g}..{x_max:g}, y {y_min:g}..{y_max:g} "
+                                            f"of a {width}x{height} image"))
+    return issues
+
+# === FILE CHECKS ===
+def _recorded_size(data):
+    width, height = data.get('imageWidth'), data.get('imageHeight')
+    if isinstance(width, int) and isinstance(height, int) and not isinstance(width, bool) and width > 0 and height > 0:
+        return width, height
+    return None
+
+def file_issues(json_path, label_names=None, image_size="json"):
+    """Every Issue of one LabelMe JSON. Images are never decoded; `image_size` "header" reads their header."""
+    try:
+        data = load_labelme_json(json_path, "lazy")
+        if not isinstance(data, dict):
+            raise ValueError("top level is not an object")
+    except Exception as e:
+        return [Issue(json_path, None, "unreadable", str(e))]
+    if is_draft(data):
+        return [Issue(json_path, None, "draft", "not checked until it is saved from LabelMe")]
+    issues = []
+
+    image_file_name = os.path.basename(data.get('imagePath') or '') if isinstance(data.get('imagePath'), str) else ''
+    image_path = os.path.join(os.path.dirname(json_path), image_file_name) if image_file_name else None
+    embedded = data.get('imageData')
+    image_found = embedded is not None or (image_path is not None and os.path.exists(image_path))
+    if not image_found:
+        issues.append(Issue(json_path, None, "image-missing", image_path or "imagePath is empty"))
+
+    size = _recorded_size(data)
+    if image_size == "header" and image_found:
+        from labelme_tools.images import image_size as read_image_size
+        try:
+            header_size = read_image_size(image_path, embedded=embedded)
+        except Exception as e:
+            issues.append(Issue(json_path, None, "unreadable", f"image header: {e}"))
+        else:
+            if size is not None and tuple(header_size) != size:
+                issues.append(Issue(json_path, None, "size-mismatch",
+                                    f"JSON says {size[0]}x{size[1]}, image is {header_size[0]}x{header_size[1]}"))
+            size = tuple(header_size)
+    if size is None:
+        issues.append(Issue(json_path, None, "no-image-size", "imageWidth/imageHeight missing; bounds not checked"))
+
+    shapes = data.get('shapes')
+    if not isinstance(shapes, list) or not shapes:
+        issues.append(Issue(json_path, None, "no-shapes", "no shapes"))
+        return issues
+    for index, shape in enumerate(shapes):
+        issues.extend(Issue(json_path, index, code, detail)
+                      for code, detail in shape_issues(shape, size, label_names))
+    return issues
+
+def validate_chunk(json_paths, label_names=None, image_size="json"):
+    """Check a chunk of JSONs; runs inside a worker process in parallel mode."""
+    return [(json_path, file_issues(json_path, label_names, image_size)) for json_path in json_paths]
+
+# === FOLDER NAMES ===
+def folder_name_issues(folders, root, labels=(), folder_classes=None):
+    """Issues for folders named almost, but not quite, like a label or a mapped class folder.
+
+    Case differences (TRAIN for Train), plurals and the -json suffix of the
+    launchers' folders are accepted; folders listed in `folder_classes` are taken as meant.
+    """
+    folder_classes = folder_classes or {}
+    known = {name.lower(): name for name in list(labels) + list(folder_classes) + list(folder_classes.values())}
+    issues = []
+    seen = set()
+    for folder in sorted(folders):
+        parts = os.path.relpath(folder, root).split(os.sep)
+        for depth, name in enumerate(parts):
+            path = os.path.join(root, *parts[:depth + 1])
+            if name in (".", "..") or path in seen:
+                continue
+            seen.add(path)
+            base = name[:-5] if name.lower().endswith("-json") else name
+            lowered = base.lower()
+            # Plurals (Vehicles for Vehicle) are taken as meant too
+            if lowered in known or lowered.rstrip("s") in known or lowered[:-2] in known and lowered.endswith("es"):
+                continue
+            close = difflib.get_close_matches(lowered, known, n=1, cutoff=FOLDER_NAME_CUTOFF)
+            if close:
+                issues.append(Issue(path, None, "folder-name",
+                                    f"folder {name!r} looks like a misspelling of {known[close[0]]!r}"))
+    return issues
+
+# === REPORT ===
+def format_issue(issue):
+    where = issue.path if issue.shape is None else f"{issue.path} [shape {issue.shape}]"
+    icon = "❌" if ISSUES[issue.code] == "error" else "⚠️"
+    return f"{icon} {issue.code}: {where}: {issue.detail}"
+
+class ValidationReport:
+    """Counts of the issues found, the first `limit` of each kind printed as they come.
+
+    With `report_path` every issue is also written there, one JSON object per line.
+    """
+
+    def __init__(self, limit=20, report_path=None):
+        self.limit = limit
+        self.files = 0
+        self.bad_files = 0
+        self.codes = Counter()
+        self.report = open(report_path, 'w', encoding='utf-8') if report_path else None
+
+    def add(self, issues, is_file=True):
+        self.files += is_file
+        self.bad_files += is_file and bool(issues)
+        for issue in issues:
+            self.codes[issue.code] += 1
+            if self.limit is None or self.codes[issue.code] <= self.limit:
+                print(format_issue(issue))
+            if self.report is not None:
+                self.report.write(json.dumps({"path": issue.path, "shape": issue.shape, "code": issue.code,
+                                              "severity": ISSUES[issue.code], "detail": issue.detail}) + "\n")
+
+    def close(self):
+        if self.report is not None:
+            self.report.close()
+
+    def count(self, severity):
+        return sum(n for code, n in self.codes.items() if ISSUES[code] == severity)
+
+    def failed(self, fail_on="error"):
+        """True if there are issues of `fail_on` severity or worse."""
+        return any(self.count(severity) for severity in SEVERITIES[:SEVERITIES.index(fail_on) + 1])
+
+    def print_summary(self):
+        print(f"\n🔍 Checked {self.files} JSON file(s): {self.bad_files} with issues, "
+              f"{self.count('error')} error(s), {self.count('warning')} warning(s).")
+        if self.codes:
+            print(f"   {'issue':<20}{'severity':<10}{'count':>10}")
+            for code, n in sorted(self.codes.items(), key=lambda item: (SEVERITIES.index(ISSUES[item[0]]), -item[1])):
+                print(f"   {code:<20}{ISSUES[code]:<10}{n:>10}")
+            hidden = sum(max(0, n - self.limit) for n in self.codes.values()) if self.limit is not None else 0
+            if hidden:
+                print(f"   ({hidden} issue(s) beyond the first {self.limit} of each kind not printed)")
+
+def validate_dataset(json_files, root, labels=None, folder_classes=None, image_size="json", workers=1,
+                     chunk_size=256, limit=20, report_path=None):
+    """Check every JSON in `json_files` under `root` and return the ValidationReport.
+
+    `labels` is the task's label list (None skips the label check); see
+    folder_name_issues for `folder_classes`.
+    """
+    if image_size not in IMAGE_SIZE_SOURCES:
+        raise ValueError(f"Unknown image size source: {image_size}")
+    label_names = {yolo_class_name(label) for label in labels} if labels is not None else None
+    chunk_func = partial(validate_chunk, label_names=label_names, image_size=image_size)
+    report = ValidationReport(limit, report_path)
+    folders = set()
+    try:
+        for json_path, issues in iter_chunk_results(chunk_func, json_files, resolve_workers(workers), chunk_size):
+            folders.add(os.path.dirname(json_path))
+            report.add(issues)
+        if labels is not None or folder_classes:
+            report.add(folder_name_issues(folders, root, labels or (), folder_classes), is_file=False)
+    finally:
+        report.close()
+    return report
+
+
+def main(argv=None):
+    # The same options as `python -m labelme_tools validate`, defined once in the CLI
+    from labelme_tools.cli import main as cli_main
+    cli_main(["validate"] + list(sys.argv[1:] if argv is None else argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import os
+from functools import partial
+
+import numpy as np
+
+from labelme_tools.bbox import concat_packed, format_yolo_lines, pack_points, yolo_bboxes_packed
+from labelme_tools.classes import yolo_class_name
+from labelme_tools.engine import FileResult, first_label_folder, iter_outdated, iter_stage_results, resolve_workers
+from labelme_tools.images import image_bytes, image_data_mode, image_size, locate_image, place_image
+from labelme_tools.manifest import ConversionManifest
+from labelme_tools.metrics import ConversionMetrics, ResultLog, count_bytes, measured_stages, timed
+from labelme_tools.normalize import load_labelme_json
+from labelme_tools.parsing import is_draft
+from labelme_tools.pipeline import Stages
+from labelme_tools.shards import DEFAULT_SHARD_SIZE, ShardWriter, image_extension, sample_key
+from labelme_tools.split import split_of, write_data_yaml
+
+# === CLASS INDEX ===
+def write_classes(class_map, path, offset=0):
+    """Write `<id>: <class>` lines in ID order.
+
+    With an `offset` the lines give the pixel values of a semantic mask
+    (class ID + offset), after a `0: background` line.
+    """
+    with open(path, "w") as f:
+        if offset:
+            f.write("0: background\n")
+        for cls, idx in sorted(class_map.items(), key=lambda x: x[1]):
+            f.write(f"{idx + offset}: {cls}\n")
+
+# === PER-FILE EXPORT ===
+def _prepare_json(json_path, image_out, label_out, class_map, image_mode, image_source, output_format, split):
+    """Parse one JSON and place its image; returns a FileResult or the shapes to box.
+
+    For shard output the image bytes go into the result's payload instead.
+    With a `split`, the image goes into the folder of its hash split.
+    """
+    with timed("parse"):
+        data = load_labelme_json(json_path, image_data_mode(image_source))
+    if is_draft(data):
+        return FileResult("skipped", json_path, "draft", None, False)
+
+    shapes = data.get('shapes', [])
+    if not shapes:
+        return FileResult("skipped", json_path, "no-shapes", None, False)
+
+    image_file_name = os.path.basename(data.get('imagePath', ''))
+    image_path = os.path.join(os.path.dirname(json_path), image_file_name)
+    found, embedded = locate_image(image_path, data, image_source)
+    if not found:
+        return FileResult("skipped", json_path, "image-missing", image_path, False, image_path)
+
+    # === PLACE IMAGE WITHOUT DECODING IT ===
+    with timed("size"):
+        img_w, img_h = image_size(image_path, data, embedded)
+    base_name = os.path.splitext(image_file_name)[0]
+    if split is not None:
+        image_out = os.path.join(image_out, split.hash_split(base_name))
+        label_out = os.path.join(label_out, split.hash_split(base_name))
+    new_img_path = os.path.join(image_out, image_file_name)
+    label_txt = os.path.join(label_out, base_name + ".txt")
+    outputs = (new_img_path, label_txt)
+    payload = None
+    if output_format == "shards":
+        with timed("read"):
+            image = image_bytes(image_path, image_mode, embedded)
+        outputs = ()
+        payload = (sample_key(base_name), {image_extension(image_file_name): image,
+                                           "cls": first_label_folder(shapes).encode('utf-8')})
+    else:
+        with timed("place"):
+            place_image(image_path, new_img_path, image_mode, embedded=embedded)
+    if embedded is not None:
+        image_path = None  # not a dependency of the outputs
+
+    class_ids = []
+    point_lists = []
+    unknown = []
+    for shape in shapes:
+        label = shape.get('label', '').strip()
+        points = shape.get('points', [])
+        if not label or not points:
+            continue
+        class_id = class_map.get(yolo_class_name(label))
+        if class_id is None:
+            unknown.append(label)
+            continue
+        class_ids.append(class_id)
+        point_lists.append(points)
+
+    notes = tuple(f"label '{label}' is not in the class list" for label in unknown)
+    result = FileResult("converted", json_path, None, image_file_name, False, image_path,
+                        outputs, class_ids, notes, payload=payload)
+    return result, pack_points(point_lists), (img_w, img_h)
+
+def prepare_json(json_path, image_out, label_out, class_map, image_mode="copy", image_source="file",
+                 output_format="files", split=None):
+    """Reader stage: parse one JSON and place its image (file I/O only, nothing is decoded)."""
+    try:
+        return _prepare_json(json_path, image_out, label_out, class_map, image_mode, image_source, output_format,
+                             split)
+    except Exception as e:
+        return FileResult("error", json_path, "exception", str(e), False)
+
+def box_batch(prepared):
+    """Compute stage: normalize the boxes of every shape in the batch in one vectorized pass.
+
+    Returns a FileResult for each skipped or failed file and a (result, label
+    text) job for the rest.
+    """
+    jobs = list(prepared)
+    pending = [i for i, job in enumerate(jobs) if not isinstance(job, FileResult)]
+    if pending:
+        with timed("box"):
+            packed = [jobs[i][1] for i in pending]
+            coords, counts = concat_packed(packed)
+            sizes = [jobs[i][2] for i in pending]
+            shape_counts = [len(c) for _, c in packed]
+            img_w = np.repeat([w for w, _ in sizes], shape_counts)
+            img_h = np.repeat([h for _, h in sizes], shape_counts)
+            boxes = yolo_bboxes_packed(coords, counts, img_w, img_h)
+
+            start = 0
+            for i, n in zip(pending, shape_counts):
+                result = jobs[i][0]
+                jobs[i] = result, format_yolo_lines(result.label, boxes[start:start + n])
+                start += n
+    return jobs
+
+def write_label(job):
+    """Writer stage: write one YOLO label file."""
+    if isinstance(job, FileResult):
+        return job
+    result, lines = job
+    try:
+        with timed("write"):
+            with open(result.outputs[1], 'w') as out_f:
+                out_f.write(lines)
+        count_bytes(written=len(lines))
+        return result
+    except Exception as e:
+        return FileResult("error", result.json_path, "exception", str(e), False)
+
+def shard_label(job):
+    """Writer stage for shard output: add the label text to the sample in the result's payload."""
+    if isinstance(job, FileResult):
+        return job
+    result, lines = job
+    key, members = result.payload
+    return result._replace(payload=(key, dict(members, txt=lines.encode('utf-8'))))
+
+def yolo_stages(image_out, label_out, class_map, image_mode="copy", image_source="file", batch_size=32,
+                output_format="files", split=None):
+    return Stages(partial(prepare_json, image_out=image_out, label_out=label_out, class_map=class_map,
+                          image_mode=image_mode, image_source=image_source, output_format=output_format,
+                          split=split),
+                  box_batch, write_label if output_format == "files" else shard_label, batch_size)
+
+# === SPLIT ===
+def _in_split(path, name):
+    """`path` moved from its split folder into split `name`."""
+    folder, file_name = os.path.split(path)
+    return os.path.join(os.path.dirname(folder), name, file_name)
+
+def settle_split(result, split):
+    """Give a converted sample its final split; returns (result, split name).
+
+    Outputs were placed in the hash split by the reader stage. When
+    stratification picks another split they are renamed there, which is
+    cheap on the same drive, and the result's outputs are updated.
+    """
+    stem = os.path.splitext(result.detail)[0]
+    name = split.assign(os.path.abspath(result.json_path), stem, result.label[0] if result.label else None)
+    if name != split.hash_split(stem) and result.outputs:
+        outputs = tuple(_in_split(path, name) for path in result.outputs)
+        for old, new in zip(result.outputs, outputs):
+            os.replace(old, new)
+        result = result._replace(outputs=outputs)
+    return result, name
+
+def keep_previous_splits(split, manifest):
+    """Count the samples of an earlier run, so stratification balances new ones against them."""
+    for key, entry in manifest.sources.items():
+        if entry.get("status") == "converted" and entry.get("outputs"):
+            classes = entry.get("class")
+            split.keep(key, classes[0] if classes else None, split_of(entry["outputs"][0]))
+
+# === EXPORT ===
+def print_export_result(result):
+    for note in result.notes:
+        print(f"⚠️ {result.json_path}: {note}")
+    if result.status == "converted":
+        print(f"✅ Saved image + label: {result.detail}")
+    elif result.reason == "draft":
+        print(f"⏩ Skipping pre-label draft not yet saved from LabelMe: {result.json_path}")
+    elif result.status == "error":
+        print(f"❌ Error processing {result.json_path}: {result.detail}")
+
+def export_yolo(json_files, output_dir, class_map, image_mode="copy", incremental=True, workers=1, chunk_size=32,
+                image_source="file", io_threads=4, log="files", metrics_path=None, output_format="files",
+                shard_size=DEFAULT_SHARD_SIZE, split=None):
+    """Write images/ and labels/ in YOLO format under `output_dir` and print the totals.
+
+    `class_map` (class name -> ID) is fixed before any label file is written, so
+    workers can export files independently and IDs never depend on file order.
+    Image sizes come from the JSON's imageWidth/imageHeight or the image header,
+    and the original image bytes are copied as-is unless `image_mode` is "reencode".
+    `image_source` "embedded" or "auto" takes the image from the JSON's imageData.
+    With `incremental`, unchanged sources are skipped using the manifest in
+    `output_dir`; a different class map invalidates every entry. Image placement,
+    box computation and label writes overlap in a pipeline with `io_threads`
+    reader threads, `chunk_size` files per vectorized batch. `log`, `metrics_path`,
+    `output_format` and `shard_size` work as in engine.convert_annotated; a
+    shard sample holds the image bytes, the label text and the first label.
+
+    With a `split` (split.DatasetSplit), samples go straight into
+    images/<split>/ and labels/<split>/ (or one shard set per split) and a
+    data.yaml for Ultralytics is written next to them.
+    """
+    image_out = os.path.join(output_dir, "images")  # Where images will be saved
+    label_out = os.path.join(output_dir, "labels")  # Where YOLO .txt files will be saved
+    workers = resolve_workers(workers)
+    if workers > 1:
+        print(f"⚙️ Using {workers} worker processes.")
+
+    shards = None
+    manifest = None
+    subsets = [None] if split is None else split.names
+    if output_format == "shards":
+        shards = {name: ShardWriter(output_dir, "-".join(filter(None, ("yolo", name))), shard_size)
+                  for name in subsets}
+    else:
+        for name in subsets:
+            os.makedirs(os.path.join(image_out, name or ""), exist_ok=True)
+            os.makedirs(os.path.join(label_out, name or ""), exist_ok=True)
+        settings = {"kind": "yolo", "image_mode": image_mode, "classes": class_map, "image_source": image_source}
+        if split is not None:
+            settings["split"] = split.settings
+        manifest = ConversionManifest(output_dir, settings)
+        if split is not None and incremental:
+            keep_previous_splits(split, manifest)
+    metrics = ConversionMetrics("yolo")
+    results_log = ResultLog(log)
+    counts = {"found": 0, "unchanged": 0}
+    todo = iter_outdated(json_files, manifest if incremental else None, counts, metrics)
+
+    stages = measured_stages(yolo_stages(image_out, label_out, class_map, image_mode, image_source, chunk_size,
+                                         output_format, split))
+    saved = 0
+    for result in iter_stage_results(stages, todo, workers, chunk_size, io_threads):
+        subset = None
+        if split is not None and result.status == "converted":
+            result, subset = settle_split(result, split)
+        if shards is not None:
+            if result.payload is not None:
+                result = shards[subset].add_result(result, metrics)
+        else:
+            with metrics.timing("manifest"):
+                manifest.record(result)
+        metrics.record(result)
+        saved += result.status == "converted"
+        if results_log.show(result):
+            print_export_result(result)
+
+    if shards is not None:
+        for writer in shards.values():
+            writer.close()
+        removed = 0
+    else:
+        removed = manifest.finish()
+    metrics.count("skipped", "unchanged", counts["unchanged"])
+    metrics.finish()
+
+    # === SAVE CLASS INDEX LIST FOR REFERENCE ===
+    write_classes(class_map, os.path.join(output_dir, "classes.txt"))
+    if split is not None and shards is None:
+        write_data_yaml(os.path.join(output_dir, "data.yaml"), output_dir,
+                        {name: f"images/{name}" for name in split.names}, class_map)
+
+    print(f"\n🔍 Found {counts['found']} JSON file(s).")
+    if counts["unchanged"]:
+        print(f"⏩ Skipped {counts['unchanged']} unchanged JSON file(s).")
+    if removed:
+        print(f"🗑️ Removed {removed} output(s) of deleted JSON file(s).")
+    print(f"\n✅ {saved} images converted to YOLO format.")
+    if split is not None:
+        print("📊 Split: " + ", ".join(f"{name} {n}" for name, n in split.totals().items()))
+    print(f"📂 Output saved in: {output_dir}")
+    metrics.print_summary()
+    if metrics_path:
+        metrics.save(metrics_path)
+    return saved
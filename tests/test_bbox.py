@@ -0,0 +1,54 @@
+import numpy as np
+
+from labelme_tools.bbox import format_yolo_lines, pack_points, yolo_bboxes, yolo_bboxes_packed
+
+def get_yolo_bbox(points, img_w, img_h):
+    """The per-shape conversion the YOLO scripts had before the packed one."""
+    x_coords = [p[0] for p in points]
+    y_coords = [p[1] for p in points]
+    x_min, x_max = min(x_coords), max(x_coords)
+    y_min, y_max = min(y_coords), max(y_coords)
+    x_center = (x_min + x_max) / 2.0 / img_w
+    y_center = (y_min + y_max) / 2.0 / img_h
+    width = (x_max - x_min) / img_w
+    height = (y_max - y_min) / img_h
+    return x_center, y_center, width, height
+
+def random_shapes(rng, n):
+    shapes = []
+    for _ in range(n):
+        count = int(rng.choice([1, 2, 3, 7, 20]))
+        points = rng.uniform(-50, 2000, size=(count, 2))
+        # LabelMe writes ints and floats alike
+        shapes.append([[int(x), float(y)] if rng.random() < 0.3 else [float(x), float(y)] for x, y in points])
+    return shapes
+
+def test_packed_boxes_match_per_shape_min_max():
+    rng = np.random.default_rng(0)
+    shapes = random_shapes(rng, 500)
+    boxes = yolo_bboxes(shapes, 1920, 1080)
+    expected = np.array([get_yolo_bbox(points, 1920, 1080) for points in shapes])
+    assert np.array_equal(boxes, expected)
+
+def test_packed_label_lines_match_per_shape_lines():
+    rng = np.random.default_rng(1)
+    shapes = random_shapes(rng, 200)
+    class_ids = rng.integers(0, 5, size=len(shapes)).tolist()
+    expected = "".join("%d %.6f %.6f %.6f %.6f\n" % (class_id, *get_yolo_bbox(points, 1280, 720))
+                       for class_id, points in zip(class_ids, shapes))
+    assert format_yolo_lines(class_ids, yolo_bboxes(shapes, 1280, 720)) == expected
+
+def test_per_shape_image_sizes():
+    shapes = [[[10, 20], [30, 60]], [[0, 0], [5, 5], [10, 0]]]
+    coords, counts = pack_points(shapes)
+    sizes = np.array([100, 50])
+    boxes = yolo_bboxes_packed(coords, counts, sizes, sizes)
+    assert np.array_equal(boxes, [get_yolo_bbox(shapes[0], 100, 100), get_yolo_bbox(shapes[1], 50, 50)])
+
+def test_points_with_extra_values_keep_x_and_y():
+    coords, counts = pack_points([[[1, 2, 0.5], [3, 4]], [[5, 6]]])
+    assert coords.tolist() == [[1, 2], [3, 4], [5, 6]]
+    assert counts.tolist() == [2, 1]
+
+def test_no_shapes():
+    assert yolo_bboxes([], 100, 100).shape == (0, 4)
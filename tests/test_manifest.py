@@ -0,0 +1,107 @@
+import os
+
+from labelme_tools.engine import FileResult
+from labelme_tools.manifest import ConversionManifest
+
+SETTINGS = {"kind": "annotated", "lowercase": False}
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def converted(json_path, image_path, outputs, label="Vehicle"):
+    return FileResult("converted", json_path, None, "", False, image_path, tuple(outputs), label)
+
+def run(output_dir, sources, settings=SETTINGS):
+    """One incremental run: returns (skipped JSONs, outputs removed).
+
+    `sources` maps each JSON to its (image, outputs); every source not skipped
+    is "converted" by writing its outputs.
+    """
+    manifest = ConversionManifest(output_dir, settings)
+    skipped = []
+    for json_path, (image_path, outputs) in sources.items():
+        if manifest.is_up_to_date(json_path):
+            skipped.append(json_path)
+            continue
+        for path in outputs:
+            write(path, "output")
+        manifest.record(converted(json_path, image_path, outputs))
+    return skipped, manifest.finish()
+
+def dataset(tmp_path, n=3):
+    sources = {}
+    for i in range(n):
+        json_path = str(tmp_path / "data" / f"f{i}.json")
+        image_path = str(tmp_path / "data" / f"f{i}.jpg")
+        write(json_path, '{"shapes": [%d]}' % i)
+        write(image_path, "image")
+        sources[json_path] = (image_path, [str(tmp_path / "out" / "Vehicle" / f"f{i}.jpg")])
+    return sources
+
+def test_unchanged_sources_are_skipped(tmp_path):
+    sources = dataset(tmp_path)
+    out = str(tmp_path / "out")
+    assert run(out, sources) == ([], 0)
+    assert run(out, sources) == (list(sources), 0)
+
+def test_changed_json_image_or_missing_output_is_converted_again(tmp_path):
+    sources = dataset(tmp_path)
+    out = str(tmp_path / "out")
+    run(out, sources)
+    edited, retouched, lost = list(sources)
+    write(edited, '{"shapes": ["edited"]}')
+    write(sources[retouched][0], "new image")
+    os.remove(sources[lost][1][0])
+    skipped, _ = run(out, sources)
+    assert skipped == []
+
+def test_touched_json_with_same_content_is_skipped(tmp_path):
+    sources = dataset(tmp_path)
+    out = str(tmp_path / "out")
+    run(out, sources)
+    json_path = next(iter(sources))
+    st = os.stat(json_path)
+    os.utime(json_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert run(out, sources)[0] == list(sources)
+
+def test_outputs_of_removed_sources_are_deleted(tmp_path):
+    sources = dataset(tmp_path)
+    out = str(tmp_path / "out")
+    run(out, sources)
+    removed_json = next(iter(sources))
+    removed_output = sources.pop(removed_json)[1][0]
+    assert run(out, sources) == (list(sources), 1)
+    assert not os.path.exists(removed_output)
+
+def test_relabelled_source_loses_its_old_output(tmp_path):
+    sources = dataset(tmp_path)
+    out = str(tmp_path / "out")
+    run(out, sources)
+    json_path = next(iter(sources))
+    old_output = sources[json_path][1][0]
+    write(json_path, '{"shapes": ["relabelled"]}')
+    sources[json_path] = (sources[json_path][0], [str(tmp_path / "out" / "Train" / "f0.jpg")])
+    assert run(out, sources)[1] == 1
+    assert not os.path.exists(old_output)
+    assert os.path.exists(sources[json_path][1][0])
+
+def test_changed_settings_rebuild_everything_but_keep_rewritten_outputs(tmp_path):
+    sources = dataset(tmp_path)
+    out = str(tmp_path / "out")
+    run(out, sources)
+    skipped, removed = run(out, sources, dict(SETTINGS, lowercase=True))
+    assert skipped == [] and removed == 0
+    assert all(os.path.exists(outputs[0]) for _, outputs in sources.values())
+
+def test_errors_are_retried(tmp_path):
+    sources = dataset(tmp_path, n=1)
+    out = str(tmp_path / "out")
+    run(out, sources)
+    json_path = next(iter(sources))
+    manifest = ConversionManifest(out, SETTINGS)
+    manifest.is_up_to_date(json_path)
+    manifest.record(FileResult("error", json_path, "exception", "boom", False))
+    assert manifest.finish() == 0
+    assert run(out, sources)[0] == []
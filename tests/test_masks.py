@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from labelme_tools.masks import instance_rles, rasterize, rle_counts, rle_mask, rle_string, semantic_mask
+
+mask_util = pytest.importorskip("pycocotools.mask")
+
+def random_instances(seed, size=(97, 61), n=12):
+    rng = np.random.default_rng(seed)
+    width, height = size
+    point_lists = []
+    for _ in range(n):
+        if rng.random() < 0.4:
+            point_lists.append(rng.uniform(-10, max(size) + 10, size=(2, 2)).tolist())
+        else:
+            cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+            angles = np.sort(rng.uniform(0, 2 * np.pi, size=int(rng.integers(3, 9))))
+            radius = rng.uniform(2, 30)
+            point_lists.append(np.column_stack((cx + radius * np.cos(angles), cy + radius * np.sin(angles))).tolist())
+    return rasterize(size, point_lists, column_major=True)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_instance_rles_match_coco(seed):
+    instances = random_instances(seed)
+    rles = instance_rles(instances)
+    ids = sorted(set(np.unique(instances).tolist()) - {0})
+    assert sorted(rles) == ids
+    for instance_id in ids:
+        expected = mask_util.encode(np.asfortranarray(instances == instance_id, dtype=np.uint8))
+        rle, area, bbox = rles[instance_id]
+        assert rle["size"] == list(expected["size"])
+        assert rle["counts"] == expected["counts"].decode("ascii")
+        assert area == int(mask_util.area(expected))
+        assert bbox == mask_util.toBbox(expected).tolist()
+
+def test_rle_string_matches_coco_on_large_counts():
+    rng = np.random.default_rng(7)
+    # Long runs need several 5-bit groups, and differences to the count two before go negative
+    counts = rng.integers(1, 3_000_000, size=40).tolist()
+    height = 2000
+    size = sum(counts)
+    width = -(-size // height)
+    counts[-1] += width * height - size
+    expected = mask_util.frPyObjects({"size": [height, width], "counts": counts}, height, width)
+    assert rle_string(counts) == expected["counts"].decode("ascii")
+    assert rle_counts(rle_string(counts)) == counts
+
+def test_rle_mask_round_trip():
+    instances = random_instances(11)
+    for instance_id, (rle, _, _) in instance_rles(instances).items():
+        assert np.array_equal(rle_mask(rle), instances == instance_id)
+
+def test_no_visible_instances():
+    assert instance_rles(np.zeros((4, 5), dtype=np.uint8)) == {}
+
+def test_semantic_mask_keeps_class_zero_apart_from_background():
+    instances = np.array([[0, 1], [2, 0]], dtype=np.uint8)
+    assert semantic_mask(instances, [0, 3]).tolist() == [[0, 1], [4, 0]]
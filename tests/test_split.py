@@ -0,0 +1,66 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from labelme_tools.split import SPLITS, DatasetSplit, parse_ratios
+
+RATIOS = parse_ratios("70/20/10")
+
+def samples(n, seed=0):
+    """(stem, class) pairs with uneven class sizes."""
+    rng = random.Random(seed)
+    return [(f"frame_{i:06d}", rng.choice(["Vehicle"] * 6 + ["Pedestrian"] * 3 + ["Train"])) for i in range(n)]
+
+def assign_all(split, items):
+    return {stem: split.assign(stem, stem, cls if split.stratify else None) for stem, cls in items}
+
+def test_hash_split_is_stable_across_instances_and_order():
+    items = samples(2000)
+    first = assign_all(DatasetSplit(RATIOS), items)
+    shuffled = items[:]
+    random.Random(1).shuffle(shuffled)
+    assert assign_all(DatasetSplit(RATIOS), shuffled) == first
+
+def test_new_samples_do_not_move_old_ones():
+    items = samples(3000)
+    before = assign_all(DatasetSplit(RATIOS), items[:1000])
+    after = assign_all(DatasetSplit(RATIOS), items)
+    assert {stem: after[stem] for stem in before} == before
+
+def test_seed_draws_another_split():
+    items = samples(500)
+    assert assign_all(DatasetSplit(RATIOS), items) != assign_all(DatasetSplit(RATIOS, seed="other"), items)
+
+def test_stratified_assignment_is_deterministic():
+    items = samples(2000)
+    assert assign_all(DatasetSplit(RATIOS, stratify=True), items) == \
+        assign_all(DatasetSplit(RATIOS, stratify=True), items)
+
+@pytest.mark.parametrize("n", [7, 100, 2500])
+def test_stratified_counts_follow_the_ratios(n):
+    items = samples(n, seed=n)
+    split = DatasetSplit(RATIOS, stratify=True)
+    assigned = assign_all(split, items)
+    per_class = Counter(cls for _, cls in items)
+    for cls, total in per_class.items():
+        counts = Counter(assigned[stem] for stem, c in items if c == cls)
+        assert split.counts[cls] == {name: counts[name] for name in SPLITS}
+        for name, ratio in zip(SPLITS, RATIOS):
+            assert counts[name] <= math.ceil(ratio * total)
+            assert abs(counts[name] - ratio * total) <= 1
+    assert sum(split.totals().values()) == n
+
+def test_empty_split_gets_nothing():
+    split = DatasetSplit(parse_ratios("80/20"), stratify=True)
+    assigned = assign_all(split, samples(300))
+    assert set(assigned.values()) == {"train", "val"}
+
+def test_kept_samples_count_until_converted_again():
+    split = DatasetSplit(RATIOS, stratify=True)
+    split.keep("a.json", "Vehicle", "val")
+    assert split.counts["Vehicle"]["val"] == 1
+    new = split.assign("a.json", "a", "Vehicle")
+    assert sum(split.counts["Vehicle"].values()) == 1
+    assert split.counts["Vehicle"][new] == 1